@@ -1,9 +1,12 @@
 import logging
 import re
+import sys
+from functools import lru_cache
 
 import dateutil
 import pandas as pd
 
+from .fuzzy import FuzzyMatch, FuzzyMatcher
 from .keywords import Keyword
 from .study import AdditionalProperty, Study
 from .vocabulary import (
@@ -15,6 +18,7 @@ from .vocabulary import (
     PROGRAMS,
     STUDY_DESIGNS,
     STUDY_DOMAINS,
+    Classifier,
     CollectionMethod,
     DataType,
     StudyDesign,
@@ -22,16 +26,53 @@ from .vocabulary import (
 
 logger = logging.getLogger(__name__)
 
+# distinct (property, value) pairs whose terms are kept for reuse
+PROPERTY_CACHE_SIZE = 65536
+
+FUZZY_VOCABULARIES = {
+    Classifier.STUDYDOMAIN: STUDY_DOMAINS,
+    Classifier.FOCUSPOPULATION: FOCUS_POPULATIONS,
+}
+
+
+@lru_cache(maxsize=8)
+def get_fuzzy_matcher(classifier, max_distance):
+    """
+    Shared FuzzyMatcher for the free-text vocabulary of a classifier, so
+    the BK-tree is built once; its lookup caches are bounded.
+    """
+    return FuzzyMatcher(FUZZY_VOCABULARIES[classifier], max_distance)
+
 
 class BasicParser:
-    def __init__(self, hierarchy=None):
+    def __init__(self, hierarchy=None, property_delimiters=None, fuzzy_distance=None):
+        """
+        property_delimiters splits the values of additional properties
+        into several terms, e.g., "R01; U01" with ";": a delimiter for all
+        properties, or a dict from property names to delimiters.
+        fuzzy_distance enables approximate matching of study domains and
+        focus populations, up to that many edits, for the parts of the
+        text that match no term exactly (e.g., "Seroprevelance"). The
+        recovered terms are kept in fuzzy_matches.
+        """
         self.hierarchy = hierarchy
+        self.property_delimiters = property_delimiters
+        # (property, value) -> terms, so each recent value is split once;
+        # bounded because watch mode keeps the parser for the whole process
+        self.property_terms = lru_cache(maxsize=PROPERTY_CACHE_SIZE)(
+            self.split_terms
+        )
+        # number of term checks, reported by StageProfiler
+        self.match_calls = 0
+        self.fuzzy_distance = fuzzy_distance
+        self.fuzzy_matches = []
 
     def prepare_string_for_matching(self, text: str):
         # remove non-alphabetic characters and convert to lowercase
         return re.sub(r"[^a-zA-Z]", "", text).casefold()
 
     def has_match(self, facet_node, text):
+        self.match_calls += 1
         if hasattr(facet_node, "synonyms"):
             for synonym in facet_node.synonyms:
                 if self.prepare_string_for_matching(synonym) in text:
@@ -57,14 +98,19 @@ class BasicParser:
         if pd.isna(focus_population_text):
             focus_populations = []
         else:
-            focus_population_text = self.prepare_string_for_matching(
-                focus_population_text
-            )
+            normalized_text = self.prepare_string_for_matching(focus_population_text)
             focus_populations = [
                 focus
                 for focus in FOCUS_POPULATIONS
-                if self.has_match(focus, focus_population_text)
+                if self.has_match(focus, normalized_text)
             ]
+            if self.fuzzy_distance:
+                focus_populations = self.add_fuzzy_matches(
+                    row,
+                    Classifier.FOCUSPOPULATION,
+                    focus_population_text,
+                    focus_populations,
+                )
         return focus_populations
 
     def parse_nih_institutes(self, row):
@@ -174,12 +220,40 @@ class BasicParser:
         domain_text = row[Keyword.DOMAIN.value]
         study_domains = []
         if not pd.isna(domain_text):
-            domain_text = self.prepare_string_for_matching(domain_text)
+            normalized_text = self.prepare_string_for_matching(domain_text)
             study_domains = [
-                topic for topic in STUDY_DOMAINS if self.has_match(topic, domain_text)
+                topic
+                for topic in STUDY_DOMAINS
+                if self.has_match(topic, normalized_text)
             ]
+            if self.fuzzy_distance:
+                study_domains = self.add_fuzzy_matches(
+                    row, Classifier.STUDYDOMAIN, domain_text, study_domains
+                )
         return study_domains
 
+    def add_fuzzy_matches(self, row, classifier, text, terms):
+        """
+        Add the terms that the unmatched parts of text match approximately
+        to the exactly matched terms, recording each in fuzzy_matches.
+        The result is in vocabulary order, like the exact matches.
+        """
+        matcher = get_fuzzy_matcher(classifier, self.fuzzy_distance)
+        recovered = matcher.recover(text, terms)
+        if not recovered:
+            return terms
+        phs = self.parse_phs(row)
+        for segment, term, distance in recovered:
+            self.fuzzy_matches.append(
+                FuzzyMatch(phs, classifier.label, segment, term.label, distance)
+            )
+        found = set(terms).union(term for _, term, _ in recovered)
+        return [term for term in FUZZY_VOCABULARIES[classifier] if term in found]
+
+    def fuzzy_match_table(self):
+        """DataFrame of the terms recovered by fuzzy matching."""
+        return pd.DataFrame(self.fuzzy_matches, columns=FuzzyMatch._fields)
+
     def parse_phs(self, row):
         """PHS ID"""
         return row[Keyword.PHS.value]
@@ -190,9 +264,37 @@ class BasicParser:
     def parse_additional_properties(self, row, properties):
         additional_properties = {}
         for name in properties:
-            additional_properties[name] = AdditionalProperty(name, row.get(name, None))
+            value = row.get(name, None)
+            additional_properties[name] = AdditionalProperty(
+                name, value, self.split_property(name, value)
+            )
         return additional_properties
 
+    def get_property_delimiter(self, name):
+        if isinstance(self.property_delimiters, dict):
+            return self.property_delimiters.get(name)
+        return self.property_delimiters
+
+    def split_property(self, name, value):
+        """
+        Terms of an additional property value: none for a missing value,
+        the parts between delimiters if the property has one, and the
+        value itself otherwise. Terms are interned, and the terms of recent
+        values are shared by the studies with the same value (see
+        PROPERTY_CACHE_SIZE).
+        """
+        if not isinstance(value, str) and pd.isna(value):
+            return ()
+        return self.property_terms(name, value)
+
+    def split_terms(self, name, value):
+        delimiter = self.get_property_delimiter(name)
+        if not isinstance(value, str):
+            return (value,)
+        parts = value.split(delimiter) if delimiter else [value]
+        parts = [sys.intern(part.strip()) for part in parts]
+        return tuple(dict.fromkeys(part for part in parts if part))
+
     def prune_additional_properties(self, dataframe, properties):
         """
         Remove additional properties that do not correspond to column names
@@ -213,50 +315,79 @@ class BasicParser:
             pruned.append(prop)
         return pruned
 
+    def parse_row(self, row, properties):
+        """
+        Parse the metadata of one study from a DataFrame row.
+        Returns None for studies that have not been approved.
+        """
+        status = self.parse_status(row)
+        if status != "Approved":  # only log approved studies
+            return None
+        program = self.parse_program(row)
+        nih_institutes = self.parse_nih_institutes(row)
+        collection_methods = self.parse_collection_methods(row)
+        study_designs = self.parse_study_designs(row)
+        population, population_range = self.parse_population(row)
+        data_types = self.parse_data_types(row)
+        study_domains = self.parse_study_domains(row)
+        focus_populations = self.parse_focus_populations(row)
+        phs = self.parse_phs(row)
+        if properties:
+            additional_properties = self.parse_additional_properties(row, properties)
+        else:
+            additional_properties = {}
+
+        return Study(
+            bundles=None,
+            contributors=None,
+            program=program,
+            phs_id=phs,
+            study_designs=study_designs,
+            data_types=data_types,
+            collection_methods=collection_methods,
+            nih_institutes=nih_institutes,
+            study_domains=study_domains,
+            population=population,
+            population_range=population_range,
+            focus_populations=focus_populations,
+            additional_properties=additional_properties,
+            doi=None,
+        )
+
     def parse_metadata_dataframe(self, metadata, properties):
         """
         Each row of the DataFrame contains metadata attributes for the study.
         Process each row and index the study's metadata by its PHS ID.
         """
         properties = self.prune_additional_properties(metadata, properties)
+        self.property_terms.cache_clear()
         columns_to_parse = [kw.value for kw in Keyword] + properties
         logger.info(f"Parsing dataframe columns: {columns_to_parse}")
         studies = {}
         for _, row in metadata.iterrows():
-            status = self.parse_status(row)
-            if status != "Approved":  # only log approved studies
-                continue
-            program = self.parse_program(row)
-            nih_institutes = self.parse_nih_institutes(row)
-            collection_methods = self.parse_collection_methods(row)
-            study_designs = self.parse_study_designs(row)
-            population, population_range = self.parse_population(row)
-            data_types = self.parse_data_types(row)
-            study_domains = self.parse_study_domains(row)
-            focus_populations = self.parse_focus_populations(row)
-            phs = self.parse_phs(row)
-            if properties:
-                additional_properties = self.parse_additional_properties(
-                    row, properties
-                )
-            else:
-                additional_properties = {}
-
-            study = Study(
-                bundles=None,
-                contributors=None,
-                program=program,
-                phs_id=phs,
-                study_designs=study_designs,
-                data_types=data_types,
-                collection_methods=collection_methods,
-                nih_institutes=nih_institutes,
-                study_domains=study_domains,
-                population=population,
-                population_range=population_range,
-                focus_populations=focus_populations,
-                additional_properties=additional_properties,
-                doi=None,
-            )
-            studies[phs] = study
+            study = self.parse_row(row, properties)
+            if study is not None:
+                studies[study.phs_id] = study
+        return studies
+
+    def parse_metadata_chunks(self, chunks, properties):
+        """
+        Parse metadata given as an iterable of DataFrames (e.g., from
+        db_source.read_query_chunks) so the complete metadata never has to
+        be held in memory. The result is the same as parsing the
+        concatenated DataFrame.
+        """
+        studies = {}
+        n_rows = 0
+        pruned = None
+        self.property_terms.cache_clear()
+        for chunk in chunks:
+            if pruned is None:
+                pruned = self.prune_additional_properties(chunk, properties)
+            for _, row in chunk.iterrows():
+                study = self.parse_row(row, pruned)
+                if study is not None:
+                    studies[study.phs_id] = study
+            n_rows += len(chunk)
+        logger.info(f"Parsed {n_rows} rows in chunks.")
         return studies
@@ -1,97 +1,176 @@
+import heapq
 import logging
+import re
 from collections import namedtuple
 from dataclasses import asdict, dataclass
+from itertools import chain, compress
+from operator import attrgetter, itemgetter
 from typing import Dict, List
 
+import numpy as np
 import pandas as pd
 
+from .parallel import parallel_map
+from .properties import PropertyCodes
+from .search_url import (
+    SEARCH_URL,
+    combine_selections,
+    facet_clause,
+    facet_url,
+    normalize_selection,
+    url_selection,
+)
 from .study import Study
 from .vocabulary import AdditionalClassifier, Classifier
 
 logger = logging.getLogger(__name__)
 
+# classifier of an additional property, labeled by its key
+AdditionalKey = namedtuple("Classifier", "label")
+
+HYPERLINK_PATTERN = re.compile(r'^=HYPERLINK\("(.*?)", "(.*)"\)$', re.DOTALL)
+
 
 def get_additional_keys(studies):
-    additional_property_keys = set()
+    """Additional property keys in order of first occurrence."""
+    additional_property_keys = {}
     for study in studies.values():
-        additional_property_keys.update(set(study.additional_properties.keys()))
-    return additional_property_keys
+        additional_property_keys.update(dict.fromkeys(study.additional_properties))
+    return list(additional_property_keys)
+
+
+def get_property_codes(studies, key):
+    """PropertyCodes of the terms of an additional property, by study."""
+    return PropertyCodes.from_terms(
+        key,
+        [
+            (
+                study.additional_properties[key].terms
+                if key in study.additional_properties
+                else ()
+            )
+            for study in studies.values()
+        ],
+    )
+
+
+# Labels sheet columns of the classifiers, in order, with the study
+# attribute that holds their terms and whether a study has several terms
+LABEL_COLUMNS = [
+    ("Program", Classifier.PROGRAM, "program", False),
+    ("Study Designs", Classifier.STUDYDESIGN, "study_designs", True),
+    ("Data Types", Classifier.DATATYPE, "data_types", True),
+    ("Collection Methods", Classifier.COLLECTIONMETHOD, "collection_methods", True),
+    ("NIH Institutes", Classifier.NIHINSTITUTE, "nih_institutes", True),
+    ("Study Domains", Classifier.STUDYDOMAIN, "study_domains", True),
+    ("Study Focus Populations", Classifier.FOCUSPOPULATION, "focus_populations", True),
+    ("Population Range", Classifier.POPULATIONRANGE, "population_range", False),
+]
+
+
+def is_missing_label(value):
+    return value is None or (isinstance(value, float) and value != value)
+
+
+def label_column(labels, categorical=False):
+    """
+    Column of a list of labels: the list itself, or with categorical a
+    pd.Categorical in which every distinct label is stored once.
+    """
+    if not categorical:
+        return labels
+    codes, categories = pd.factorize(pd.Series(labels, dtype=object))
+    return pd.Categorical.from_codes(codes, pd.Index(categories, dtype=object))
 
 
-def label_studies(studies: Dict[str, Study]):
+def label_studies(studies: Dict[str, Study], categorical=False):
     """
     Label each study by values from each of its classifiers.
+    The table is built a column at a time. With categorical, the label
+    columns are categorical, which keeps the table small when many
+    studies share labels.
     """
-    study_labels = {
-        "phs": [],
-        "Program": [],
-        "Study Designs": [],
-        "Data Types": [],
-        "Collection Methods": [],
-        "NIH Institutes": [],
-        "Study Domains": [],
-        "Study Focus Populations": [],
-        "Population Range": [],
-        "Population Count": [],
-    }
+    study_list = list(studies.values())
+    study_labels = {"phs": [study.phs_id for study in study_list]}
+    get_label = attrgetter("label")
+    for column, _, attribute, multiple in LABEL_COLUMNS:
+        values = map(attrgetter(attribute), study_list)
+        if multiple:
+            labels = ["; ".join(map(get_label, terms)) for terms in values]
+        else:
+            labels = [None if term is None else term.label for term in values]
+        study_labels[column] = label_column(labels, categorical)
+    study_labels["Population Count"] = [study.population for study in study_list]
 
     additional_property_keys = get_additional_keys(studies)
     # add the key in title case
     for key in additional_property_keys:
-        study_labels[key.title()] = []
+        values = [
+            (
+                study.additional_properties[key].value
+                if key in study.additional_properties
+                else None
+            )
+            for study in study_list
+        ]
+        study_labels[key.title()] = label_column(values, categorical)
 
     logger.info(f"Mapping studies to keys: {list(study_labels.keys())}")
-    for study in studies.values():
-        if study.program is not None:
-            study_labels["Program"].append(study.program.label)
+    return pd.DataFrame(study_labels)
+
+
+def label_studies_long(studies: Dict[str, Study]):
+    """
+    Tidy form of label_studies: one row per (phs, classifier, term), in
+    the order of the studies, with categorical columns so every PHS ID,
+    classifier and term label is stored once. Additional properties are
+    classifiers named by their key.
+    """
+    study_list = list(studies.values())
+    n_studies = len(study_list)
+    classifiers = [classifier.label for classifier in Classifier]
+    rows, classifier_codes, labels = [], [], []
+    get_label = attrgetter("label")
+    for _, classifier, attribute, multiple in LABEL_COLUMNS:
+        values = list(map(attrgetter(attribute), study_list))
+        if multiple:
+            lengths = np.fromiter(map(len, values), dtype=np.intp, count=n_studies)
+            study_rows = np.repeat(np.arange(n_studies), lengths)
+            terms = list(chain.from_iterable(values))
         else:
-            study_labels["Program"].append(None)
-        study_labels["phs"].append(study.phs_id)
-        study_labels["Study Designs"].append(
-            "; ".join([design.label for design in study.study_designs]),
-        )
-        study_labels["Data Types"].append(
-            "; ".join([data_type.label for data_type in study.data_types])
-        )
-        study_labels["Collection Methods"].append(
-            "; ".join([method.label for method in study.collection_methods])
-        )
-        study_labels["NIH Institutes"].append(
-            "; ".join([institute.label for institute in study.nih_institutes])
+            study_rows = np.arange(n_studies)
+            terms = values
+        present = np.fromiter(
+            (term is not None for term in terms), dtype=bool, count=len(terms)
         )
-        study_labels["Study Domains"].append(
-            "; ".join([topic.label for topic in study.study_domains])
+        rows.append(study_rows[present])
+        labels.extend(map(get_label, compress(terms, present)))
+        classifier_codes.append(
+            np.full(present.sum(), classifiers.index(classifier.label))
         )
-        study_labels["Study Focus Populations"].append(
-            "; ".join([focus.label for focus in study.focus_populations])
-        )
-        if study.population_range is not None:
-            study_labels["Population Range"].append(study.population_range.label)
-        else:
-            study_labels["Population Range"].append(None)
-        study_labels["Population Count"].append(study.population)
-        for key in additional_property_keys:
-            if key in study.additional_properties:
-                study_labels[key.title()].append(study.additional_properties[key].value)
-            else:
-                study_labels[key.title()].append(None)
-
-    study_labels = pd.DataFrame(study_labels)
-    return study_labels
-
-
-def get_additional_classifiers(studies):
-    keys = {}
-    values = {}
-    Key = namedtuple("Classifier", "label")
-    for study in studies.values():
-        for prop in study.additional_properties.values():
-            if prop.key not in keys:
-                keys[prop.key] = Key(prop.key)
-            if prop.value not in values:
-                value = AdditionalClassifier(prop.value)
-                values[prop.value] = value
-    return keys, values
+    for key in get_additional_keys(studies):
+        property_codes = get_property_codes(studies, key)
+        rows.append(property_codes.rows())
+        labels.extend(property_codes.categories[property_codes.codes])
+        classifier_codes.append(np.full(len(property_codes.codes), len(classifiers)))
+        classifiers.append(key)
+
+    rows = np.concatenate(rows)
+    # group the rows of each study, keeping the classifier order
+    order = np.argsort(rows, kind="stable")
+    term_codes, terms = pd.factorize(pd.Series(labels, dtype=object))
+    classifier_codes = np.concatenate(classifier_codes)
+    return pd.DataFrame(
+        {
+            "phs": pd.Categorical.from_codes(rows[order], list(studies)),
+            "classifier": pd.Categorical.from_codes(
+                classifier_codes[order], classifiers
+            ),
+            "term": pd.Categorical.from_codes(
+                term_codes[order], pd.Index(terms, dtype=object)
+            ),
+        }
+    )
 
 
 def map_studies(studies: Dict[str, Study]):
@@ -110,55 +189,124 @@ def map_studies(studies: Dict[str, Study]):
                     label_to_studies[label] = []
                 label_to_studies[label].append(study)
         studies_by_classifier[classifier] = label_to_studies
-    additional_keys, additional_values = get_additional_classifiers(studies)
-    for classifier in additional_keys.values():
-        label_to_studies = {}
-        for study in studies.values():
-            for k, v in study.additional_properties.items():
-                if k != classifier.label:
-                    continue
-                value = additional_values[v.value]
-                if value not in label_to_studies:
-                    label_to_studies[value] = []
-                label_to_studies[value].append(study)
-        studies_by_classifier[classifier] = label_to_studies
+    # additional properties are grouped by term code rather than by study
+    study_list = list(studies.values())
+    for key in get_additional_keys(studies):
+        property_codes = get_property_codes(studies, key)
+        studies_by_classifier[AdditionalKey(key)] = {
+            AdditionalClassifier(term): [study_list[i] for i in rows]
+            for term, rows in zip(property_codes.categories, property_codes.groups())
+        }
     return studies_by_classifier
 
 
-def reduce_studies(studies: Dict[Classifier, Study], n_total_studies: int):
+def reduce_studies(
+    studies: Dict[Classifier, Study],
+    n_total_studies: int,
+    max_workers=None,
+    pool="thread",
+):
     """
     Aggregates counts for each classifier.
     For each classifier, counts are aggregated over each named category.
     The final data is returned as a Pandas DataFrame.
+    Classifiers are independent, so with max_workers > 1 they are reduced
+    in a thread or process pool (see parallel.parallel_map); the result
+    is the same.
     """
-    counts_by_classifier = {}
-    # for classifier in Classifier:
-    for classifier in studies.keys():
-        label_counts = [
-            (
-                label,
-                len(grouped_studies),
-                "; ".join([study.phs_id for study in grouped_studies]),
-                label.coded,
-            )
+    classifiers = list(studies.keys())
+    # workers get PHS IDs rather than studies, which are slow to pickle
+    grouped_phs_ids = [
+        {
+            label: [study.phs_id for study in grouped_studies]
             for label, grouped_studies in studies[classifier].items()
             if label is not None
-        ]
-        # sort by count in non-ascending order
-        label_counts.sort(key=lambda x: x[1], reverse=True)
-        counts = pd.DataFrame(
-            {
-                classifier.label: [
-                    make_hyperlink_label(x[0].label, x[0].url) for x in label_counts
-                ],  # these are the labels
-                "Count": [x[1] for x in label_counts],
-                "Percentage": [x[1] / n_total_studies for x in label_counts],
-                "Coded Term": [x[3] for x in label_counts],
-                "PHS IDs": [x[2] for x in label_counts],
-            }
+        }
+        for classifier in classifiers
+    ]
+    tables = parallel_map(
+        reduce_classifier,
+        [classifier.label for classifier in classifiers],
+        grouped_phs_ids,
+        [n_total_studies] * len(classifiers),
+        max_workers=max_workers,
+        pool=pool,
+    )
+    return {
+        classifier.label: table for classifier, table in zip(classifiers, tables)
+    }
+
+
+def reduce_classifier(classifier_label, label_to_phs_ids, n_total_studies):
+    """Count table of one classifier from the PHS IDs of each label."""
+    label_counts = [
+        (label, len(phs_ids), "; ".join(phs_ids), label.coded)
+        for label, phs_ids in label_to_phs_ids.items()
+    ]
+    return make_counts_table(classifier_label, label_counts, n_total_studies)
+
+
+def make_counts_table(classifier_label, label_counts, n_total_studies):
+    """
+    Count table of one classifier from (label, count, PHS IDs, coded)
+    tuples, where each label has a label and url attribute.
+    """
+    # sort by count in non-ascending order
+    label_counts = sorted(label_counts, key=lambda x: x[1], reverse=True)
+    counts = pd.DataFrame(
+        {
+            classifier_label: [
+                make_hyperlink_label(x[0].label, x[0].url) for x in label_counts
+            ],  # these are the labels
+            "Count": [x[1] for x in label_counts],
+            "Percentage": [x[1] / n_total_studies for x in label_counts],
+            "Coded Term": [x[3] for x in label_counts],
+            "PHS IDs": [x[2] for x in label_counts],
+        }
+    )
+    return counts
+
+
+def top_label_counts(studies_by_classifier, k, coded_only=True):
+    """
+    The k labels with the most studies for each classifier, chosen with a
+    bounded heap instead of sorting every label. Ties are broken as in
+    reduce_studies, so these are the first k rows of its count tables
+    (restricted to coded terms with coded_only).
+
+    Returns:
+        Dict[str, List[Tuple[str, int]]]: (label or hyperlink formula,
+            count) pairs by classifier label, in non-ascending order.
+    """
+    top = {}
+    for classifier, label_to_studies in studies_by_classifier.items():
+        label_counts = (
+            (label, len(grouped_studies))
+            for label, grouped_studies in label_to_studies.items()
+            if label is not None and (label.coded or not coded_only)
         )
-        counts_by_classifier[classifier.label] = counts
-    return counts_by_classifier
+        top[classifier.label] = [
+            (make_hyperlink_label(label.label, label.url), count)
+            for label, count in heapq.nlargest(k, label_counts, key=itemgetter(1))
+        ]
+    return top
+
+
+def top_table_counts(counts: pd.DataFrame, k, coded_only=True):
+    """
+    top_label_counts for a count table of reduce_studies: the (label,
+    count) pairs of the k rows with the highest counts, first rows first
+    among ties, without filtering or sorting the table.
+    """
+    values = counts["Count"].to_numpy()
+    rows = range(len(counts))
+    if coded_only:
+        rows = np.flatnonzero(counts["Coded Term"].to_numpy() == True)
+    labels = counts.iloc[:, 0].to_numpy()
+    return [
+        (labels[i], values[i])
+        for i in heapq.nlargest(k, rows, key=values.__getitem__)
+    ]
 
 
 def make_hyperlink_label(label, hyperlink):
@@ -170,6 +318,178 @@ def make_hyperlink_label(label, hyperlink):
     return '=HYPERLINK("%s", "%s")' % (hyperlink, label)
 
 
+def split_hyperlink_label(value):
+    """
+    Inverse of make_hyperlink_label. Returns the (label, hyperlink) pair,
+    with a None hyperlink for plain labels.
+    """
+    if isinstance(value, str):
+        match = HYPERLINK_PATTERN.match(value)
+        if match:
+            return match.group(2), match.group(1)
+    return value, None
+
+
+def split_hyperlink_labels(values) -> pd.DataFrame:
+    """
+    split_hyperlink_label for a whole column at once. Returns a DataFrame
+    with Label and URL columns (URL is None for plain labels).
+    """
+    values = pd.Series(values, copy=False).astype(object)
+    parts = values.str.extract(HYPERLINK_PATTERN)
+    linked = parts[0].notna().to_numpy()
+    return pd.DataFrame(
+        {
+            "Label": np.where(linked, parts[1].to_numpy(), values.to_numpy()),
+            "URL": np.where(linked, parts[0].to_numpy(), None),
+        },
+        index=values.index,
+    )
+
+
+def make_hyperlink_labels(labels, urls) -> pd.Series:
+    """make_hyperlink_label for whole columns of labels and URLs at once."""
+    labels = pd.Series(labels, copy=False).astype(object)
+    urls = pd.Series(urls, index=labels.index).astype(object)
+    linked = urls.notna()
+    formulas = (
+        '=HYPERLINK("' + urls[linked] + '", "' + labels[linked].astype(str) + '")'
+    )
+    return labels.where(~linked, formulas)
+
+
+def label_urls(labels, facet_name) -> pd.Series:
+    """
+    Search URLs for labels as values of a Data Hub facet. Each distinct
+    label is built once (and memoized by search_url.facet_url).
+    """
+    labels = pd.Series(labels, copy=False)
+    urls = {
+        label: facet_url({facet_name: str(label)})
+        for label in labels.dropna().unique()
+    }
+    return labels.map(urls)
+
+
+def counts_table_urls(counts: pd.DataFrame, facet_name=None) -> pd.DataFrame:
+    """
+    Label and URL of each row of a count table from reduce_studies. With
+    a facet_name, labels without a URL (e.g., values of an additional
+    property) link to the search for them in that facet.
+    """
+    split = split_hyperlink_labels(counts.iloc[:, 0])
+    if facet_name is not None:
+        missing = split["URL"].isna()
+        split.loc[missing, "URL"] = label_urls(split["Label"][missing], facet_name)
+    return split
+
+
+def add_search_links(counts_by_classifier, facet_names):
+    """
+    Link the labels of count tables to the Data Hub search. facet_names
+    maps classifier labels, usually additional properties such as
+    "FOA NUMBER", to the facet their values are searched in. Returns a
+    new dict; the count tables of other classifiers are shared.
+    """
+    linked = dict(counts_by_classifier)
+    for classifier_label, facet_name in facet_names.items():
+        if classifier_label not in linked:
+            continue
+        counts = linked[classifier_label].copy()
+        split = counts_table_urls(counts, facet_name)
+        counts.iloc[:, 0] = make_hyperlink_labels(split["Label"], split["URL"])
+        linked[classifier_label] = counts
+    return linked
+
+
+def label_selections(classifier_label, labels, facet_names=None):
+    """
+    Data Hub selection of each label of a classifier: that of the URL of
+    its vocabulary term, or else the label as a value of the facet given
+    by facet_names[classifier_label]. None if there is neither.
+    """
+    term_urls = {}
+    for classifier in Classifier:
+        if classifier.label == classifier_label:
+            term_urls = {term.label: term.url for term in classifier.classifier}
+    facet_name = (facet_names or {}).get(classifier_label)
+    selections = []
+    for label in labels:
+        url = term_urls.get(label)
+        if url is not None:
+            selections.append(url_selection(url))
+        elif facet_name is not None:
+            selections.append(normalize_selection({facet_name: str(label)}))
+        else:
+            selections.append(None)
+    return selections
+
+
+def same_facet_values(first, second):
+    """
+    Whether two selections agree on the facets they share. The Data Hub
+    matches any of the values of a facet, so a study with a value of
+    first and a different value of second cannot be searched for.
+    """
+    values = {name: set(facets) for name, facets in first}
+    return all(
+        set(facets) == values[name] for name, facets in second if name in values
+    )
+
+
+def crosstab_urls(table: pd.DataFrame, facet_names=None) -> pd.DataFrame:
+    """
+    Search URL of every cell of a crosstab_studies table: the studies
+    with both the row label and the column label. Cells whose row or
+    column label has no URL are None, and so are cells whose labels are
+    different values of one facet (e.g., two study designs), because the
+    Data Hub would return studies with either of them. See
+    label_selections for facet_names.
+    """
+    rows = label_selections(table.index.name, table.index, facet_names)
+    columns = label_selections(table.columns.name, table.columns, facet_names)
+    row_names = {name for selection in rows if selection for name, _ in selection}
+    column_names = {
+        name for selection in columns if selection for name, _ in selection
+    }
+    if row_names & column_names:
+        urls = np.array(
+            [
+                [
+                    (
+                        facet_url(combine_selections(r, c))
+                        if r and c and same_facet_values(r, c)
+                        else None
+                    )
+                    for c in columns
+                ]
+                for r in rows
+            ],
+            dtype=object,
+        ).reshape(len(rows), len(columns))
+    else:
+        # a cell URL is the clauses of its row followed by those of its column
+        def clauses(selections):
+            return np.array(
+                [
+                    ",".join(facet_clause(name, values) for name, values in s)
+                    if s
+                    else ""
+                    for s in selections
+                ],
+                dtype=object,
+            )
+
+        heads = SEARCH_URL + "%5B" + clauses(rows) + ","
+        tails = clauses(columns) + "%5D"
+        urls = np.add.outer(heads, tails)
+        missing = np.logical_or.outer(
+            [s is None for s in rows], [s is None for s in columns]
+        )
+        urls[missing] = None
+    return pd.DataFrame(urls, index=table.index, columns=table.columns)
+
+
 @dataclass
 class Count:
     label: str
@@ -198,3 +518,39 @@ def aggregate_counts(studies_by_classifier: Dict[Classifier, Study]):
             counts.append(asdict(count))
         aggregate_counts[classifier.label] = counts
     return aggregate_counts
+
+
+def get_study_labels(study: Study, classifier_label: str):
+    """
+    Labels of a study for a classifier, given by its label (e.g.,
+    "Study Design") or by the name of an additional property.
+    """
+    for classifier in Classifier:
+        if classifier.label == classifier_label:
+            terms = study.get_classifiers(classifier)
+            return [term.label for term in terms if term is not None]
+    if classifier_label in study.additional_properties:
+        return list(study.additional_properties[classifier_label].terms)
+    return []
+
+
+def crosstab_studies(
+    studies: Dict[str, Study], row_classifier: str, column_classifier: str
+):
+    """
+    Count studies for every pair of labels from two classifiers, e.g.,
+    Program by Study Design. A study with several labels is counted
+    once for each pair of its labels.
+    """
+    pairs = []
+    for study in studies.values():
+        row_labels = get_study_labels(study, row_classifier)
+        column_labels = get_study_labels(study, column_classifier)
+        pairs.extend((r, c) for r in row_labels for c in column_labels)
+    pairs = pd.DataFrame(pairs, columns=["row", "column"])
+    return pd.crosstab(
+        pairs["row"],
+        pairs["column"],
+        rownames=[row_classifier],
+        colnames=[column_classifier],
+    )
@@ -0,0 +1,102 @@
+import logging
+import queue
+import threading
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 1000
+
+# marks the end of the query results in the prefetch queue
+_DONE = object()
+
+
+def fetch_chunks(connection, query, parameters=(), chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Run a query on a DB-API connection and yield its rows as DataFrames
+    of at most chunk_size rows, fetched with cursor.fetchmany. Columns are
+    named after the query's result columns, so alias them to the metadata
+    column names, e.g., SELECT status AS "STUDY STATUS".
+    """
+    # a function opens a connection that is closed with the cursor
+    opened = not hasattr(connection, "cursor")
+    if opened:
+        connection = connection()
+    cursor = connection.cursor()
+    try:
+        cursor.execute(query, parameters)
+        columns = [description[0] for description in cursor.description]
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+            if not rows:
+                break
+            yield pd.DataFrame.from_records(rows, columns=columns)
+    finally:
+        cursor.close()
+        if opened:
+            connection.close()
+
+
+def prefetch_chunks(chunks, prefetch=2):
+    """
+    Iterate over chunks while a background thread produces the next ones,
+    so fetching from the database overlaps with parsing. At most prefetch
+    chunks are held in memory ahead of the consumer. Errors raised while
+    fetching are raised in the consumer.
+    """
+    buffer = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+
+    def put(item):
+        # give up once the consumer has stopped so the thread can exit
+        while not stop.is_set():
+            try:
+                buffer.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        try:
+            for chunk in chunks:
+                if not put(chunk):
+                    return
+            put(_DONE)
+        except BaseException as e:
+            put(e)
+        finally:
+            if hasattr(chunks, "close"):
+                chunks.close()
+
+    thread = threading.Thread(target=produce, daemon=True)
+    thread.start()
+    try:
+        while True:
+            chunk = buffer.get()
+            if chunk is _DONE:
+                break
+            if isinstance(chunk, BaseException):
+                raise chunk
+            yield chunk
+    finally:
+        stop.set()
+        thread.join()
+
+
+def read_query_chunks(
+    connection, query, parameters=(), chunk_size=DEFAULT_CHUNK_SIZE, prefetch=2
+):
+    """
+    Stream the results of a query in chunks (see fetch_chunks). With
+    prefetch > 0 the rows are fetched in a background thread; the cursor
+    is then used from that thread, so pass a connection that allows it
+    (e.g., sqlite3.connect(path, check_same_thread=False)) or a function
+    that opens a new connection, which is called in the fetching thread
+    and closed after the last row.
+    """
+    chunks = fetch_chunks(connection, query, parameters, chunk_size)
+    if prefetch <= 0:
+        return chunks
+    return prefetch_chunks(chunks, prefetch)
@@ -0,0 +1,240 @@
+import csv
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .gcbo import ELEMENT_PREFIX
+from .study import Bundle, DataDictionary, DataFile, Metadata
+
+logger = logging.getLogger(__name__)
+
+DICTIONARY_SUFFIX = "_dict.csv"
+DATA_SUFFIX = "_data.csv"
+METADATA_SUFFIX = "_meta.json"
+# columns that hold the variable name in RADx data dictionaries, by preference
+NAME_COLUMNS = ("Id", "Variable / Field Name", "Variable", "Name")
+PHS_PATTERN = re.compile(r"phs\d+", re.IGNORECASE)
+
+# variable lookup of a worker process, set by init_worker
+_LOOKUP = {}
+
+
+def discover_bundles(root):
+    """
+    Walk a directory of study bundles. Files are recognized by their
+    suffix (*_DICT.csv, *_DATA.csv and *_META.json, in any case) and
+    grouped into one Bundle per directory. A bundle belongs to the study
+    whose PHS ID appears in its path below root, or else to the top-level
+    directory that contains it.
+
+    Returns:
+        List[Tuple[str, Bundle]]: (study, bundle) pairs in sorted path order.
+    """
+    bundles = []
+    for directory, subdirectories, file_names in os.walk(root):
+        subdirectories.sort()
+        files = {DICTIONARY_SUFFIX: [], DATA_SUFFIX: [], METADATA_SUFFIX: []}
+        for file_name in sorted(file_names):
+            for suffix, found in files.items():
+                if file_name.lower().endswith(suffix):
+                    found.append(os.path.join(directory, file_name))
+        if not any(files.values()):
+            continue
+        bundle = Bundle(
+            metadata=[Metadata(f) for f in files[METADATA_SUFFIX]],
+            dictionary=[DataDictionary(f) for f in files[DICTIONARY_SUFFIX]],
+            data_file=[DataFile(f) for f in files[DATA_SUFFIX]],
+        )
+        bundles.append((study_of(root, directory), bundle))
+    return bundles
+
+
+def study_of(root, directory):
+    relative = os.path.relpath(directory, root)
+    match = PHS_PATTERN.search(relative)
+    if match:
+        return match.group().lower()
+    return relative.split(os.sep)[0]
+
+
+def normalize_variable(name):
+    return str(name).strip().casefold()
+
+
+def build_variable_lookup(ontology):
+    """
+    Map normalized variable names to data element names: the bare element
+    name (nih_high_temp for bmir-radx:nih_high_temp) and each altLabel.
+    Exact names take precedence over altLabels. RADx data elements share
+    their altLabels with the external terms they are aligned to, so an
+    altLabel resolves to its RADx element if there is exactly one, and to
+    an external term only if no other element has the altLabel; other
+    altLabels (e.g., "pyrexia", used by two RADx elements) are ambiguous
+    and left out. DataElementValue classes are not variables.
+    """
+    value_classes = ontology.find_value_classes()
+    elements = [
+        (name, node)
+        for name, node in ontology.element_nodes.items()
+        if name not in value_classes
+    ]
+    alt_label_elements = {}
+    for name, node in elements:
+        for alt_label in node.alt_labels or ():
+            key = normalize_variable(alt_label)
+            alt_label_elements.setdefault(key, set()).add(name)
+    lookup = {}
+    for alt_label, names in alt_label_elements.items():
+        radx_names = [name for name in names if name.startswith(ELEMENT_PREFIX)]
+        candidates = radx_names or list(names)
+        if len(candidates) == 1:
+            lookup[alt_label] = candidates[0]
+    for name, node in elements:
+        bare = name[len(ELEMENT_PREFIX) :] if name.startswith(ELEMENT_PREFIX) else name
+        lookup[normalize_variable(bare)] = name
+    return lookup
+
+
+def read_variable_names(file_name, name_column=None):
+    """
+    Stream the variable names of a data dictionary CSV with the csv
+    module, one row at a time.
+    """
+    with open(file_name, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f)
+        header = next(reader, None)
+        if header is None:
+            return
+        columns = [name_column] if name_column else NAME_COLUMNS
+        index = next((header.index(c) for c in columns if c in header), 0)
+        for row in reader:
+            if len(row) > index and row[index].strip():
+                yield row[index]
+
+
+def init_worker(lookup):
+    _LOOKUP.clear()
+    _LOOKUP.update(lookup)
+
+
+def resolve_dictionary(file_name, name_column=None, lookup=None):
+    """
+    Resolve the variables of a data dictionary to data elements.
+
+    Returns:
+        Tuple[List[str], int]: names of the matched data elements (in order
+            of first match) and the number of unmatched variables.
+    """
+    lookup = _LOOKUP if lookup is None else lookup
+    matched = {}
+    unmatched = 0
+    try:
+        for variable in read_variable_names(file_name, name_column):
+            element = lookup.get(normalize_variable(variable))
+            if element is None:
+                unmatched += 1
+            else:
+                matched[element] = None
+    except (OSError, UnicodeDecodeError, csv.Error) as e:
+        logger.warning(f"Cannot read data dictionary {file_name}: {e}")
+    return list(matched), unmatched
+
+
+class AncestorCache:
+    """Memoized ancestors of data elements for rolling up counts."""
+
+    def __init__(self, ontology):
+        self.ontology = ontology
+        self.ancestors = {}
+
+    def get(self, name):
+        if name not in self.ancestors:
+            node = self.ontology.element_nodes[name]
+            names = set()
+            for parent in node.parents:
+                if parent is self.ontology.root:
+                    continue
+                names.add(parent.name)
+                names.update(self.get(parent.name))
+            self.ancestors[name] = frozenset(names)
+        return self.ancestors[name]
+
+
+def scan_dictionaries(root, ontology, max_workers=None, name_column=None):
+    """
+    Find the data dictionaries of the study bundles below root, resolve
+    their variables to GCBO data elements in a process pool and count the
+    studies that use each element. Each study also counts toward every
+    ancestor of the elements it uses (e.g., SymptomDataElement), so
+    broader elements report the studies of their subclasses.
+
+    Returns:
+        pd.DataFrame: Element, Label, Direct Studies, Studies and PHS IDs
+            for each element used by at least one study, by Studies in
+            non-ascending order.
+    """
+    dictionaries = [
+        (study, d.file_name)
+        for study, bundle in discover_bundles(root)
+        for d in bundle.dictionary
+    ]
+    logger.info(f"Scanning {len(dictionaries)} data dictionaries in {root}.")
+    lookup = build_variable_lookup(ontology)
+    file_names = [file_name for _, file_name in dictionaries]
+    max_workers = max_workers or os.cpu_count() or 1
+    if max_workers == 1 or len(file_names) <= 1:
+        results = [resolve_dictionary(f, name_column, lookup) for f in file_names]
+    else:
+        # many small dictionaries: send them to the workers in batches
+        chunksize = max(1, len(file_names) // (4 * max_workers))
+        with ProcessPoolExecutor(
+            max_workers=max_workers, initializer=init_worker, initargs=(lookup,)
+        ) as executor:
+            results = list(
+                executor.map(
+                    resolve_dictionary,
+                    file_names,
+                    [name_column] * len(file_names),
+                    chunksize=chunksize,
+                )
+            )
+
+    direct = {}
+    n_unmatched = 0
+    for (study, _), (elements, unmatched) in zip(dictionaries, results):
+        direct.setdefault(study, set()).update(elements)
+        n_unmatched += unmatched
+    logger.info(f"{n_unmatched} variables did not match a data element.")
+    return count_studies_per_element(ontology, direct)
+
+
+def count_studies_per_element(ontology, elements_by_study):
+    """
+    Count studies per element from the elements each study uses directly,
+    rolling studies up to the ancestors of their elements.
+    """
+    ancestors = AncestorCache(ontology)
+    direct_studies = {}
+    all_studies = {}
+    for study in sorted(elements_by_study):
+        elements = elements_by_study[study]
+        rolled_up = set(elements)
+        for element in elements:
+            direct_studies.setdefault(element, []).append(study)
+            rolled_up.update(ancestors.get(element))
+        for element in rolled_up:
+            all_studies.setdefault(element, []).append(study)
+
+    rows = sorted(all_studies.items(), key=lambda item: (-len(item[1]), item[0]))
+    return pd.DataFrame(
+        {
+            "Element": [element for element, _ in rows],
+            "Label": [ontology.element_nodes[element].label for element, _ in rows],
+            "Direct Studies": [len(direct_studies.get(e, [])) for e, _ in rows],
+            "Studies": [len(studies) for _, studies in rows],
+            "PHS IDs": ["; ".join(studies) for _, studies in rows],
+        }
+    )
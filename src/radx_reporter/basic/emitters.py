@@ -0,0 +1,184 @@
+import importlib.util
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+
+from . import report_writer
+from .classifier import split_hyperlink_labels
+
+logger = logging.getLogger(__name__)
+
+FORMATS = ("xlsx", "json", "jsonl", "csv", "parquet")
+
+COUNTS_COLUMNS = [
+    "Classifier",
+    "Label",
+    "URL",
+    "Count",
+    "Percentage",
+    "Coded Term",
+    "PHS IDs",
+]
+
+
+def counts_table(counts_by_classifier):
+    """
+    Stack the per-classifier count tables from reduce_studies into one
+    long table with plain labels and URLs instead of hyperlink formulas.
+    """
+    frames = []
+    for classifier, counts in counts_by_classifier.items():
+        labels = split_hyperlink_labels(counts.iloc[:, 0])
+        frames.append(
+            pd.DataFrame(
+                {
+                    "Classifier": classifier,
+                    "Label": labels["Label"].to_numpy(),
+                    "URL": labels["URL"].to_numpy(),
+                    "Count": counts["Count"].to_numpy(),
+                    "Percentage": counts["Percentage"].to_numpy(),
+                    "Coded Term": counts["Coded Term"].to_numpy(),
+                    "PHS IDs": counts["PHS IDs"].to_numpy(),
+                }
+            )
+        )
+    if not frames:
+        return pd.DataFrame(columns=COUNTS_COLUMNS)
+    return pd.concat(frames, ignore_index=True)
+
+
+def records(dataframe):
+    """DataFrame rows as JSON-compatible dicts (NaN becomes null)."""
+    return dataframe.astype(object).where(dataframe.notna(), None).to_dict("records")
+
+
+def split_phs_ids(phs_ids):
+    return phs_ids.split("; ") if phs_ids else []
+
+
+def report_document(study_labels, counts, date):
+    """
+    Single JSON document for the Data Hub: counts grouped by classifier
+    and the labels applied to each study. A date or datetime is written
+    in ISO format.
+    """
+    if hasattr(date, "isoformat"):
+        date = date.isoformat()
+    document = {"date": date, "counts": {}, "labels": records(study_labels)}
+    for row in records(counts):
+        document["counts"].setdefault(row["Classifier"], []).append(
+            {
+                "label": row["Label"],
+                "url": row["URL"],
+                "count": row["Count"],
+                "percentage": row["Percentage"],
+                "coded": row["Coded Term"],
+                "studies": split_phs_ids(row["PHS IDs"]),
+            }
+        )
+    return document
+
+
+def write_xlsx(file_name, study_labels, counts_by_classifier, **kwargs):
+    report_writer.dump_report_spreadsheet(
+        study_labels, counts_by_classifier, file_name, **kwargs
+    )
+    return [file_name]
+
+
+def write_json(file_name, study_labels, counts, date):
+    with open(file_name, "w") as f:
+        json.dump(
+            report_document(study_labels, counts, date), f, separators=(",", ":")
+        )
+    return [file_name]
+
+
+def write_jsonl(base_name, study_labels, counts):
+    file_names = [f"{base_name}-counts.jsonl", f"{base_name}-labels.jsonl"]
+    for file_name, dataframe in zip(file_names, [counts, study_labels]):
+        dataframe.to_json(file_name, orient="records", lines=True)
+    return file_names
+
+
+def write_csv(base_name, study_labels, counts):
+    file_names = [f"{base_name}-counts.csv", f"{base_name}-labels.csv"]
+    for file_name, dataframe in zip(file_names, [counts, study_labels]):
+        dataframe.to_csv(file_name, index=False)
+    return file_names
+
+
+def write_parquet(base_name, study_labels, counts):
+    file_names = [f"{base_name}-counts.parquet", f"{base_name}-labels.parquet"]
+    for file_name, dataframe in zip(file_names, [counts, study_labels]):
+        # object columns can mix numbers and strings (e.g., custom fields)
+        object_columns = [c for c, dtype in dataframe.dtypes.items() if dtype == object]
+        dataframe.astype({column: "string" for column in object_columns}).to_parquet(
+            file_name, index=False
+        )
+    return file_names
+
+
+def check_formats(formats):
+    unknown = [fmt for fmt in formats if fmt not in FORMATS]
+    if unknown:
+        raise ValueError(
+            f"Unsupported report formats {unknown}. Choose from {FORMATS}."
+        )
+    if "parquet" in formats and not any(
+        importlib.util.find_spec(engine) for engine in ["pyarrow", "fastparquet"]
+    ):
+        raise ImportError("Writing parquet requires pyarrow or fastparquet.")
+
+
+def emit_report(
+    study_labels,
+    counts_by_classifier,
+    base_name,
+    formats=("xlsx",),
+    date=None,
+    dump_auxiliary_terms=False,
+    constant_memory=False,
+    max_workers=None,
+    sheet_workers=None,
+    pool="thread",
+):
+    """
+    Write the aggregated report in every requested format from a single
+    aggregation pass. Writers run concurrently in a thread pool and share
+    the same label and count tables. sheet_workers and pool are passed to
+    the XLSX writer (see report_writer.dump_report_spreadsheet).
+
+    Returns:
+        Dict[str, List[str]]: file names written for each format.
+    """
+    formats = list(dict.fromkeys(formats))
+    check_formats(formats)
+    counts = None
+    if any(fmt != "xlsx" for fmt in formats):
+        counts = counts_table(counts_by_classifier)
+
+    writers = {
+        "xlsx": lambda: write_xlsx(
+            base_name + ".xlsx",
+            study_labels,
+            counts_by_classifier,
+            dump_auxiliary_terms=dump_auxiliary_terms,
+            date=date,
+            constant_memory=constant_memory,
+            max_workers=sheet_workers,
+            pool=pool,
+        ),
+        "json": lambda: write_json(base_name + ".json", study_labels, counts, date),
+        "jsonl": lambda: write_jsonl(base_name, study_labels, counts),
+        "csv": lambda: write_csv(base_name, study_labels, counts),
+        "parquet": lambda: write_parquet(base_name, study_labels, counts),
+    }
+    if len(formats) == 1:
+        return {formats[0]: writers[formats[0]]()}
+
+    with ThreadPoolExecutor(max_workers=max_workers or len(formats)) as executor:
+        futures = {fmt: executor.submit(writers[fmt]) for fmt in formats}
+        return {fmt: future.result() for fmt, future in futures.items()}
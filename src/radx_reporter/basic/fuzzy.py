@@ -0,0 +1,216 @@
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+from .matcher import prepare_string_for_matching
+
+# a vocabulary term recovered from text that only matches it approximately
+FuzzyMatch = namedtuple("FuzzyMatch", "phs_id classifier text term distance")
+
+
+def normalize_words(text: str):
+    """Lowercase alphabetic words of text, in order."""
+    return re.findall(r"[a-z]+", text.casefold())
+
+
+def edit_distance(a: str, b: str) -> int:
+    """
+    Levenshtein distance: insertions, deletions and substitutions.
+    Bit-parallel (Myers, Hyyrö): one column of the dynamic programming
+    matrix is updated per character of b with integer operations on
+    bit vectors over the characters of a.
+    """
+    if not a or not b:
+        return len(a) + len(b)
+    masks = {}
+    for i, char in enumerate(a):
+        masks[char] = masks.get(char, 0) | (1 << i)
+    full = (1 << len(a)) - 1
+    last = 1 << (len(a) - 1)
+    positive, negative = full, 0
+    distance = len(a)
+    for char in b:
+        match = masks.get(char, 0)
+        vertical = match | negative
+        horizontal = ((((match & positive) + positive) & full) ^ positive) | match
+        horizontal_positive = negative | (~(horizontal | positive) & full)
+        horizontal_negative = positive & horizontal
+        if horizontal_positive & last:
+            distance += 1
+        elif horizontal_negative & last:
+            distance -= 1
+        horizontal_positive = ((horizontal_positive << 1) | 1) & full
+        horizontal_negative = (horizontal_negative << 1) & full
+        positive = horizontal_negative | (~(vertical | horizontal_positive) & full)
+        negative = horizontal_positive & vertical
+    return distance
+
+
+class BKTree:
+    """
+    Burkhard-Keller tree over strings. Each child hangs under the edit
+    distance to its parent, so by the triangle inequality a search within
+    max_distance of a query only visits children whose distance is within
+    max_distance of the parent's distance to the query.
+    """
+
+    def __init__(self, words=()):
+        # node: [word, values, {distance: child}]
+        self.root = None
+        self.size = 0
+        for word, value in words:
+            self.add(word, value)
+
+    def __len__(self):
+        return self.size
+
+    def add(self, word, value):
+        if self.root is None:
+            self.root = [word, [value], {}]
+            self.size += 1
+            return
+        node = self.root
+        while True:
+            distance = edit_distance(word, node[0])
+            if distance == 0:
+                if value not in node[1]:
+                    node[1].append(value)
+                return
+            if distance not in node[2]:
+                node[2][distance] = [word, [value], {}]
+                self.size += 1
+                return
+            node = node[2][distance]
+
+    def search(self, word, max_distance):
+        """(distance, word, values) within max_distance, nearest first."""
+        if self.root is None:
+            return []
+        found = []
+        stack = [self.root]
+        while stack:
+            node_word, values, children = stack.pop()
+            distance = edit_distance(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word, values))
+            low, high = distance - max_distance, distance + max_distance
+            stack.extend(
+                child for edge, child in children.items() if low <= edge <= high
+            )
+        return sorted(found, key=lambda match: match[:2])
+
+
+class FuzzyMatcher:
+    """
+    Approximate matching of free text against the labels (and synonyms) of
+    a vocabulary, for the parts of the text that matched no term exactly.
+    Labels are indexed in a BK-tree once; runs of up to max_words
+    consecutive words of the text are looked up with a distance bound that
+    grows with their length, so short words are never matched loosely.
+    Lookups are cached by run, segment and text because the same values
+    recur across studies; the caches are bounded, since a matcher is
+    shared for the life of the process.
+    """
+
+    def __init__(self, terms, max_distance=2, chars_per_edit=5, cache_size=4096):
+        """
+        Args:
+            terms (Iterable[Enum]): vocabulary terms with label and
+                optional synonyms; uncoded terms are not indexed.
+            max_distance (int): largest edit distance of a match.
+            chars_per_edit (int): normalized characters per allowed edit,
+                e.g., with 5 a 9-letter run may differ by one edit.
+            cache_size (int): entries of each lookup cache.
+        """
+        self.max_distance = max_distance
+        self.chars_per_edit = chars_per_edit
+        self.tree = BKTree()
+        self.max_words = 1
+        self.lengths = set()
+        # normalized label and synonyms of each term, as for exact matching
+        self.patterns = {}
+        for term in terms:
+            texts = [term.label, *sorted(getattr(term, "synonyms", ()))]
+            self.patterns[term] = [prepare_string_for_matching(text) for text in texts]
+            if not getattr(term, "coded", True):
+                continue
+            for text in texts:
+                words = normalize_words(text)
+                if words:
+                    self.tree.add("".join(words), term)
+                    self.max_words = max(self.max_words, len(words))
+                    self.lengths.add(len("".join(words)))
+        self.max_length = max(self.lengths, default=0) + max_distance
+        self.search = lru_cache(maxsize=cache_size)(self.search_run)
+        self.segment_matches = lru_cache(maxsize=cache_size)(self.match_segment)
+        self.recover_text = lru_cache(maxsize=cache_size)(self.match_text)
+
+    def allowed_distance(self, length):
+        return min(self.max_distance, length // self.chars_per_edit)
+
+    def search_run(self, run):
+        """(distance, terms) of the labels near a run of normalized words."""
+        allowed = self.allowed_distance(len(run))
+        if not allowed or not any(
+            abs(len(run) - length) <= allowed for length in self.lengths
+        ):
+            return ()
+        return tuple(
+            (distance, tuple(terms))
+            for distance, _, terms in self.tree.search(run, allowed)
+        )
+
+    def match_segment(self, segment):
+        """
+        {term: distance} of the terms near runs of words in segment. Runs
+        are chosen greedily, closest and longest first, without sharing
+        words, so a misspelled label is not also read as a shorter one.
+        """
+        words = normalize_words(segment)
+        candidates = []
+        for start in range(len(words)):
+            run = ""
+            for stop in range(start + 1, min(start + self.max_words, len(words)) + 1):
+                run += words[stop - 1]
+                if len(run) > self.max_length:
+                    break
+                for distance, terms in self.search(run):
+                    for term in terms:
+                        candidates.append((distance, start - stop, start, stop, term))
+        matches = {}
+        used = set()
+        for distance, _, start, stop, term in sorted(
+            candidates, key=lambda candidate: candidate[:3]
+        ):
+            span = set(range(start, stop))
+            if term not in matches and not used & span:
+                matches[term] = distance
+                used |= span
+        return matches
+
+    def recover(self, text, matched):
+        """
+        Terms matched approximately by the segments of text (separated by
+        ";", "," or "|") in which none of the matched terms occur.
+        Returns (segment, term, distance) tuples in order of the text.
+
+        Args:
+            text (str): raw field value.
+            matched (List[Enum]): terms of the vocabulary matched exactly.
+        """
+        return list(self.recover_text(text, tuple(matched)))
+
+    def match_text(self, text, matched):
+        patterns = [pattern for term in matched for pattern in self.patterns[term]]
+        found = set(matched)
+        recovered = []
+        for segment in re.split(r"[;,|\n]", text):
+            segment = segment.strip()
+            normalized = prepare_string_for_matching(segment)
+            if not normalized or any(pattern in normalized for pattern in patterns):
+                continue
+            for term, distance in self.segment_matches(segment).items():
+                if term not in found:
+                    found.add(term)
+                    recovered.append((segment, term, distance))
+        return tuple(recovered)
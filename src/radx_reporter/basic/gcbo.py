@@ -1,7 +1,18 @@
+import numpy as np
 import pandas as pd
 from queue import Queue
 import re
 
+from .hierarchy_index import HierarchyIndex
+from .label_index import TrigramIndex
+
+ELEMENT_PREFIX = "bmir-radx:"
+DATA_ELEMENT_VALUE_ROOT = "bmir-radx:DataElementValue"
+
+# largest span of response codes decoded through a dense lookup array.
+# wider code ranges fall back to a binary search over the sorted codes.
+DENSE_LOOKUP_LIMIT = 1 << 16
+
 
 class ValueNode:
     """
@@ -68,6 +79,73 @@ class DataElementNode:
         self.values[value_node.code] = value_node
 
 
+class ValueDecoder:
+    """
+    Precomputed lookup from the response codes of one DataElement to its
+    value labels. Whole columns of raw codes are decoded at once into a
+    pandas Categorical whose categories are the value labels.
+    Codes that are missing, non-integer, or unknown to the element decode
+    to NaN.
+    """
+
+    def __init__(self, element_node: DataElementNode):
+        self.name = element_node.name
+        value_nodes = sorted(
+            (node for node in element_node.values.values() if node.code is not None),
+            key=lambda node: node.code,
+        )
+        self.codes = np.array([node.code for node in value_nodes], dtype=np.int64)
+        self.categories = pd.Index(
+            [node.value for node in value_nodes], dtype=object
+        ).unique()
+        self.category_codes = self.categories.get_indexer(
+            [node.value for node in value_nodes]
+        ).astype(np.int32)
+        if len(self.codes) > 0:
+            self.offset = int(self.codes[0])
+            span = int(self.codes[-1]) - self.offset + 1
+        else:
+            self.offset = 0
+            span = 0
+        if span <= DENSE_LOOKUP_LIMIT:
+            self.lookup = np.full(span, -1, dtype=np.int32)
+            self.lookup[self.codes - self.offset] = self.category_codes
+        else:
+            self.lookup = None
+
+    def __repr__(self):
+        return f"ValueDecoder(name={self.name}, codes={self.codes.tolist()})"
+
+    def decode_codes(self, raw_codes) -> np.ndarray:
+        """
+        Map raw response codes to positions in self.categories (-1 when
+        the code cannot be decoded).
+        """
+        numeric = pd.to_numeric(
+            pd.Series(raw_codes, copy=False), errors="coerce"
+        ).to_numpy(dtype=np.float64, na_value=np.nan)
+        category_codes = np.full(len(numeric), -1, dtype=np.int32)
+        if len(self.codes) == 0:
+            return category_codes
+        valid = np.isfinite(numeric) & (numeric == np.floor(numeric))
+        valid &= (numeric >= self.codes[0]) & (numeric <= self.codes[-1])
+        positions = np.flatnonzero(valid)
+        keys = numeric[positions].astype(np.int64)
+        if self.lookup is not None:
+            category_codes[positions] = self.lookup[keys - self.offset]
+        else:
+            index = np.searchsorted(self.codes, keys)
+            found = self.codes[index] == keys
+            category_codes[positions[found]] = self.category_codes[index[found]]
+        return category_codes
+
+    def decode(self, raw_codes) -> pd.Categorical:
+        """
+        Decode a column of raw response codes into value labels.
+        """
+        return pd.Categorical.from_codes(self.decode_codes(raw_codes), self.categories)
+
+
 class GCBO:
     def __init__(
         self, labels_tsv, alt_labels_tsv, hierarchy_tsv, see_also_tsv, start="owl:Thing"
@@ -84,6 +162,9 @@ class GCBO:
         )
         self.connect_elements_to_values(self.element_nodes, self.labels, see_also)
         self.root = self.element_nodes[start]
+        self.hierarchy_index = HierarchyIndex(self.root)
+        self.value_decoders = {}
+        self.label_index = None
 
     def parse_labels(self, labels):
         node_labels = {}
@@ -218,3 +299,87 @@ class GCBO:
                     parents.add(parent)
                     frontier.put(parent)
         return list(parents)
+
+    def is_descendant(self, name, ancestor_name, include_self=False):
+        """
+        Check whether the data element is a subclass of ancestor_name.
+        """
+        if name not in self.element_nodes or ancestor_name not in self.element_nodes:
+            return False
+        return self.hierarchy_index.is_descendant(
+            self.element_nodes[name], self.element_nodes[ancestor_name], include_self
+        )
+
+    def find_descendants(self, name, include_self=False):
+        """
+        Find all subclasses of the named data element.
+        """
+        if name not in self.element_nodes:
+            return []
+        return self.hierarchy_index.descendants(self.element_nodes[name], include_self)
+
+    def find_element(self, name):
+        """
+        Find the DataElementNode for a data element name. Both the full
+        ontology name (bmir-radx:nih_high_temp) and the bare column name
+        used in data files (nih_high_temp) are accepted.
+        """
+        if name in self.element_nodes:
+            return self.element_nodes[name]
+        return self.element_nodes.get(ELEMENT_PREFIX + str(name))
+
+    def get_value_decoder(self, name):
+        """
+        Return the (cached) ValueDecoder for a data element, or None if the
+        element does not exist or has no coded values.
+        """
+        element_node = self.find_element(name)
+        if element_node is None or not element_node.values:
+            return None
+        if element_node.name not in self.value_decoders:
+            self.value_decoders[element_node.name] = ValueDecoder(element_node)
+        return self.value_decoders[element_node.name]
+
+    def decode_values(self, dataframe, columns=None):
+        """
+        Decode coded responses to their value labels.
+        Columns are matched to data elements by name, e.g., a column named
+        nih_high_temp is decoded with the values of bmir-radx:nih_high_temp.
+        Decoded columns are returned as categoricals; columns that do not
+        correspond to a data element with coded values are left unchanged.
+        """
+        if columns is None:
+            columns = dataframe.columns
+        decoded = {}
+        for column in columns:
+            decoder = self.get_value_decoder(column)
+            if decoder is None:
+                continue
+            decoded[column] = pd.Series(
+                decoder.decode(dataframe[column]), index=dataframe.index, name=column
+            )
+        return dataframe.assign(**decoded) if decoded else dataframe.copy(deep=False)
+
+    def find_value_classes(self):
+        """
+        Names of all subclasses of DataElementValue. These are the coded
+        response values of data elements rather than data elements.
+        """
+        return {node.name for node in self.find_descendants(DATA_ELEMENT_VALUE_ROOT)}
+
+    def search_labels(self, text, limit=10, min_score=0.2):
+        """
+        Find data elements whose label or altLabels resemble free text,
+        e.g., a variable name or description from a data dictionary.
+        Returns (DataElementNode, score, matched_text) tuples ranked by
+        trigram similarity. DataElementValues are not indexed.
+        The index is built on first use.
+        """
+        if self.label_index is None:
+            value_classes = self.find_value_classes()
+            self.label_index = TrigramIndex(
+                node
+                for name, node in self.element_nodes.items()
+                if name not in value_classes
+            )
+        return self.label_index.search(text, limit, min_score)
@@ -0,0 +1,119 @@
+from bisect import bisect_right
+
+
+class HierarchyIndex:
+    """
+    Precomputed reachability labels for a class hierarchy.
+
+    Nodes are numbered in postorder of a depth-first spanning tree rooted
+    at the hierarchy root. In a tree, the descendants of a node occupy the
+    contiguous range [low, post] of postorder numbers, so subsumption is a
+    pair of integer comparisons and the descendants are a slice of the
+    postorder listing. Nodes with several parents (DAG edges) inherit the
+    intervals of all of their children, merged into a short sorted list of
+    disjoint intervals (a compressed transitive closure).
+
+    Nodes only need name and children attributes, so the index works for
+    both Ontology Nodes and GCBO DataElementNodes. The hierarchy must be
+    acyclic; a cycle raises ValueError.
+    """
+
+    def __init__(self, root):
+        self.order = []
+        self.post = {}
+        self.intervals = {}
+        low = self.number_nodes(root)
+        # DFS postorder is a reverse topological order for a DAG, so
+        # children are always labeled before their parents
+        for node in self.order:
+            post = self.post[node.name]
+            intervals = [(low[node.name], post)]
+            for child in node.children:
+                intervals.extend(self.intervals[child.name])
+            self.intervals[node.name] = self.merge_intervals(intervals)
+
+    def __len__(self):
+        return len(self.order)
+
+    def __contains__(self, node):
+        return node.name in self.post
+
+    def number_nodes(self, root):
+        """
+        Assign postorder numbers with an iterative depth-first search and
+        return the lowest postorder number in each spanning subtree. A
+        child that is still on the stack closes a cycle.
+        """
+        low = {}
+        visited = {root.name}
+        stack = [(root, iter(sorted(root.children, key=lambda n: n.name)))]
+        first = {root.name: 0}
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                stack.pop()
+                post = len(self.order)
+                self.post[node.name] = post
+                self.order.append(node)
+                low[node.name] = first[node.name]
+                continue
+            if child.name in visited:
+                if child.name not in self.post:
+                    path = [entry[0].name for entry in stack]
+                    cycle = path[path.index(child.name) :] + [child.name]
+                    raise ValueError(f"Cycle in the hierarchy: {' -> '.join(cycle)}")
+                continue
+            visited.add(child.name)
+            first[child.name] = len(self.order)
+            stack.append((child, iter(sorted(child.children, key=lambda n: n.name))))
+        return low
+
+    def merge_intervals(self, intervals):
+        intervals.sort()
+        merged = [intervals[0]]
+        for start, end in intervals[1:]:
+            last_start, last_end = merged[-1]
+            if start <= last_end + 1:
+                merged[-1] = (last_start, max(last_end, end))
+            else:
+                merged.append((start, end))
+        return merged
+
+    def is_descendant(self, node, ancestor, include_self=False):
+        """
+        True if node is a (transitive) subclass of ancestor.
+        This is constant time for tree-shaped parts of the hierarchy and
+        a binary search over a few intervals otherwise.
+        """
+        if node.name not in self.post or ancestor.name not in self.intervals:
+            return False
+        if node.name == ancestor.name:
+            return include_self
+        post = self.post[node.name]
+        intervals = self.intervals[ancestor.name]
+        if len(intervals) == 1:
+            start, end = intervals[0]
+            return start <= post <= end
+        i = bisect_right(intervals, (post, float("inf"))) - 1
+        return i >= 0 and intervals[i][0] <= post <= intervals[i][1]
+
+    def descendants(self, node, include_self=False):
+        """
+        All (transitive) subclasses of node, read directly from the
+        postorder listing without traversing the hierarchy.
+        """
+        if node.name not in self.intervals:
+            return []
+        descendants = []
+        for start, end in self.intervals[node.name]:
+            descendants.extend(self.order[start : end + 1])
+        if not include_self:
+            descendants = [d for d in descendants if d.name != node.name]
+        return descendants
+
+    def count_descendants(self, node, include_self=False):
+        if node.name not in self.intervals:
+            return 0
+        count = sum(end - start + 1 for start, end in self.intervals[node.name])
+        return count if include_self else count - 1
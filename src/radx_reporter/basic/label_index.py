@@ -0,0 +1,101 @@
+import re
+from collections import defaultdict
+
+
+def normalize_label(text: str) -> str:
+    """
+    Lowercase text and collapse runs of non-alphanumeric characters
+    (including underscores) into single spaces.
+    """
+    return " ".join(re.split(r"[^0-9a-z]+", str(text).casefold())).strip()
+
+
+def trigrams(text: str):
+    """
+    Set of character trigrams for normalized text. The text is padded
+    so that short words and word boundaries contribute trigrams.
+    """
+    padded = f"  {text} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to labeled nodes.
+    Each node is indexed under its label and all of its alt labels.
+    Queries score candidates by trigram Jaccard similarity, so only
+    entries sharing at least one trigram with the query are visited.
+    """
+
+    def __init__(self, nodes):
+        self.nodes = []
+        self.entry_nodes = []
+        self.entry_texts = []
+        self.entry_sizes = []
+        self.postings = defaultdict(list)
+        for node in nodes:
+            texts = []
+            if node.label is not None:
+                texts.append(node.label)
+            texts.extend(sorted(node.alt_labels or ()))
+            if not texts:
+                continue
+            node_id = len(self.nodes)
+            self.nodes.append(node)
+            for text in texts:
+                self.add_entry(node_id, text)
+
+    def __len__(self):
+        return len(self.entry_texts)
+
+    def add_entry(self, node_id, text):
+        normalized = normalize_label(text)
+        if not normalized:
+            return
+        entry_id = len(self.entry_texts)
+        grams = trigrams(normalized)
+        self.entry_nodes.append(node_id)
+        self.entry_texts.append(text)
+        self.entry_sizes.append(len(grams))
+        for gram in grams:
+            self.postings[gram].append(entry_id)
+
+    def search(self, text, limit=10, min_score=0.2):
+        """
+        Return up to limit (node, score, matched_text) candidates ranked by
+        descending similarity. A node is reported once, under its
+        best-scoring label or alt label.
+        """
+        normalized = normalize_label(text)
+        if not normalized:
+            return []
+        query = trigrams(normalized)
+        overlaps = defaultdict(int)
+        for gram in query:
+            for entry_id in self.postings.get(gram, ()):
+                overlaps[entry_id] += 1
+
+        n_query = len(query)
+        best = {}
+        for entry_id, overlap in overlaps.items():
+            score = overlap / (n_query + self.entry_sizes[entry_id] - overlap)
+            if score < min_score:
+                continue
+            node_id = self.entry_nodes[entry_id]
+            if node_id not in best or score > best[node_id][0]:
+                best[node_id] = (score, entry_id)
+
+        ranked = sorted(
+            best.items(), key=lambda item: (-item[1][0], self.nodes[item[0]].name)
+        )
+        return [
+            (self.nodes[node_id], score, self.entry_texts[entry_id])
+            for node_id, (score, entry_id) in ranked[:limit]
+        ]
+
+    def search_many(self, texts, limit=10, min_score=0.2):
+        """
+        Look up candidates for many free-text names at once, e.g., all of
+        the variables in a data dictionary.
+        """
+        return {text: self.search(text, limit, min_score) for text in texts}
@@ -0,0 +1,170 @@
+import hashlib
+import logging
+import os
+import pickle
+import re
+
+logger = logging.getLogger(__name__)
+
+# in-process cache of compiled matchers keyed by a hash of their patterns
+_COMPILED_MATCHERS = {}
+
+
+def prepare_string_for_matching(text: str):
+    # remove non-alphabetic characters and convert to lowercase
+    return re.sub(r"[^a-zA-Z]", "", text).casefold()
+
+
+class TermMatcher:
+    """
+    Aho-Corasick automaton over normalized term labels.
+    A single pass over normalized text reports every term whose label or
+    altLabel occurs as a substring, which is the same result as checking
+    each label with `in` but independent of the number of terms.
+    Terms are stored by name so the automaton can be pickled and reused
+    with a freshly loaded ontology.
+    """
+
+    def __init__(self, patterns):
+        """
+        Args:
+            patterns (Dict[str, Set[str]]): normalized pattern to the names
+                of the terms that it identifies.
+        """
+        self.transitions = [{}]
+        self.fail = [0]
+        self.output = [()]
+        for pattern, names in patterns.items():
+            if pattern:
+                self.add_pattern(pattern, names)
+        self.link_failures()
+
+    def __len__(self):
+        return len(self.transitions)
+
+    def add_pattern(self, pattern, names):
+        state = 0
+        for char in pattern:
+            if char not in self.transitions[state]:
+                self.transitions.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.transitions[state][char] = len(self.transitions) - 1
+            state = self.transitions[state][char]
+        self.output[state] = tuple(sorted(set(self.output[state]).union(names)))
+
+    def link_failures(self):
+        """
+        Breadth-first construction of failure links. The output of each
+        state also includes the output of its failure state, so matches
+        of patterns that are suffixes of other patterns are reported.
+        """
+        frontier = list(self.transitions[0].values())
+        while frontier:
+            next_frontier = []
+            for state in frontier:
+                for char, child in self.transitions[state].items():
+                    fallback = self.fail[state]
+                    while fallback and char not in self.transitions[fallback]:
+                        fallback = self.fail[fallback]
+                    link = self.transitions[fallback].get(char, 0)
+                    self.fail[child] = link if link != child else 0
+                    inherited = self.output[self.fail[child]]
+                    if inherited:
+                        self.output[child] = tuple(
+                            sorted(set(self.output[child]).union(inherited))
+                        )
+                    next_frontier.append(child)
+            frontier = next_frontier
+
+    def find(self, text):
+        """
+        Return the names of all terms that occur in normalized text.
+        """
+        transitions = self.transitions
+        fail = self.fail
+        output = self.output
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in transitions[state]:
+                state = fail[state]
+            state = transitions[state].get(char, 0)
+            if output[state]:
+                found.update(output[state])
+        return found
+
+
+def collect_patterns(ontology, terms):
+    """
+    Normalized labels and synonyms of the vocabulary terms of a classifier,
+    with the altLabels of the ontology term of the same label, to the names
+    of the terms.
+    """
+    patterns = {}
+    for term in terms:
+        texts = [term.label, *getattr(term, "synonyms", ())]
+        node = ontology.label_to_node.get(term.label)
+        if node is not None:
+            texts.extend(node.alt_labels or ())
+        for text in texts:
+            pattern = prepare_string_for_matching(str(text))
+            patterns.setdefault(pattern, set()).add(term.name)
+    return patterns
+
+
+def compile_matchers(ontology, vocabularies, cache_dir=None):
+    """
+    Build one TermMatcher per classifier from its vocabulary terms and the
+    altLabels the ontology adds to them. Compiled matchers are cached in
+    memory by a hash of their patterns and, if cache_dir is given, pickled
+    to disk so that later runs skip compilation. Editing the vocabulary or
+    an ontology altLabel changes the hash, so stale matchers are never
+    reused.
+
+    Args:
+        ontology (Ontology): content ontology.
+        vocabularies (Dict[str, List[Enum]]): vocabulary terms by
+            classifier label.
+        cache_dir (Optional[str]): directory of pickled matchers.
+    """
+    patterns = {
+        label: collect_patterns(ontology, terms)
+        for label, terms in vocabularies.items()
+    }
+    content = repr(
+        sorted(
+            (label, sorted((k, sorted(v)) for k, v in classifier_patterns.items()))
+            for label, classifier_patterns in patterns.items()
+        )
+    )
+    key = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    if key in _COMPILED_MATCHERS:
+        return _COMPILED_MATCHERS[key]
+
+    cache_file = None
+    if cache_dir is not None:
+        cache_file = os.path.join(cache_dir, f"matchers-{key}.pickle")
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, "rb") as f:
+                    matchers = pickle.load(f)
+                _COMPILED_MATCHERS[key] = matchers
+                return matchers
+            except (OSError, pickle.UnpicklingError, EOFError):
+                logger.warning(f"Ignoring unreadable matcher cache {cache_file}.")
+
+    matchers = {
+        label: TermMatcher(classifier_patterns)
+        for label, classifier_patterns in patterns.items()
+    }
+    _COMPILED_MATCHERS[key] = matchers
+
+    if cache_file is not None:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write then rename so concurrent runs never read a partial file
+        partial_file = f"{cache_file}.{os.getpid()}.tmp"
+        with open(partial_file, "wb") as f:
+            pickle.dump(matchers, f)
+        os.replace(partial_file, cache_file)
+    return matchers
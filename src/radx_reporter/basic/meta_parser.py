@@ -3,6 +3,7 @@ import re
 import dateutil
 import pandas as pd
 
+from .matcher import compile_matchers, prepare_string_for_matching
 from .study import Study
 from .vocabulary import (
     COLLECTION_METHODS,
@@ -60,28 +61,60 @@ PHS_KEYWORD = "phs"
 STUDY_START_DATE = "NIH RePORTER Project Start Date"
 STUDY_END_DATE = "NIH RePORTER Project End Date"
 FOCUS_POPULATION_KEYWORD = "Study Population Focus"
+# top-level terms of the content ontology that group each classifier's terms
+DESIGN_CLASSIFIER = "Study Design"
+DATATYPES_CLASSIFIER = "Data Type"
+METHOD_CLASSIFIER = "Collection Method"
+DOMAIN_CLASSIFIER = "Study Domain"
+FOCUS_POPULATION_CLASSIFIER = "Focus Population"
+# vocabulary terms matched with a compiled matcher, by classifier
+CLASSIFIER_VOCABULARIES = {
+    DESIGN_CLASSIFIER: STUDY_DESIGNS,
+    DATATYPES_CLASSIFIER: DATA_TYPES,
+    METHOD_CLASSIFIER: COLLECTION_METHODS,
+    DOMAIN_CLASSIFIER: STUDY_DOMAINS,
+    FOCUS_POPULATION_CLASSIFIER: FOCUS_POPULATIONS,
+}
 
 
 class MetaParser:
-    def __init__(self, hierarchy=None):
+    def __init__(self, hierarchy=None, matcher_cache_dir=None):
         self.hierarchy = hierarchy
-
-    def prepare_string_for_matching(self, text: str):
-        # remove non-alphabetic characters and convert to lowercase
-        return re.sub(r"[^a-zA-Z]", "", text).casefold()
+        if hierarchy is not None:
+            self.matchers = compile_matchers(
+                hierarchy, CLASSIFIER_VOCABULARIES, matcher_cache_dir
+            )
+        else:
+            self.matchers = {}
+        # number of term checks, reported by StageProfiler
+        self.match_calls = 0
 
     def has_match(self, facet_node, text):
+        self.match_calls += 1
         if hasattr(facet_node, "synonyms"):
             for synonym in facet_node.synonyms:
-                if self.prepare_string_for_matching(synonym) in text:
+                if prepare_string_for_matching(synonym) in text:
                     return True
-        return self.prepare_string_for_matching(facet_node.label) in text
+        return prepare_string_for_matching(facet_node.label) in text
+
+    def match_terms(self, classifier_label, text, vocabulary_terms):
+        """
+        Find the vocabulary terms whose label, synonyms or ontology
+        altLabels occur in normalized text, in vocabulary order, using the
+        compiled matcher for the classifier. Without a compiled matcher
+        each term is checked in turn.
+        """
+        if classifier_label in self.matchers:
+            self.match_calls += 1
+            names = self.matchers[classifier_label].find(text)
+            return [term for term in vocabulary_terms if term.name in names]
+        return [term for term in vocabulary_terms if self.has_match(term, text)]
 
     def parse_program(self, row):
         """
         Parse program keyword (one) from DataFrame row.
         """
-        program = self.prepare_string_for_matching(row[PROGRAM_KEYWORD])
+        program = prepare_string_for_matching(row[PROGRAM_KEYWORD])
         if pd.isna(program):
             program = Program.UNKNOWN
         for dcc in PROGRAMS:
@@ -96,14 +129,10 @@ class MetaParser:
         if pd.isna(focus_population_text):
             focus_populations = [FocusPopulation.UNKNOWN]
         else:
-            focus_population_text = self.prepare_string_for_matching(
-                focus_population_text
+            focus_population_text = prepare_string_for_matching(focus_population_text)
+            focus_populations = self.match_terms(
+                FOCUS_POPULATION_CLASSIFIER, focus_population_text, FOCUS_POPULATIONS
             )
-            focus_populations = [
-                focus
-                for focus in FOCUS_POPULATIONS
-                if self.has_match(focus, focus_population_text)
-            ]
             if len(focus_populations) == 0:
                 focus_populations.append(FocusPopulation.UNKNOWN)
         ancestors = self.hierarchy.find_ancestors([x.label for x in focus_populations])
@@ -117,7 +146,7 @@ class MetaParser:
         if pd.isna(nih_institute_text):
             nih_institutes = [NihInstitute.UNKNOWN]
         else:
-            nih_institute_text = self.prepare_string_for_matching(nih_institute_text)
+            nih_institute_text = prepare_string_for_matching(nih_institute_text)
             nih_institutes = [
                 institute
                 for institute in INSTITUTES
@@ -134,14 +163,10 @@ class MetaParser:
         collection_method_text = "".join(
             [row[x] for x in METHOD_KEYWORDS if not pd.isna(row[x])]
         )
-        collection_method_text = self.prepare_string_for_matching(
-            collection_method_text
+        collection_method_text = prepare_string_for_matching(collection_method_text)
+        collection_methods = self.match_terms(
+            METHOD_CLASSIFIER, collection_method_text, COLLECTION_METHODS
         )
-        collection_methods = [
-            method
-            for method in COLLECTION_METHODS
-            if self.has_match(method, collection_method_text)
-        ]
         if len(collection_methods) == 0:
             collection_methods.append(CollectionMethod.UNKNOWN)
         return collection_methods
@@ -154,12 +179,10 @@ class MetaParser:
         if pd.isna(study_design_text):
             study_designs = [StudyDesign.UNKNOWN]
         else:
-            study_design_text = self.prepare_string_for_matching(study_design_text)
-            study_designs = [
-                design
-                for design in STUDY_DESIGNS
-                if self.has_match(design, study_design_text)
-            ]
+            study_design_text = prepare_string_for_matching(study_design_text)
+            study_designs = self.match_terms(
+                DESIGN_CLASSIFIER, study_design_text, STUDY_DESIGNS
+            )
             if len(study_designs) == 0:
                 study_designs.append(StudyDesign.UNKNOWN)
         ancestors = self.hierarchy.find_ancestors([x.label for x in study_designs])
@@ -202,12 +225,10 @@ class MetaParser:
         if pd.isna(data_type_text):
             data_types = [DataType.UNKNOWN]
         else:
-            data_type_text = self.prepare_string_for_matching(data_type_text)
-            data_types = [
-                data_type
-                for data_type in DATA_TYPES
-                if self.has_match(data_type, data_type_text)
-            ]
+            data_type_text = prepare_string_for_matching(data_type_text)
+            data_types = self.match_terms(
+                DATATYPES_CLASSIFIER, data_type_text, DATA_TYPES
+            )
             if len(data_types) == 0:
                 data_types.append(DataType.UNKNOWN)
         ancestors = self.hierarchy.find_ancestors([x.label for x in data_types])
@@ -224,10 +245,10 @@ class MetaParser:
         if pd.isna(domain_text):
             study_domains.append(StudyDomain.UNKNOWN)
         else:
-            domain_text = self.prepare_string_for_matching(domain_text)
-            study_domains = [
-                topic for topic in STUDY_DOMAINS if self.has_match(topic, domain_text)
-            ]
+            domain_text = prepare_string_for_matching(domain_text)
+            study_domains = self.match_terms(
+                DOMAIN_CLASSIFIER, domain_text, STUDY_DOMAINS
+            )
         ancestors = self.hierarchy.find_ancestors([x.label for x in study_domains])
         return study_domains + ancestors
 
@@ -2,6 +2,8 @@ from queue import Queue
 
 import pandas as pd
 
+from .hierarchy_index import HierarchyIndex
+
 
 class Node:
 
@@ -57,6 +59,7 @@ class Ontology:
         self.label_to_node = {node.label: node for node in self.element_nodes.values()}
         self.root = self.element_nodes[start]
         self.top_level_nodes = {self.root}.union(self.root.children)
+        self.hierarchy_index = HierarchyIndex(self.root)
 
     def parse_labels(self, labels):
         node_labels = {}
@@ -162,3 +165,28 @@ class Ontology:
                 continue
             ancestors.append(parent)
         return ancestors
+
+    def is_descendant(self, label, ancestor_label, include_self=False):
+        """
+        Check whether the term with the given label is subsumed by the
+        term labeled ancestor_label.
+        """
+        if label not in self.label_to_node or ancestor_label not in self.label_to_node:
+            return False
+        return self.hierarchy_index.is_descendant(
+            self.label_to_node[label],
+            self.label_to_node[ancestor_label],
+            include_self,
+        )
+
+    def find_descendants(self, label, include_self=False):
+        """
+        Find all terms subsumed by the term with the given label.
+        Top-level nodes are never returned since they only group terms.
+        """
+        if label not in self.label_to_node:
+            return []
+        descendants = self.hierarchy_index.descendants(
+            self.label_to_node[label], include_self
+        )
+        return [node for node in descendants if node not in self.top_level_nodes]
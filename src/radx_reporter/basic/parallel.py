@@ -0,0 +1,20 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+POOLS = ("thread", "process")
+
+
+def parallel_map(function, *iterables, max_workers=None, pool="thread"):
+    """
+    List of function(*args) for the items of iterables, in order. With
+    max_workers > 1 the calls run in a thread or process pool; otherwise,
+    and for a single item, they run in the calling thread. A process
+    pool needs a module-level function and picklable arguments.
+    """
+    if pool not in POOLS:
+        raise ValueError(f"Unknown pool {pool}. Choose from {POOLS}.")
+    arguments = list(zip(*iterables))
+    if max_workers is None or max_workers <= 1 or len(arguments) <= 1:
+        return [function(*args) for args in arguments]
+    executor_class = ThreadPoolExecutor if pool == "thread" else ProcessPoolExecutor
+    with executor_class(max_workers=min(max_workers, len(arguments))) as executor:
+        return list(executor.map(function, *zip(*arguments)))
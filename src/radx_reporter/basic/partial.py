@@ -0,0 +1,166 @@
+import json
+from collections import namedtuple
+from functools import reduce
+from typing import Dict
+
+from .classifier import get_additional_keys, make_counts_table
+from .study import Study
+from .vocabulary import Classifier
+
+FORMAT_VERSION = 2
+CONFLICT_POLICIES = ("last", "first", "union", "error")
+
+Term = namedtuple("Term", "classifier label url coded")
+
+
+class PartialAggregate:
+    """
+    Serializable aggregate of the studies of one shard of the metadata.
+    Each distinct (classifier, label) term is stored once, and each study
+    is stored as its PHS ID and the ids of its terms, in the order of the
+    metadata, and the additional property keys are stored in the order in
+    which they were requested. Partials of consecutive shards are combined with merge,
+    which is associative, and reduce produces the same count tables as
+    classifier.reduce_studies over all studies.
+    """
+
+    def __init__(self, terms=None, studies=None, properties=None):
+        self.terms = list(terms or [])
+        self.term_ids = {(t.classifier, t.label): i for i, t in enumerate(self.terms)}
+        # PHS ID -> term ids, in order of the metadata
+        self.studies = dict(studies or {})
+        # additional property keys, including those without values
+        self.properties = list(properties or [])
+
+    def __len__(self):
+        return len(self.studies)
+
+    def __eq__(self, other):
+        if not isinstance(other, PartialAggregate):
+            return NotImplemented
+        # term ids depend on the merge order; compare the terms themselves
+        if self.properties != other.properties:
+            return False
+        return [(phs, self.study_terms(phs)) for phs in self.studies] == [
+            (phs, other.study_terms(phs)) for phs in other.studies
+        ]
+
+    def __repr__(self):
+        n_studies, n_terms = len(self.studies), len(self.terms)
+        return f"PartialAggregate(n_studies={n_studies}, n_terms={n_terms})"
+
+    def term_id(self, term):
+        key = (term.classifier, term.label)
+        if key not in self.term_ids:
+            self.term_ids[key] = len(self.terms)
+            self.terms.append(term)
+        return self.term_ids[key]
+
+    @classmethod
+    def from_studies(cls, studies: Dict[str, Study]):
+        """Aggregate parsed studies, e.g., from BasicParser for one shard."""
+        partial = cls(properties=get_additional_keys(studies))
+        for phs, study in studies.items():
+            term_ids = []
+            for classifier in Classifier:
+                for label in study.get_classifiers(classifier):
+                    if label is None:
+                        continue
+                    term = Term(classifier.label, label.label, label.url, label.coded)
+                    term_ids.append(partial.term_id(term))
+            for key, prop in study.additional_properties.items():
+                for value in prop.terms:
+                    term_ids.append(partial.term_id(Term(key, value, None, False)))
+            partial.studies[phs] = tuple(term_ids)
+        return partial
+
+    def study_terms(self, phs):
+        return [self.terms[i] for i in self.studies[phs]]
+
+    def merge(self, other, on_conflict="last"):
+        """
+        Combine with the partial of a later shard. Additional property keys
+        that only other has follow those of this partial. A PHS ID that
+        occurs in both keeps its position in this partial, and its terms
+        are chosen by on_conflict:
+            "last": the terms of other, like a later row of a single
+                DataFrame replacing an earlier one
+            "first": the terms of this partial
+            "union": the terms of both
+            "error": raise ValueError
+        """
+        if on_conflict not in CONFLICT_POLICIES:
+            raise ValueError(
+                f"Unknown conflict policy {on_conflict}. "
+                f"Choose from {CONFLICT_POLICIES}."
+            )
+        properties = self.properties + [
+            key for key in other.properties if key not in self.properties
+        ]
+        merged = PartialAggregate(self.terms, self.studies, properties)
+        for phs, term_ids in other.studies.items():
+            terms = tuple(merged.term_id(other.terms[i]) for i in term_ids)
+            if phs not in merged.studies or on_conflict == "last":
+                merged.studies[phs] = terms
+            elif on_conflict == "union":
+                known = set(merged.studies[phs])
+                merged.studies[phs] += tuple(i for i in terms if i not in known)
+            elif on_conflict == "error":
+                raise ValueError(f"{phs} occurs in more than one shard.")
+        return merged
+
+    def reduce(self):
+        """
+        Count tables keyed by classifier label, identical to
+        classifier.reduce_studies(classifier.map_studies(studies), n) for
+        the studies of all merged shards.
+        """
+        # term id -> PHS IDs, with terms in order of first occurrence
+        grouped = {}
+        for phs, term_ids in self.studies.items():
+            for i in term_ids:
+                grouped.setdefault(i, []).append(phs)
+
+        classifiers = [classifier.label for classifier in Classifier]
+        classifiers += [key for key in self.properties if key not in classifiers]
+        label_counts = {classifier: [] for classifier in classifiers}
+        for i, phs_ids in grouped.items():
+            term = self.terms[i]
+            label_counts[term.classifier].append(
+                (term, len(phs_ids), "; ".join(phs_ids), term.coded)
+            )
+        return {
+            classifier: make_counts_table(classifier, counts, len(self.studies))
+            for classifier, counts in label_counts.items()
+        }
+
+    def to_dict(self):
+        return {
+            "version": FORMAT_VERSION,
+            "terms": [list(term) for term in self.terms],
+            "studies": {phs: list(term_ids) for phs, term_ids in self.studies.items()},
+            "properties": self.properties,
+        }
+
+    @classmethod
+    def from_dict(cls, document):
+        if document.get("version") != FORMAT_VERSION:
+            version = document.get("version")
+            raise ValueError(f"Unsupported partial aggregate version {version}.")
+        return cls(
+            [Term(*term) for term in document["terms"]],
+            {phs: tuple(ids) for phs, ids in document["studies"].items()},
+            document["properties"],
+        )
+
+    def to_json(self):
+        return json.dumps(self.to_dict(), separators=(",", ":"))
+
+    @classmethod
+    def from_json(cls, text):
+        return cls.from_dict(json.loads(text))
+
+
+def merge_partials(partials, on_conflict="last"):
+    """Merge the partials of consecutive shards in order."""
+    return reduce(lambda a, b: a.merge(b, on_conflict), partials, PartialAggregate())
@@ -0,0 +1,83 @@
+import logging
+import sys
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+logger = logging.getLogger(__name__)
+
+
+def peak_rss():
+    """Peak resident set size of the process in bytes, if available."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class StageProfiler:
+    """
+    Structured timings for the stages of a report (load, parse, map,
+    reduce, label, write). For each stage it records wall and CPU time,
+    rows in and out, matcher calls made by the parser, and memory: the
+    tracemalloc peak of the stage when trace_memory is set (slower), or
+    the peak RSS of the process so far otherwise.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.stages = []
+        self.started_tracing = False
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self.started_tracing = True
+
+    def close(self):
+        if self.started_tracing:
+            tracemalloc.stop()
+            self.started_tracing = False
+
+    @contextmanager
+    def stage(self, name, rows_in=None, parser=None):
+        """
+        Profile the body of a with statement as a stage. The yielded
+        record can be updated, e.g., with record["rows_out"]. Matcher calls
+        are counted from parser.match_calls if a parser is given.
+        """
+        record = {"stage": name, "rows_in": rows_in, "rows_out": None}
+        calls = parser.match_calls if parser is not None else None
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield record
+        finally:
+            record["wall_seconds"] = time.perf_counter() - wall
+            record["cpu_seconds"] = time.process_time() - cpu
+            if self.trace_memory:
+                record["peak_traced_bytes"] = tracemalloc.get_traced_memory()[1]
+            record["peak_rss_bytes"] = peak_rss()
+            if parser is not None:
+                record["matcher_calls"] = parser.match_calls - calls
+            self.stages.append(record)
+            logger.info(f"Stage {name} took {record['wall_seconds']:.3f}s")
+
+    def to_dict(self):
+        return {
+            "stages": list(self.stages),
+            "wall_seconds": sum(stage["wall_seconds"] for stage in self.stages),
+            "cpu_seconds": sum(stage["cpu_seconds"] for stage in self.stages),
+        }
+
+
+def profile_stage(profiler, name, rows_in=None, parser=None):
+    """StageProfiler.stage, or a no-op context when profiler is None."""
+    if profiler is None:
+        return nullcontext({})
+    return profiler.stage(name, rows_in, parser)
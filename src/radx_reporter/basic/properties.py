@@ -0,0 +1,58 @@
+from itertools import chain
+
+import numpy as np
+import pandas as pd
+
+
+class PropertyCodes:
+    """
+    Terms of one additional property for a sequence of studies, stored as
+    integer codes: the terms of study i are
+    categories[codes[offsets[i]:offsets[i + 1]]]. Terms are numbered in
+    order of first occurrence, so grouping by code gives the same order
+    as grouping the studies one at a time.
+    """
+
+    def __init__(self, key, categories, offsets, codes):
+        self.key = key
+        self.categories = categories
+        self.offsets = offsets
+        self.codes = codes
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __repr__(self):
+        return (
+            f"PropertyCodes(key={self.key}, n_studies={len(self)}, "
+            f"n_terms={len(self.categories)})"
+        )
+
+    @classmethod
+    def from_terms(cls, key, term_lists):
+        """Encode a sequence of term tuples, one per study."""
+        term_lists = list(term_lists)
+        n_studies = len(term_lists)
+        lengths = np.fromiter(map(len, term_lists), dtype=np.intp, count=n_studies)
+        terms = pd.Series(list(chain.from_iterable(term_lists)), dtype=object)
+        codes, categories = pd.factorize(terms)
+        offsets = np.zeros(n_studies + 1, dtype=np.intp)
+        np.cumsum(lengths, out=offsets[1:])
+        return cls(key, pd.Index(categories, dtype=object), offsets, codes)
+
+    def rows(self):
+        """The study (row) of each code."""
+        return np.repeat(np.arange(len(self)), np.diff(self.offsets))
+
+    def groups(self):
+        """
+        Rows of the studies with each term, in order of the categories,
+        with rows in ascending order.
+        """
+        order = np.argsort(self.codes, kind="stable")
+        counts = np.bincount(self.codes, minlength=len(self.categories))
+        return np.split(self.rows()[order], np.cumsum(counts)[:-1])
+
+    def counts(self):
+        """Number of studies with each term, in order of the categories."""
+        return np.bincount(self.codes, minlength=len(self.categories))
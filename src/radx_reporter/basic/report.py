@@ -0,0 +1,171 @@
+import io
+import json
+from functools import cached_property
+from typing import Dict
+
+import pandas as pd
+
+from . import classifier, emitters, report_writer
+from .profiling import profile_stage
+from .study import Study
+
+
+class Report:
+    """
+    In-memory result of a content report.
+    The labels table and per-classifier counts are computed on first
+    access and nothing is serialized until one of the to_* methods or
+    write is called, so callers can use the results without touching
+    the filesystem.
+    """
+
+    def __init__(
+        self,
+        studies: Dict[str, Study],
+        metadata=None,
+        studies_by_classifier=None,
+        facet_names=None,
+        max_workers=None,
+        pool="thread",
+    ):
+        """
+        studies_by_classifier may be given when the grouping of studies by
+        label is already known (see watch.IncrementalReport); otherwise it
+        is computed with classifier.map_studies.
+        facet_names maps additional properties to the Data Hub facets
+        their values link to (see classifier.add_search_links).
+        With max_workers > 1, classifiers are reduced and their sheets
+        prepared in a pool of that many threads or processes (pool).
+        """
+        self.studies = studies
+        self.facet_names = facet_names or {}
+        self.max_workers = max_workers
+        self.pool = pool
+        self.metadata = {} if metadata is None else metadata
+        self.metadata.setdefault("n_studies", len(studies))
+        if studies_by_classifier is not None:
+            self.__dict__["studies_by_classifier"] = studies_by_classifier
+
+    def __repr__(self):
+        return f"Report(n_studies={len(self.studies)}, date={self.date})"
+
+    @property
+    def date(self):
+        return self.metadata.get("date")
+
+    @cached_property
+    def studies_by_classifier(self):
+        return classifier.map_studies(self.studies)
+
+    @cached_property
+    def study_labels(self) -> pd.DataFrame:
+        return classifier.label_studies(self.studies)
+
+    @cached_property
+    def study_labels_long(self) -> pd.DataFrame:
+        """Labels as categorical (phs, classifier, term) rows."""
+        return classifier.label_studies_long(self.studies)
+
+    @cached_property
+    def counts_by_classifier(self) -> Dict[str, pd.DataFrame]:
+        counts = classifier.reduce_studies(
+            self.studies_by_classifier,
+            len(self.studies),
+            max_workers=self.max_workers,
+            pool=self.pool,
+        )
+        if self.facet_names:
+            counts = classifier.add_search_links(counts, self.facet_names)
+        return counts
+
+    def top_counts(self, k=10, coded_only=True):
+        """
+        The k labels with the most studies per classifier (see
+        classifier.top_label_counts), without building the count tables.
+        """
+        return classifier.top_label_counts(self.studies_by_classifier, k, coded_only)
+
+    def evaluate(self, profiler=None):
+        """
+        Compute the grouping, counts and labels now instead of on first
+        access, recording the map, reduce and label stages in profiler.
+        """
+        with profile_stage(profiler, "map", len(self.studies)) as record:
+            record["rows_out"] = sum(
+                len(groups) for groups in self.studies_by_classifier.values()
+            )
+        with profile_stage(profiler, "reduce", record.get("rows_out")) as record:
+            record["rows_out"] = sum(
+                len(counts) for counts in self.counts_by_classifier.values()
+            )
+        with profile_stage(profiler, "label", len(self.studies)) as record:
+            record["rows_out"] = len(self.study_labels)
+        return self
+
+    def to_frames(self) -> Dict[str, pd.DataFrame]:
+        """
+        The report tables keyed by sheet name, as in the XLSX workbook.
+        The frames are shared with the report, not copied.
+        """
+        return {"Labels": self.study_labels, **self.counts_by_classifier}
+
+    def to_dict(self):
+        """JSON-compatible report document (see emitters.report_document)."""
+        return emitters.report_document(
+            self.study_labels,
+            emitters.counts_table(self.counts_by_classifier),
+            self.date,
+        )
+
+    def to_json(self, file_name=None):
+        """
+        Serialize the report as JSON. Returns the JSON string when no file
+        name is given.
+        """
+        if file_name is None:
+            return json.dumps(self.to_dict(), separators=(",", ":"))
+        emitters.write_json(
+            file_name,
+            self.study_labels,
+            emitters.counts_table(self.counts_by_classifier),
+            self.date,
+        )
+
+    def to_xlsx(
+        self, file_name=None, dump_auxiliary_terms=True, constant_memory=False
+    ):
+        """
+        Render the XLSX workbook. Returns the workbook bytes when no file
+        name is given. The defaults match the workbook written by the
+        reporter, which drops non-coded terms.
+        """
+        target = io.BytesIO() if file_name is None else file_name
+        report_writer.dump_report_spreadsheet(
+            self.study_labels,
+            self.counts_by_classifier,
+            target,
+            dump_auxiliary_terms=dump_auxiliary_terms,
+            date=self.date,
+            constant_memory=constant_memory,
+            max_workers=self.max_workers,
+            pool=self.pool,
+        )
+        if file_name is None:
+            return target.getvalue()
+
+    def write(self, base_name, formats=("xlsx",), **kwargs):
+        """
+        Write the report to disk in each of the requested formats.
+        See emitters.emit_report for the supported keyword arguments.
+        """
+        kwargs.setdefault("dump_auxiliary_terms", True)
+        kwargs.setdefault("sheet_workers", self.max_workers)
+        kwargs.setdefault("pool", self.pool)
+        return emitters.emit_report(
+            self.study_labels,
+            self.counts_by_classifier,
+            base_name,
+            formats,
+            date=self.date,
+            **kwargs,
+        )
@@ -0,0 +1,184 @@
+import glob
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from functools import lru_cache
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# bump when the layout of cache entries changes
+CACHE_FORMAT_VERSION = 1
+MANIFEST = "manifest.json"
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+BASIC_DIR = os.path.dirname(__file__)
+PACKAGE_DIR = os.path.dirname(BASIC_DIR)
+CONTENT_ONTOLOGY_DIR = os.path.join(PACKAGE_DIR, "data", "content-ontology")
+
+
+def source_files():
+    """
+    The code that parses, classifies and writes reports (the basic package,
+    including the controlled vocabulary, and reporter.py) and the content
+    ontology.
+    """
+    return (
+        sorted(glob.glob(os.path.join(BASIC_DIR, "*.py")))
+        + [os.path.join(PACKAGE_DIR, "reporter.py")]
+        + sorted(glob.glob(os.path.join(CONTENT_ONTOLOGY_DIR, "*.tsv")))
+    )
+
+
+@lru_cache(maxsize=None)
+def source_version():
+    """
+    Hash of the source files, so cached reports are invalidated whenever
+    the terms or the code that produces a report change.
+    """
+    digest = hashlib.sha256()
+    for path in source_files():
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+
+def hash_file(path, chunk_size=1 << 20):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def hash_dataframe(dataframe):
+    """
+    Content hash of a DataFrame, including its column names and dtypes.
+    """
+    digest = hashlib.sha256()
+    digest.update(repr(list(dataframe.columns)).encode("utf-8"))
+    digest.update(repr(dataframe.dtypes.astype(str).tolist()).encode("utf-8"))
+    # mixed object columns are hashed through their string representation
+    hashable = dataframe.astype(
+        {column: str for column, dtype in dataframe.dtypes.items() if dtype == object}
+    )
+    row_hashes = pd.util.hash_pandas_object(hashable, index=True)
+    digest.update(row_hashes.to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+def report_key(input_digest, additional_properties, options):
+    """
+    Cache key for a report: the input content, the additional properties,
+    the report options and the version of the source files.
+    """
+    key = {
+        "cache_format": CACHE_FORMAT_VERSION,
+        "input": input_digest,
+        "additional_properties": list(additional_properties or []),
+        "options": options,
+        "source": source_version(),
+    }
+    encoded = json.dumps(key, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+class ReportCache:
+    """
+    Local on-disk cache of finished report files keyed by report_key.
+    Each entry is a directory with the report files and a manifest. The
+    manifest modification time records the last use of the entry, and the
+    least recently used entries are evicted once the cache grows beyond
+    max_bytes.
+    """
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def entry_dir(self, key):
+        return os.path.join(self.directory, key)
+
+    def get(self, key):
+        """
+        Return the manifest of a cached report, or None on a miss.
+        The manifest maps each format to the file suffixes of its outputs.
+        """
+        manifest_file = os.path.join(self.entry_dir(key), MANIFEST)
+        try:
+            with open(manifest_file) as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return None
+        os.utime(manifest_file)
+        return manifest
+
+    def restore(self, key, base_name):
+        """
+        Copy a cached report to base_name. Returns the file names written
+        for each format, or None on a miss.
+        """
+        manifest = self.get(key)
+        if manifest is None:
+            return None
+        written = {}
+        for fmt, suffixes in manifest["files"].items():
+            written[fmt] = []
+            for suffix in suffixes:
+                shutil.copyfile(
+                    os.path.join(self.entry_dir(key), "report" + suffix),
+                    base_name + suffix,
+                )
+                written[fmt].append(base_name + suffix)
+        return written
+
+    def put(self, key, base_name, written):
+        """
+        Store report files written under base_name (as returned by
+        emitters.emit_report) and evict old entries if necessary.
+        """
+        entry_dir = self.entry_dir(key)
+        partial_dir = f"{entry_dir}.{os.getpid()}.tmp"
+        shutil.rmtree(partial_dir, ignore_errors=True)
+        os.makedirs(partial_dir)
+        files = {}
+        for fmt, file_names in written.items():
+            files[fmt] = []
+            for file_name in file_names:
+                suffix = file_name[len(base_name) :]
+                cached_file = os.path.join(partial_dir, "report" + suffix)
+                shutil.copyfile(file_name, cached_file)
+                files[fmt].append(suffix)
+        with open(os.path.join(partial_dir, MANIFEST), "w") as f:
+            json.dump({"files": files, "created": time.time()}, f)
+        shutil.rmtree(entry_dir, ignore_errors=True)
+        os.replace(partial_dir, entry_dir)
+        self.evict()
+
+    def entries(self):
+        """(last use, size, key) for each complete cache entry."""
+        entries = []
+        for key in os.listdir(self.directory):
+            manifest_file = os.path.join(self.entry_dir(key), MANIFEST)
+            if not os.path.exists(manifest_file):
+                continue
+            size = sum(
+                entry.stat().st_size for entry in os.scandir(self.entry_dir(key))
+            )
+            entries.append((os.path.getmtime(manifest_file), size, key))
+        return entries
+
+    def evict(self):
+        entries = sorted(self.entries())
+        total = sum(size for _, size, _ in entries)
+        while entries and total > self.max_bytes:
+            _, size, key = entries.pop(0)
+            logger.info(f"Evicting cached report {key}.")
+            shutil.rmtree(self.entry_dir(key), ignore_errors=True)
+            total -= size
@@ -1,7 +1,13 @@
 import json
 import logging
+import math
+from collections import namedtuple
 
 import pandas as pd
+from xlsxwriter.utility import xl_cell_to_rowcol
+
+from .classifier import top_table_counts
+from .parallel import parallel_map
 
 logger = logging.getLogger("__name__")
 
@@ -18,6 +24,16 @@ COLUMN_SIZES = {
     "Study Focus Population": [55, 7, 10, 12],
 }
 
+# format name of hyperlink formulas in prepared cells
+HYPERLINK = "hyperlink"
+
+# a classifier sheet ready to be written: header, prepared cells and the
+# (label, count) pairs of its chart
+SheetPayload = namedtuple("SheetPayload", "name header cells chart")
+
+# matches the header style of DataFrame.to_excel
+HEADER_FORMAT = {"bold": True, "border": 1, "align": "center", "valign": "top"}
+
 INFO_TEXT = [
     (
         "B2",
@@ -90,12 +106,119 @@ def autosize_columns(writer, df, sheet_name):
         worksheet.set_column(i, i, size)
 
 
-def apply_hyperlink_format(worksheet, df, hyperlink_format):
-    """Make hyperlinks blue and underlined."""
+def is_missing(value):
+    return value is None or value is pd.NA or (
+        isinstance(value, float) and math.isnan(value)
+    )
+
+
+def write_table(
+    worksheet, df, header_format, column_formats=None, hyperlink_format=None
+):
+    """
+    Write a DataFrame to a worksheet in a single pass, in row order.
+    Every cell is written once with its final format: hyperlink formulas
+    are blue and underlined and columns can be given a number format.
+    Writing strictly in row order keeps the sheet compatible with the
+    constant_memory mode of xlsxwriter.
+    """
+    if column_formats is None:
+        column_formats = {}
+    formats = [column_formats.get(col_name) for col_name in df.columns]
     for col_num, col_name in enumerate(df.columns):
-        for row_num, value in enumerate(df[col_name], start=1):
+        worksheet.write(0, col_num, col_name, header_format)
+    for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        for col_num, value in enumerate(row):
+            if is_missing(value):
+                continue
             if isinstance(value, str) and value.startswith("=HYPERLINK"):
                 worksheet.write_formula(row_num, col_num, value, hyperlink_format)
+            else:
+                worksheet.write(row_num, col_num, value, formats[col_num])
+
+
+def prepare_cells(df, formatted_columns=()):
+    """
+    The cells of a DataFrame below its header row, in row order, as
+    (row, column, value, format name) tuples for write_cells. Missing
+    values are skipped. Hyperlink formulas get the HYPERLINK format name
+    and the columns in formatted_columns are formatted by column name.
+    Preparing cells needs no workbook, so sheets can be prepared in
+    parallel and written by a single thread.
+    """
+    format_names = [
+        col_name if col_name in formatted_columns else None for col_name in df.columns
+    ]
+    cells = []
+    for row_num, row in enumerate(df.itertuples(index=False, name=None), start=1):
+        for col_num, value in enumerate(row):
+            if is_missing(value):
+                continue
+            if isinstance(value, str) and value.startswith("=HYPERLINK"):
+                cells.append((row_num, col_num, value, HYPERLINK))
+            else:
+                cells.append((row_num, col_num, value, format_names[col_num]))
+    return cells
+
+
+def write_cells(worksheet, header, cells, header_format, formats):
+    """
+    Write a header row and prepared cells (see prepare_cells), looking up
+    format names in formats.
+    """
+    for col_num, col_name in enumerate(header):
+        worksheet.write(0, col_num, col_name, header_format)
+    for row_num, col_num, value, format_name in cells:
+        if format_name == HYPERLINK:
+            worksheet.write_formula(row_num, col_num, value, formats.get(HYPERLINK))
+        else:
+            worksheet.write(row_num, col_num, value, formats.get(format_name))
+
+
+def prepare_classifier_sheet(
+    classifier, counts, label_limit, dump_auxiliary_terms, top_counts=None
+):
+    """
+    Payload of the sheet of one classifier: its header and cells, and
+    the (label, count) pairs of its chart (see dump_report_spreadsheet).
+    """
+    # only coded terms are plotted
+    if top_counts is not None:
+        ranked_counts = top_counts[:label_limit]
+    else:
+        ranked_counts = top_table_counts(counts, label_limit)
+    if dump_auxiliary_terms:
+        # this blocks writing all non-coded terms, effectively
+        # also blocking all custom terms
+        counts = counts[counts["Coded Term"] == True]
+        counts = counts.drop(columns=["Coded Term"])
+    return SheetPayload(
+        classifier,
+        list(counts.columns),
+        prepare_cells(counts, formatted_columns=("Percentage",)),
+        ranked_counts,
+    )
+
+
+def write_chart_data(worksheet, classifier, ranked_counts, header_format):
+    """
+    Write (label, count) pairs in reverse order, since bar charts plot
+    their first category at the bottom.
+    """
+    worksheet.write(0, 0, classifier, header_format)
+    worksheet.write(0, 1, "Count", header_format)
+    for row_num, (label, count) in enumerate(reversed(ranked_counts), start=1):
+        if isinstance(label, str) and label.startswith("=HYPERLINK"):
+            worksheet.write_formula(row_num, 0, label)
+        else:
+            worksheet.write(row_num, 0, label)
+        worksheet.write(row_num, 1, count)
+
+
+def add_worksheet(writer, sheet_name):
+    worksheet = writer.book.add_worksheet(sheet_name)
+    writer.sheets[sheet_name] = worksheet
+    return worksheet
 
 
 def dump_report_spreadsheet(
@@ -105,27 +228,43 @@ def dump_report_spreadsheet(
     label_limit: int = 10,
     dump_auxiliary_terms: bool = False,
     date=None,
+    constant_memory: bool = False,
+    top_counts=None,
+    max_workers=None,
+    pool="thread",
 ):
     """
     Write the Data Hub content report to an Excel spreadsheet.
+    With constant_memory, xlsxwriter flushes each row to disk as soon as
+    the next row is started, so memory stays bounded for very large
+    Labels sheets.
+    Charts plot the label_limit coded labels with the most studies. They
+    are taken from top_counts (see classifier.top_label_counts) when
+    given, and otherwise selected from each count table with a heap.
+    With max_workers > 1 the classifier sheets are prepared in a thread or
+    process pool (see parallel.parallel_map) and then written in order.
     """
     logger.info(f"Writing report to file: {file_name}")
-    with pd.ExcelWriter(file_name, engine="xlsxwriter") as writer:
+    with pd.ExcelWriter(
+        file_name,
+        engine="xlsxwriter",
+        engine_kwargs={"options": {"constant_memory": constant_memory}},
+    ) as writer:
         workbook = writer.book
         # informational sheet
         info_sheet_name = "Info"
-        worksheet_info = workbook.add_worksheet(info_sheet_name)
-        writer.sheets[info_sheet_name] = worksheet_info
-        for location, text in INFO_TEXT:
-            worksheet_info.write(location, text)
+        worksheet_info = add_worksheet(writer, info_sheet_name)
         # write date. this cannot be automated as long as reports are generated manually
-        worksheet_info.write("B3", f"Current as of {date}")
+        info_text = INFO_TEXT + [("B3", f"Current as of {date}")]
+        # cells are written in row order for constant memory mode
+        info_text.sort(key=lambda cell: xl_cell_to_rowcol(cell[0]))
+        for location, text in info_text:
+            worksheet_info.write(location, text)
         autosize_columns(writer, study_labels, "Info")
 
         # sheet with all of the graphs
         charts_sheet_name = "Charts"
-        charts_sheet = workbook.add_worksheet(charts_sheet_name)
-        writer.sheets[charts_sheet_name] = charts_sheet
+        charts_sheet = add_worksheet(writer, charts_sheet_name)
         chart_positions = [
             "A1",
             "I1",
@@ -143,38 +282,40 @@ def dump_report_spreadsheet(
         # make hyperlinks blue and underlined
         hyperlink_format = workbook.add_format({"font_color": "blue", "underline": 1})
         percent_format = workbook.add_format({"num_format": "0.00%"})
+        header_format = workbook.add_format(HEADER_FORMAT)
 
         # write page with labels
-        study_labels.to_excel(writer, sheet_name="Labels", index=False)
+        write_table(add_worksheet(writer, "Labels"), study_labels, header_format)
         autosize_columns(writer, study_labels, "Labels")
-        for classifier, counts in counts_by_classifier.items():
-            if dump_auxiliary_terms:
-                # this blocks writing all non-coded terms, effectively
-                # also blocking all custom terms
-                counts = counts[counts["Coded Term"] == True]
-                counts = counts.drop(columns=["Coded Term"])
+        classifiers = list(counts_by_classifier)
+        payloads = parallel_map(
+            prepare_classifier_sheet,
+            classifiers,
+            list(counts_by_classifier.values()),
+            [label_limit] * len(classifiers),
+            [dump_auxiliary_terms] * len(classifiers),
+            [(top_counts or {}).get(classifier) for classifier in classifiers],
+            max_workers=max_workers,
+            pool=pool,
+        )
+        formats = {HYPERLINK: hyperlink_format, "Percentage": percent_format}
+        for classifier, header, cells, ranked_counts in payloads:
             # insert tabular data in reverse sorted order by counts
-            counts.to_excel(writer, sheet_name=classifier, index=False)
-            count_sheet = writer.sheets[classifier]
-            # convert float to percentage in percentage column
-            for row_num, value in enumerate(counts["Percentage"], start=1):
-                count_sheet.write_number(row_num, 2, value, percent_format)
-            autosize_columns(writer, counts, classifier)
-            apply_hyperlink_format(writer.sheets[classifier], counts, hyperlink_format)
+            write_cells(
+                add_worksheet(writer, classifier),
+                header,
+                cells,
+                header_format,
+                formats,
+            )
+            autosize_columns(writer, None, classifier)
 
             # insert a hidden sheet with the top n labels in sorted order
             # this is required because xlsxwriter bar charts plot from
             # bottom to top for whatever reason with no way to reverse a
             # plotting range, so the vertical ordering won't match the tabular data
             hidden_sheet_name = "hidden" + classifier
-            # remove auxiliary terms from plotting
-            if not dump_auxiliary_terms:
-                coded_counts = counts[counts["Coded Term"] == True]
-            else:
-                coded_counts = counts
-
-            # create a bar chart consisting of the top n labels
-            n_labels = min(label_limit, len(coded_counts))
+            n_labels = len(ranked_counts)
 
             # omit plot if no coded terms
             if n_labels == 0:
@@ -183,10 +324,8 @@ def dump_report_spreadsheet(
                 )
                 continue
 
-            ranked_counts = coded_counts.nlargest(n_labels, columns=["Count"])
-            ranked_counts = ranked_counts.iloc[::-1]
-            ranked_counts.to_excel(writer, sheet_name=hidden_sheet_name, index=False)
-            hidden_sheet = writer.sheets[hidden_sheet_name]
+            hidden_sheet = add_worksheet(writer, hidden_sheet_name)
+            write_chart_data(hidden_sheet, classifier, ranked_counts, header_format)
             hidden_sheet.hide()
 
             chart = workbook.add_chart({"type": "bar"})
@@ -0,0 +1,105 @@
+import re
+from functools import lru_cache
+
+# standard library only: the vocabulary builds its URLs with this module
+# when it is imported
+
+SEARCH_URL = "https://radxdatahub.nih.gov/studyExplorer?&facets="
+
+# same escapes as html.escape, without importing html (and html.entities)
+HTML_ESCAPES = str.maketrans(
+    {"&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#x27;"}
+)
+
+# "&amp;" last, so escapes are not unescaped twice
+HTML_UNESCAPES = [(escape, chr(char)) for char, escape in HTML_ESCAPES.items()]
+HTML_UNESCAPES.sort(key=lambda pair: pair[0] == "&amp;")
+
+# one clause of a URL made by facet_url
+FACET_CLAUSE = re.compile(
+    r"%7B%22name%22:%22(.*?)%22,%22facets%22:%5B%22(.*?)%22%5D%7D(?:,|$)"
+)
+
+# bounds of the URL memos: the vocabulary needs a few hundred entries,
+# the rest holds the labels of recent count tables and cross-tabs
+CLAUSE_CACHE_SIZE = 4096
+URL_CACHE_SIZE = 4096
+
+
+def normalize_selection(selection):
+    """
+    Selections map Data Hub facet names to a value or a sequence of
+    values, e.g., {"dcc": ["RADx-rad", "RADx-UP"], "types_array":
+    "Observational"}, as a dict or (name, values) pairs. Returns the
+    hashable form: a tuple of (name, tuple of values) pairs, with names
+    and values in order of first occurrence.
+    """
+    if hasattr(selection, "items"):
+        selection = selection.items()
+    values_by_name = {}
+    for name, values in selection:
+        if isinstance(values, str):
+            values = (values,)
+        known = values_by_name.setdefault(name, {})
+        known.update(dict.fromkeys(values))
+    return tuple((name, tuple(values)) for name, values in values_by_name.items())
+
+
+def combine_selections(*selections):
+    """
+    Combine selections into one query. The Data Hub matches studies with
+    any of the values of a facet (OR) and all of the facets (AND), so
+    values of the same facet are merged and different facets are joined.
+    """
+    return normalize_selection(
+        pair for selection in selections for pair in normalize_selection(selection)
+    )
+
+
+@lru_cache(maxsize=CLAUSE_CACHE_SIZE)
+def facet_clause(name, values):
+    """URL-encoded {"name": name, "facets": values} of one facet."""
+    facets = ",".join(f"%22{value.translate(HTML_ESCAPES)}%22" for value in values)
+    name = name.translate(HTML_ESCAPES)
+    return f"%7B%22name%22:%22{name}%22,%22facets%22:%5B{facets}%5D%7D"
+
+
+def join_clauses(clauses):
+    return SEARCH_URL + "%5B" + ",".join(clauses) + "%5D"
+
+
+@lru_cache(maxsize=URL_CACHE_SIZE)
+def cached_facet_url(selection):
+    return join_clauses(facet_clause(name, values) for name, values in selection)
+
+
+def facet_url(selection) -> str:
+    """
+    Search URL of the RADx Data Hub for a selection of facet values (see
+    normalize_selection and combine_selections). URLs are memoized.
+    """
+    return cached_facet_url(normalize_selection(selection))
+
+
+def unescape(text):
+    for escape, char in HTML_UNESCAPES:
+        text = text.replace(escape, char)
+    return text
+
+
+def url_selection(url):
+    """
+    The normalized selection of a URL made by facet_url, parsed back from
+    its query, or None for other URLs.
+    """
+    if not isinstance(url, str) or not url.startswith(SEARCH_URL + "%5B"):
+        return None
+    body = url[len(SEARCH_URL) + 3 : -3]
+    selection = normalize_selection(
+        (unescape(name), [unescape(value) for value in values.split("%22,%22")])
+        for name, values in FACET_CLAUSE.findall(body)
+    )
+    # anything that facet_url would not have made, e.g., other queries
+    if not selection or facet_url(selection) != url:
+        return None
+    return selection
@@ -1,6 +1,6 @@
 import datetime
 from dataclasses import dataclass
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 
 from .vocabulary import (Classifier, CollectionMethod, DataType,
                          FocusPopulation, NihInstitute, PopulationRange,
@@ -48,6 +48,8 @@ class Contributor:
 class AdditionalProperty:
     key: str
     value: List[str]
+    # the terms that the value stands for (see BasicParser.split_property)
+    terms: Tuple[str, ...] = ()
 
 
 @dataclass(frozen=True)
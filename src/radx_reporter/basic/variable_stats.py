@@ -0,0 +1,209 @@
+import csv
+import logging
+import math
+
+import numpy as np
+import pandas as pd
+
+from .dictionary_scan import build_variable_lookup, discover_bundles, normalize_variable
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+class RunningStats:
+    """
+    Count, mean, variance, minimum and maximum of a stream of numbers.
+    Chunks are combined with the parallel form of Welford's algorithm,
+    which is also used to merge the statistics of different files.
+    """
+
+    def __init__(self):
+        self.n = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def __repr__(self):
+        return f"RunningStats(n={self.n}, mean={self.mean}, std={self.std})"
+
+    @property
+    def std(self):
+        """Sample standard deviation (NaN for fewer than two values)."""
+        return math.sqrt(self.m2 / (self.n - 1)) if self.n > 1 else math.nan
+
+    def combine(self, n, mean, m2, minimum, maximum):
+        if n == 0:
+            return
+        total = self.n + n
+        delta = mean - self.mean
+        self.mean += delta * n / total
+        self.m2 += m2 + delta * delta * self.n * n / total
+        self.n = total
+        self.min = min(self.min, minimum)
+        self.max = max(self.max, maximum)
+
+    def update(self, values: np.ndarray):
+        """Add a chunk of finite values."""
+        if len(values) == 0:
+            return
+        mean = float(values.mean())
+        m2 = float(((values - mean) ** 2).sum())
+        self.combine(len(values), mean, m2, float(values.min()), float(values.max()))
+
+    def merge(self, other: "RunningStats"):
+        self.combine(other.n, other.mean, other.m2, other.min, other.max)
+        return self
+
+
+class VariableStats:
+    """
+    Streaming summary of one data element over one or more data files:
+    number of values, missing values and, for elements with coded values,
+    the frequency of each value label, or else numeric statistics (the
+    numbers of coded values are codes, not measurements).
+    """
+
+    def __init__(self, element, decoder=None):
+        self.element = element
+        self.decoder = decoder
+        self.count = 0
+        self.missing = 0
+        self.numeric = RunningStats()
+        self.undecoded = 0
+        self.studies = set()
+        self.files = 0
+        if decoder is not None:
+            self.value_counts = np.zeros(len(decoder.categories), dtype=np.int64)
+        else:
+            self.value_counts = None
+
+    def update(self, column: pd.Series):
+        """Add a chunk of raw values of the variable."""
+        missing = column.isna()
+        self.count += len(column)
+        self.missing += int(missing.sum())
+        if self.decoder is None:
+            numbers = pd.to_numeric(column, errors="coerce").to_numpy(
+                dtype=np.float64, na_value=np.nan
+            )
+            self.numeric.update(numbers[np.isfinite(numbers)])
+        else:
+            codes = self.decoder.decode_codes(column)
+            decoded = codes >= 0
+            self.value_counts += np.bincount(
+                codes[decoded], minlength=len(self.value_counts)
+            )
+            self.undecoded += int((~decoded & ~missing.to_numpy()).sum())
+
+    def merge(self, other: "VariableStats"):
+        self.count += other.count
+        self.missing += other.missing
+        self.numeric.merge(other.numeric)
+        self.undecoded += other.undecoded
+        self.studies.update(other.studies)
+        self.files += other.files
+        if self.value_counts is not None and other.value_counts is not None:
+            self.value_counts += other.value_counts
+        return self
+
+    def frequencies(self):
+        """Value label to count, for elements with coded values."""
+        if self.value_counts is None:
+            return {}
+        return {
+            label: int(count)
+            for label, count in zip(self.decoder.categories, self.value_counts)
+            if count
+        }
+
+
+def read_header(file_name):
+    with open(file_name, newline="", encoding="utf-8-sig") as f:
+        return next(csv.reader(f), [])
+
+
+def file_stats(file_name, ontology, lookup, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Summarize the GCBO-mapped variables of a CSV data file, reading
+    chunk_size rows at a time so memory does not grow with the file.
+
+    Returns:
+        Dict[str, VariableStats]: statistics keyed by data element name.
+    """
+    columns = {}
+    for column in read_header(file_name):
+        element = lookup.get(normalize_variable(column))
+        if element is not None and element not in columns.values():
+            columns[column] = element
+    stats = {
+        element: VariableStats(element, ontology.get_value_decoder(element))
+        for element in columns.values()
+    }
+    if not columns:
+        return stats
+    # keep the raw text; numbers and codes are parsed per variable
+    chunks = pd.read_csv(
+        file_name, usecols=list(columns), dtype=str, chunksize=chunk_size
+    )
+    for chunk in chunks:
+        for column, element in columns.items():
+            stats[element].update(chunk[column])
+    for variable_stats in stats.values():
+        variable_stats.files = 1
+    return stats
+
+
+def scan_data_files(root, ontology, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Summarize every data file of the study bundles below root by GCBO
+    data element (see dictionary_scan.discover_bundles). Statistics of the
+    same element in different files are merged.
+
+    Returns:
+        pd.DataFrame: one row per data element found in a data file.
+    """
+    lookup = build_variable_lookup(ontology)
+    merged = {}
+    for study, bundle in discover_bundles(root):
+        for data_file in bundle.data_file:
+            try:
+                stats = file_stats(data_file.file_name, ontology, lookup, chunk_size)
+            except (OSError, ValueError, pd.errors.ParserError) as e:
+                logger.warning(f"Cannot read data file {data_file.file_name}: {e}")
+                continue
+            for element, variable_stats in stats.items():
+                variable_stats.studies.add(study)
+                if element in merged:
+                    merged[element].merge(variable_stats)
+                else:
+                    merged[element] = variable_stats
+    return stats_table(merged.values())
+
+
+def stats_table(variable_stats):
+    rows = []
+    for stats in sorted(variable_stats, key=lambda s: s.element):
+        numeric = stats.numeric
+        rows.append(
+            {
+                "Element": stats.element,
+                "Studies": len(stats.studies),
+                "Files": stats.files,
+                "Count": stats.count,
+                "Missing": stats.missing,
+                "Missing Percentage": stats.missing / stats.count if stats.count else 0,
+                "Numeric Count": numeric.n,
+                "Mean": numeric.mean if numeric.n else math.nan,
+                "Std": numeric.std,
+                "Min": numeric.min if numeric.n else math.nan,
+                "Max": numeric.max if numeric.n else math.nan,
+                "Undecoded": stats.undecoded,
+                "Value Counts": "; ".join(
+                    f"{label}: {count}" for label, count in stats.frequencies().items()
+                ),
+            }
+        )
+    return pd.DataFrame(rows)
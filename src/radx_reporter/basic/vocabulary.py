@@ -1,15 +1,15 @@
-import html
 from enum import Enum
 
+from .search_url import facet_url
+
 
 def generate_search_url(name: str, facet: str) -> str:
     """
     Returns search URL for the RADx Data Hub based on the provided
-    name and facet strings.
+    name and facet strings (see search_url.facet_url for queries with
+    several facets or values).
     """
-    name = html.escape(name)
-    facet = html.escape(facet)
-    return f"https://radxdatahub.nih.gov/studyExplorer?&facets=%5B%7B%22name%22:%22{name}%22,%22facets%22:%5B%22{facet}%22%5D%7D%5D"
+    return facet_url(((name, facet),))
 
 
 class AdditionalClassifier:
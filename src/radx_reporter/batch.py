@@ -0,0 +1,207 @@
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .basic.emitters import FORMATS
+from .basic.matcher import compile_matchers
+from .basic.meta_parser import CLASSIFIER_VOCABULARIES
+from .reporter import Reporter, load_content_ontology
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SHEET = "Database Export"
+JOB_FIELDS = ("input", "sheet", "date", "output")
+# workbooks kept open by each worker process, most recently used last
+WORKBOOK_CACHE_SIZE = 4
+
+# per-process state loaded once by init_worker
+_WORKER_STATE = {}
+
+
+def read_manifest(file_name):
+    """
+    Read batch jobs from a JSON manifest (a list of jobs, or an object with
+    a "jobs" list) or a CSV manifest with input, sheet, date and output
+    columns. Relative paths are resolved against the manifest directory.
+    """
+    with open(file_name, newline="") as f:
+        if file_name.endswith(".csv"):
+            jobs = list(csv.DictReader(f))
+        else:
+            jobs = json.load(f)
+    if isinstance(jobs, dict):
+        jobs = jobs["jobs"]
+
+    base_dir = os.path.dirname(os.path.abspath(file_name))
+    resolved = []
+    for i, job in enumerate(jobs):
+        job = {k: v for k, v in job.items() if v not in (None, "")}
+        if "input" not in job:
+            raise ValueError(f"Job {i} in {file_name} has no input.")
+        job["input"] = os.path.join(base_dir, job["input"])
+        job.setdefault("sheet", DEFAULT_SHEET)
+        output = job.get("output") or default_output(job)
+        job["output"] = os.path.join(base_dir, output)
+        resolved.append(job)
+    return resolved
+
+
+def default_output(job):
+    name = os.path.splitext(os.path.basename(job["input"]))[0]
+    sheet = job["sheet"].lower().replace(" ", "-")
+    return f"{name}-{sheet}-report"
+
+
+def init_worker(semantic=False):
+    """
+    Load the state shared by the jobs of a worker process once. The
+    vocabulary is loaded on import; the content ontology and its compiled
+    matchers are only needed for semantic reports.
+    """
+    _WORKER_STATE["workbooks"] = OrderedDict()
+    if semantic:
+        ontology = load_content_ontology()
+        compile_matchers(ontology, CLASSIFIER_VOCABULARIES)
+        _WORKER_STATE["ontology"] = ontology
+
+
+def open_workbook(input_file):
+    """
+    The workbook of input_file, opened once per worker process and shared
+    by the jobs for its sheets. A workbook is reopened if the file changed,
+    and the least recently used one is closed beyond WORKBOOK_CACHE_SIZE.
+    """
+    workbooks = _WORKER_STATE.setdefault("workbooks", OrderedDict())
+    key = (input_file, os.stat(input_file).st_mtime_ns)
+    if key in workbooks:
+        workbooks.move_to_end(key)
+        return workbooks[key]
+    workbook = pd.ExcelFile(input_file)
+    workbooks[key] = workbook
+    while len(workbooks) > WORKBOOK_CACHE_SIZE:
+        workbooks.popitem(last=False)[1].close()
+    return workbook
+
+
+def read_job_input(job):
+    input_file = job["input"]
+    if input_file.endswith(".csv"):
+        return pd.read_csv(input_file)
+    return open_workbook(input_file).parse(job["sheet"])
+
+
+def build_report(job, dataframe):
+    if job.get("report_type", "basic") == "semantic":
+        return Reporter.build_semantic_report(
+            dataframe, _WORKER_STATE["ontology"], job.get("date")
+        )
+    return Reporter.build_basic_report(
+        dataframe, job.get("additional_properties"), job.get("date")
+    )
+
+
+def run_job(job, formats=("xlsx",), dump_auxiliary_terms=True):
+    """Run one job. Returns a summary of the job with timings."""
+    summary = {field: job.get(field) for field in JOB_FIELDS}
+    start = time.perf_counter()
+    try:
+        dataframe = read_job_input(job)
+        read = time.perf_counter()
+        report = build_report(job, dataframe)
+        built = time.perf_counter()
+        files = report.write(
+            job["output"],
+            job.get("formats", formats),
+            dump_auxiliary_terms=dump_auxiliary_terms,
+        )
+        written = time.perf_counter()
+    except Exception as e:
+        logger.exception(f"Batch job for {job['input']} [{job['sheet']}] failed.")
+        summary.update(status="failed", error=str(e))
+        summary["total_seconds"] = time.perf_counter() - start
+        return summary
+    summary.update(
+        status="ok",
+        rows=len(dataframe),
+        studies=len(report.studies),
+        read_seconds=read - start,
+        report_seconds=built - read,
+        write_seconds=written - built,
+        total_seconds=written - start,
+        files=files,
+    )
+    return summary
+
+
+def run_batch(jobs, max_workers=None, formats=("xlsx",), dump_auxiliary_terms=True):
+    """
+    Run report jobs in a process pool. Every job is submitted on its own,
+    so the sheets of one workbook run in parallel too; each worker process
+    opens a workbook once for all the jobs it gets (see open_workbook) and
+    loads the shared ontology state once in its initializer.
+
+    Returns:
+        List[dict]: per-job summaries in manifest order, with timings.
+    """
+    semantic = any(job.get("report_type") == "semantic" for job in jobs)
+    max_workers = min(max_workers or os.cpu_count() or 1, len(jobs) or 1)
+    with ProcessPoolExecutor(
+        max_workers=max_workers, initializer=init_worker, initargs=(semantic,)
+    ) as executor:
+        futures = [
+            executor.submit(run_job, job, formats, dump_auxiliary_terms)
+            for job in jobs
+        ]
+        return [future.result() for future in futures]
+
+
+def batch_cli():
+    parser = argparse.ArgumentParser(
+        description="Generate RADx content reports for every job in a manifest."
+    )
+    parser.add_argument(
+        "manifest",
+        help="JSON or CSV manifest of jobs with input, sheet, date and output.",
+    )
+    parser.add_argument(
+        "--workers", "-w", type=int, default=None, help="Number of worker processes."
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        action="append",
+        choices=FORMATS,
+        dest="formats",
+        help="Output format for jobs that do not set one. Repeatable.",
+    )
+    parser.add_argument(
+        "--summary",
+        default="batch-summary.json",
+        help="File to write the per-job summary and timings to.",
+    )
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    jobs = read_manifest(args.manifest)
+    summaries = run_batch(jobs, args.workers, args.formats or ["xlsx"])
+    elapsed = time.perf_counter() - start
+    with open(args.summary, "w") as f:
+        json.dump({"total_seconds": elapsed, "jobs": summaries}, f, indent=2)
+
+    for summary in summaries:
+        logger.info(
+            f"{summary['status']:6} {summary['total_seconds']:8.3f}s "
+            f"{summary['input']} [{summary['sheet']}] -> {summary['output']}"
+        )
+    failed = [summary for summary in summaries if summary["status"] != "ok"]
+    logger.info(f"{len(jobs) - len(failed)}/{len(jobs)} jobs in {elapsed:.3f}s")
+    if failed:
+        sys.exit(1)
@@ -0,0 +1,302 @@
+import argparse
+import io
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+
+import pandas as pd
+
+from .basic import classifier, report_writer
+from .basic.basic_parser import BasicParser
+from .synthetic import generate_metadata
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SIZES = (100, 1000, 10000)
+STAGES = ("parse", "map", "reduce", "label", "write")
+# relative change of each metric that counts as a regression
+DEFAULT_THRESHOLDS = {"items_per_second": 0.25, "peak_bytes": 0.25}
+# direction in which each metric improves
+HIGHER_IS_BETTER = {"items_per_second": True, "peak_bytes": False, "seconds": False}
+
+
+def measure(function, memory=False, repeat=1):
+    """
+    Run function repeat times and return its result, the wall time of
+    each run and, if memory is set, the peak memory allocated through
+    Python while it ran. Timings are taken without tracemalloc, which
+    slows allocation-heavy code, so memory is measured in an extra run.
+    """
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        seconds.append(time.perf_counter() - start)
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            function()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return result, seconds, peak
+
+
+def benchmark_stages(dataframe, additional_properties=(), memory=True, repeat=1):
+    """
+    Time each stage of a basic report separately on one DataFrame. Each
+    stage is given the output of the previous stage and is run repeat
+    times.
+
+    Returns:
+        List[dict]: stage, number of items processed (rows for parse and
+            studies for the other stages), median seconds with the minimum,
+            maximum and spread (max - min relative to the median) over the
+            runs, items per second at the median and peak memory in bytes.
+    """
+    parser = BasicParser()
+    properties = list(additional_properties)
+    stages = {
+        "parse": lambda: parser.parse_metadata_dataframe(dataframe, properties),
+        "map": lambda: classifier.map_studies(studies),
+        "reduce": lambda: classifier.reduce_studies(studies_by_classifier, n_studies),
+        "label": lambda: classifier.label_studies(studies),
+        "write": lambda: report_writer.dump_report_spreadsheet(
+            study_labels, counts_by_classifier, io.BytesIO()
+        ),
+    }
+    results = []
+    for stage in STAGES:
+        output, runs, peak = measure(stages[stage], memory, repeat)
+        seconds = statistics.median(runs)
+        if stage == "parse":
+            studies, n_items = output, len(dataframe)
+            n_studies = len(studies)
+        else:
+            n_items = n_studies
+        if stage == "map":
+            studies_by_classifier = output
+        elif stage == "reduce":
+            counts_by_classifier = output
+        elif stage == "label":
+            study_labels = output
+        results.append(
+            {
+                "stage": stage,
+                "items": n_items,
+                "seconds": seconds,
+                "min_seconds": min(runs),
+                "max_seconds": max(runs),
+                "spread": (max(runs) - min(runs)) / seconds if seconds else 0.0,
+                "runs": len(runs),
+                "items_per_second": n_items / seconds if seconds else None,
+                "peak_bytes": peak,
+            }
+        )
+    return results
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, seed=0, memory=True, repeat=1):
+    """
+    Benchmark the report stages on synthetic metadata of each size.
+
+    Returns:
+        dict: JSON-compatible results with the environment of the run.
+    """
+    results = []
+    for n_rows in sizes:
+        dataframe = generate_metadata(n_rows, seed=seed)
+        logger.info(f"Benchmarking {n_rows} rows.")
+        for result in benchmark_stages(dataframe, memory=memory, repeat=repeat):
+            results.append({"rows": n_rows, **result})
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "environment": {
+            "python": platform.python_version(),
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+        },
+        "seed": seed,
+        "repeat": repeat,
+        "results": results,
+    }
+
+
+def compare_results(baseline, current, thresholds=None):
+    """
+    Compare benchmark results against a baseline run, matching results by
+    number of rows and stage. A metric regresses when it is worse than the
+    baseline by more than its threshold (a relative change, e.g., 0.25 for
+    25%). Metrics that either run did not record are skipped.
+
+    Returns:
+        List[dict]: one comparison per matched result and metric, with the
+            baseline and current values, the relative change and whether it
+            is a regression.
+    """
+    thresholds = DEFAULT_THRESHOLDS if thresholds is None else thresholds
+    baseline_results = {(r["rows"], r["stage"]): r for r in baseline["results"]}
+    comparisons = []
+    for result in current["results"]:
+        key = (result["rows"], result["stage"])
+        if key not in baseline_results:
+            continue
+        for metric, threshold in thresholds.items():
+            before = baseline_results[key].get(metric)
+            after = result.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if HIGHER_IS_BETTER[metric] else change
+            comparisons.append(
+                {
+                    "rows": key[0],
+                    "stage": key[1],
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": change,
+                    "threshold": threshold,
+                    "regression": worse > threshold,
+                }
+            )
+    return comparisons
+
+
+def parse_thresholds(values):
+    """
+    Thresholds from metric=value strings, on top of the defaults. Raises
+    ValueError for malformed strings, unknown metrics and non-numbers.
+    """
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for value in values or []:
+        metric, equals, threshold = value.partition("=")
+        if not equals:
+            raise ValueError(f"Threshold {value!r} is not of the form metric=value.")
+        if metric not in HIGHER_IS_BETTER:
+            raise ValueError(f"Unknown metric {metric}.")
+        try:
+            thresholds[metric] = float(threshold)
+        except ValueError:
+            raise ValueError(f"Threshold {value!r} is not a number.") from None
+    return thresholds
+
+
+def report_comparisons(comparisons):
+    """Log each comparison and return whether any metric regressed."""
+    regressed = False
+    for c in comparisons:
+        status = "REGRESSION" if c["regression"] else "ok"
+        log = logger.error if c["regression"] else logger.info
+        log(
+            f"{c['rows']:>9} rows {c['stage']:>7} {c['metric']}: "
+            f"{c['baseline']:.4g} -> {c['current']:.4g} ({c['change']:+.1%}, "
+            f"threshold {c['threshold']:.0%}) {status}"
+        )
+        regressed = regressed or c["regression"]
+    return regressed
+
+
+def benchmark_cli():
+    parser = argparse.ArgumentParser(
+        description="Benchmark the report stages on synthetic metadata."
+    )
+    parser.add_argument(
+        "--sizes",
+        "-n",
+        type=int,
+        nargs="+",
+        default=list(DEFAULT_SIZES),
+        help="Numbers of rows to benchmark (e.g., 100 10000 1000000).",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Synthetic data seed.")
+    parser.add_argument(
+        "--no-memory",
+        action="store_true",
+        help="Skip the peak memory measurements (halves the run time).",
+    )
+    parser.add_argument(
+        "--repeat",
+        "-r",
+        type=int,
+        default=1,
+        help="Runs of each stage; the median time is reported.",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        default="benchmark.json",
+        help="File to write the JSON results to.",
+    )
+    parser.add_argument(
+        "--baseline",
+        "-b",
+        default=None,
+        help="Baseline results to compare against. Exits non-zero on regression.",
+    )
+    parser.add_argument(
+        "--threshold",
+        "-t",
+        action="append",
+        help="Regression threshold as metric=relative change, e.g., peak_bytes=0.1.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    try:
+        thresholds = parse_thresholds(args.threshold)
+    except ValueError as e:
+        parser.error(str(e))
+
+    results = run_benchmarks(
+        args.sizes, args.seed, memory=not args.no_memory, repeat=args.repeat
+    )
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    for result in results["results"]:
+        peak = result["peak_bytes"]
+        logger.info(
+            f"{result['rows']:>9} rows {result['stage']:>7}: "
+            f"{result['seconds']:9.4f}s {result['items_per_second'] or 0:12.0f}/s"
+            + f" (spread {result['spread']:.0%} over {result['runs']} runs)"
+            + (f" peak {peak / 2**20:8.1f} MB" if peak is not None else "")
+        )
+    if args.baseline is not None:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if report_comparisons(compare_results(baseline, results, thresholds)):
+            sys.exit(1)
+
+
+def compare_cli():
+    parser = argparse.ArgumentParser(
+        description="Compare benchmark results against a stored baseline."
+    )
+    parser.add_argument("baseline", help="Baseline benchmark JSON.")
+    parser.add_argument("current", help="Benchmark JSON of the new run.")
+    parser.add_argument(
+        "--threshold",
+        "-t",
+        action="append",
+        help="Regression threshold as metric=relative change, e.g., peak_bytes=0.1.",
+    )
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s: %(message)s")
+    try:
+        thresholds = parse_thresholds(args.threshold)
+    except ValueError as e:
+        parser.error(str(e))
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    comparisons = compare_results(baseline, current, thresholds)
+    if not comparisons:
+        logger.warning("No benchmark results in common with the baseline.")
+    if report_comparisons(comparisons):
+        sys.exit(1)
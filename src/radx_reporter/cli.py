@@ -0,0 +1,163 @@
+import argparse
+import importlib.util
+import os
+
+# Only the standard library is imported here so that --help and argument
+# errors return immediately. pandas and the reporter are imported once the
+# arguments are valid.
+
+# must match emitters.FORMATS
+FORMATS = ("xlsx", "json", "jsonl", "csv", "parquet")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--input",
+        "-i",
+        required=True,
+        help="Path to the metadata file to process (or directory, with --watch).",
+    )
+    parser.add_argument(
+        "--output",
+        "-o",
+        required=False,
+        help="Path to save the report output.",
+    )
+    parser.add_argument(
+        "--sheet",
+        "-s",
+        default="Database Export",
+        required=False,
+        help="Name of the sheet in the input to read.",
+    )
+    parser.add_argument(
+        "--date",
+        "-d",
+        default=None,
+        required=False,
+        help="Date until which the report is current.",
+    )
+    parser.add_argument(
+        "--constant-memory",
+        action="store_true",
+        help="Stream worksheet rows to disk to bound memory for large reports.",
+    )
+    parser.add_argument(
+        "--format",
+        "-f",
+        action="append",
+        choices=FORMATS,
+        dest="formats",
+        help="Output format. Repeat to write several formats in one run.",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=None,
+        required=False,
+        help="Directory of cached reports. Unchanged inputs reuse a cached report.",
+    )
+    parser.add_argument(
+        "--cache-size",
+        type=int,
+        default=512,
+        required=False,
+        help="Maximum size of the report cache in MB.",
+    )
+    parser.add_argument(
+        "--watch",
+        action="store_true",
+        help="Rewrite the report whenever the input file or directory changes.",
+    )
+    parser.add_argument(
+        "--debounce",
+        type=float,
+        default=1.0,
+        required=False,
+        help="Seconds without further changes before the report is rewritten.",
+    )
+    parser.add_argument(
+        "--query",
+        "-q",
+        default=None,
+        required=False,
+        help="SQL query for the metadata when the input is a SQLite database.",
+    )
+    parser.add_argument(
+        "--chunk-size",
+        type=int,
+        default=1000,
+        required=False,
+        help="Rows fetched from the database at a time with --query.",
+    )
+    parser.add_argument(
+        "--profile-json",
+        default=None,
+        required=False,
+        help="Write per-stage timings, memory and matcher calls to this JSON file.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Measure per-stage memory with tracemalloc (slower) in the profile.",
+    )
+    parser.add_argument(
+        "--cprofile",
+        default=None,
+        required=False,
+        help="Write cProfile statistics of the run to this file (see pstats).",
+    )
+    parser.add_argument(
+        "--fuzzy-distance",
+        type=int,
+        default=None,
+        required=False,
+        help="Also match misspelled study domains and focus populations up to "
+        "this many edits; the recovered terms are logged.",
+    )
+    return parser
+
+
+def validate_args(parser, args):
+    """Report invalid arguments before any heavy import."""
+    if args.watch:
+        if not os.path.exists(args.input):
+            parser.error(f"{args.input} does not exist.")
+    elif not os.path.isfile(args.input):
+        parser.error(f"{args.input} is not a file.")
+    if "parquet" in (args.formats or []) and not any(
+        importlib.util.find_spec(engine) for engine in ["pyarrow", "fastparquet"]
+    ):
+        parser.error("Writing parquet requires pyarrow or fastparquet.")
+    if args.cache_size <= 0:
+        parser.error("--cache-size must be positive.")
+    if args.fuzzy_distance is not None and args.fuzzy_distance < 0:
+        parser.error("--fuzzy-distance must not be negative.")
+    if args.debounce < 0:
+        parser.error("--debounce must not be negative.")
+    if args.chunk_size <= 0:
+        parser.error("--chunk-size must be positive.")
+    if args.query is not None and (args.watch or args.cache_dir is not None):
+        parser.error("--query cannot be combined with --watch or --cache-dir.")
+    if args.watch and (args.profile_json is not None or args.cache_dir is not None):
+        parser.error("--watch cannot be combined with --profile-json or --cache-dir.")
+
+
+def study_metadata_cli():
+    parser = build_parser()
+    args = parser.parse_args()
+    validate_args(parser, args)
+
+    from .reporter import run_report_cli
+
+    if args.cprofile is None:
+        run_report_cli(args)
+        return
+
+    import cProfile
+
+    profile = cProfile.Profile()
+    try:
+        profile.runcall(run_report_cli, args)
+    finally:
+        profile.dump_stats(args.cprofile)
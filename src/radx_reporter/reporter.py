@@ -1,16 +1,24 @@
-import argparse
+import json
 import logging
 import os
+import sqlite3
 import time
 
 import dateutil
 import dateutil.parser
 import pandas as pd
 
-from .basic import classifier, report_writer
 from .basic.basic_parser import BasicParser
+from .basic.db_source import DEFAULT_CHUNK_SIZE, read_query_chunks
 from .basic.meta_parser import MetaParser
 from .basic.ontology import Ontology
+from .basic.profiling import StageProfiler, profile_stage
+from .basic.report import Report
+from .basic.report_cache import ReportCache, hash_dataframe, hash_file, report_key
+from .cli import study_metadata_cli  # noqa: F401 (entry point moved to cli)
+from .watch import watch_report
+
+logger = logging.getLogger(__name__)
 
 logging.basicConfig(
     level=logging.INFO,
@@ -19,43 +27,10 @@ logging.basicConfig(
 )
 
 
-def study_metadata_cli():
-    parser = argparse.ArgumentParser()
-    parser.add_argument(
-        "--input",
-        "-i",
-        required=True,
-        help="Path to the metadata file to process.",
-    )
-    parser.add_argument(
-        "--output",
-        "-o",
-        required=False,
-        help="Path to save the report output.",
-    )
-    parser.add_argument(
-        "--sheet",
-        "-s",
-        default="Database Export",
-        required=False,
-        help="Name of the sheet in the input to read.",
-    )
-    parser.add_argument(
-        "--date",
-        "-d",
-        default=None,
-        required=False,
-        help="Date until which the report is current.",
-    )
-    args = parser.parse_args()
-
-    # preprocess the date
-    date = args.date
-    try:
-        date = dateutil.parser(args.date)
-    except:
-        date = args.date
-
+def load_content_ontology():
+    """
+    Load the RADx content ontology bundled with the package.
+    """
     labels_tsv = os.path.join(
         os.path.dirname(__file__), "data/content-ontology", "labels.tsv"
     )
@@ -68,18 +43,201 @@ def study_metadata_cli():
     aux_terms_tsv = os.path.join(
         os.path.dirname(__file__), "data/content-ontology", "auxiliaryTerms.tsv"
     )
-    ontology = Ontology(labels_tsv, aux_terms_tsv, alt_labels_tsv, hierarchy_tsv)
+    return Ontology(labels_tsv, aux_terms_tsv, alt_labels_tsv, hierarchy_tsv)
+
+
+def run_report_cli(args):
+    """Generate the report for parsed study_metadata_cli arguments."""
+    # preprocess the date
+    date = args.date
+    try:
+        date = dateutil.parser(args.date)
+    except:
+        date = args.date
+
+    if args.watch:
+        watch_report(
+            args.input,
+            report_name=args.output or "radx-content-report",
+            sheet_name=args.sheet,
+            date=date,
+            formats=args.formats or ["xlsx"],
+            constant_memory=args.constant_memory,
+            debounce=args.debounce,
+            fuzzy_distance=args.fuzzy_distance,
+        )
+        return
+
+    if args.cache_dir is not None:
+        cache = ReportCache(args.cache_dir, args.cache_size * 1024 * 1024)
+        Reporter.cached_basic_report(
+            args.input,
+            cache,
+            sheet_name=args.sheet,
+            report_name=args.output or "radx-content-report",
+            date=date,
+            constant_memory=args.constant_memory,
+            formats=args.formats or ["xlsx"],
+        )
+        return
 
-    dataframe = pd.read_excel(args.input, sheet_name=args.sheet)
+    profiler = None
+    if args.profile_json is not None:
+        profiler = StageProfiler(trace_memory=args.trace_memory)
+
+    if args.query is not None:
+        # the input is a SQLite copy of the metadata database
+        connection = sqlite3.connect(args.input, check_same_thread=False)
+        try:
+            report = Reporter.build_basic_report_from_query(
+                connection,
+                args.query,
+                date=date,
+                chunk_size=args.chunk_size,
+                profiler=profiler,
+            )
+        finally:
+            connection.close()
+        Reporter.write_report(
+            report,
+            args.output or "radx-content-report",
+            args.formats or ["xlsx"],
+            profiler,
+            dump_auxiliary_terms=True,
+            constant_memory=args.constant_memory,
+        )
+    else:
+        with profile_stage(profiler, "load") as record:
+            dataframe = pd.read_excel(args.input, sheet_name=args.sheet)
+            record["rows_out"] = len(dataframe)
+
+        # without ontology
+        report = Reporter.basic_report(
+            dataframe,
+            report_name=args.output or "radx-content-report",
+            date=date,
+            constant_memory=args.constant_memory,
+            formats=args.formats or ["xlsx"],
+            profiler=profiler,
+            fuzzy_distance=args.fuzzy_distance,
+        )
 
-    # without ontology
-    Reporter.basic_report(dataframe, date=date)
+    if profiler is not None:
+        profiler.close()
+        with open(args.profile_json, "w") as f:
+            json.dump(report.metadata["profile"], f, indent=2)
 
     # with ontology
-    # Reporter.semantic_report(dataframe, ontology, date=date)
+    # Reporter.semantic_report(dataframe, load_content_ontology(), date=date)
 
 
 class Reporter:
+    @classmethod
+    def build_basic_report(
+        cls,
+        dataframe,
+        additional_properties=None,
+        date=None,
+        profiler=None,
+        facet_names=None,
+        property_delimiters=None,
+        fuzzy_distance=None,
+    ):
+        """
+        Parse the metadata and return an in-memory Report without writing
+        any files. See basic_report for a description of the arguments.
+        facet_names maps additional properties to the Data Hub facets that
+        their values link to, e.g., {"FOA NUMBER": "foa_number"}.
+        property_delimiters splits multi-valued additional properties into
+        terms, e.g., {"NIH GRANT NUMBER": ";"} (see BasicParser).
+        fuzzy_distance enables fuzzy matching of study domains and focus
+        populations (see BasicParser); the recovered terms are listed in
+        report.metadata["fuzzy_matches"].
+        """
+        if additional_properties is None:
+            additional_properties = []
+        if date is None:
+            date = time.strftime("%Y-%m-%d")
+
+        meta_parser = BasicParser(
+            property_delimiters=property_delimiters, fuzzy_distance=fuzzy_distance
+        )
+        with profile_stage(profiler, "parse", len(dataframe), meta_parser) as record:
+            studies = meta_parser.parse_metadata_dataframe(
+                dataframe, additional_properties
+            )
+            record["rows_out"] = len(studies)
+        metadata = {"date": date, "report_type": "basic"}
+        if fuzzy_distance:
+            metadata["fuzzy_matches"] = [
+                match._asdict() for match in meta_parser.fuzzy_matches
+            ]
+            logger.info(f"Recovered {len(meta_parser.fuzzy_matches)} misspelled terms.")
+        report = Report(studies, metadata, facet_names=facet_names)
+        return cls.finish_profile(report, profiler)
+
+    @classmethod
+    def build_basic_report_from_query(
+        cls,
+        connection,
+        query,
+        parameters=(),
+        additional_properties=None,
+        date=None,
+        chunk_size=DEFAULT_CHUNK_SIZE,
+        prefetch=2,
+        profiler=None,
+    ):
+        """
+        Build a basic report directly from a database. Rows are fetched in
+        chunks of chunk_size rows in a background thread while earlier
+        chunks are parsed, so the query results are never all in memory.
+
+        Args:
+            connection: DB-API connection, or a function that opens one
+                (see db_source.read_query_chunks for threading).
+            query (str): query whose result columns are named after the
+                metadata columns (see Required Input).
+            parameters (Sequence): query parameters.
+            chunk_size (int): rows per fetchmany call.
+            prefetch (int): chunks fetched ahead of the parser; 0 fetches
+                in the calling thread.
+            See basic_report for the remaining arguments.
+        """
+        if additional_properties is None:
+            additional_properties = []
+        if date is None:
+            date = time.strftime("%Y-%m-%d")
+
+        meta_parser = BasicParser()
+        chunks = read_query_chunks(connection, query, parameters, chunk_size, prefetch)
+        with profile_stage(profiler, "parse", None, meta_parser) as record:
+            studies = meta_parser.parse_metadata_chunks(chunks, additional_properties)
+            record["rows_out"] = len(studies)
+        report = Report(studies, {"date": date, "report_type": "basic"})
+        return cls.finish_profile(report, profiler)
+
+    @classmethod
+    def finish_profile(cls, report, profiler):
+        """
+        With a profiler, compute the report tables stage by stage and store
+        the profile in the report metadata.
+        """
+        if profiler is not None:
+            report.evaluate(profiler)
+            report.metadata["profile"] = profiler.to_dict()
+        return report
+
+    @classmethod
+    def write_report(cls, report, report_name, formats, profiler=None, **kwargs):
+        """Write a report, recording the write stage in profiler."""
+        with profile_stage(profiler, "write", len(report.studies)) as record:
+            written = report.write(report_name, formats, **kwargs)
+            record["rows_out"] = sum(len(files) for files in written.values())
+        if profiler is not None:
+            report.metadata["profile"] = profiler.to_dict()
+        return written
+
     @classmethod
     def basic_report(
         cls,
@@ -88,6 +246,10 @@ class Reporter:
         report_name="radx-content-report",
         date=None,
         dump_auxiliary_terms=True,
+        constant_memory=False,
+        formats=("xlsx",),
+        profiler=None,
+        fuzzy_distance=None,
     ):
         """
         Generate a basic report (without semantic information) on the content
@@ -98,48 +260,134 @@ class Reporter:
                 columns to be processed by the reporter.
             additional_properties (Optional[List[str]]): a list of additional
                 properties (column names) over which to aggergate statistics.
-            report_name (Optional[str]): file name for the report. The .xlsx
-                extension will be added to this name.
+            report_name (Optional[str]): file name for the report. The
+                extension for each format will be added to this name.
             date (Optional[DateTime]): timestamp for this report. If not provided,
                 the timestamp will be set to the current date.
             dump_auxiliary_terms (boolean): flag that controls whether non-coded
                 terms are dropped from reporting. This must be false to use custom
                 fields.
+            constant_memory (boolean): write the spreadsheet row by row with
+                bounded memory use (xlsxwriter constant_memory mode).
+            formats (Sequence[str]): output formats to write, any of xlsx,
+                json, jsonl, csv and parquet. All formats are written from
+                one aggregation pass.
+            profiler (Optional[StageProfiler]): records wall and CPU time,
+                memory, rows and matcher calls of each stage. The profile
+                is returned in report.metadata["profile"].
+            fuzzy_distance (Optional[int]): also match misspelled study
+                domains and focus populations up to this many edits. The
+                recovered terms are in report.metadata["fuzzy_matches"].
+
+        Returns:
+            Report: the report that was written.
+        """
+        report = cls.build_basic_report(
+            dataframe,
+            additional_properties,
+            date,
+            profiler,
+            fuzzy_distance=fuzzy_distance,
+        )
+        cls.write_report(
+            report,
+            report_name,
+            formats,
+            profiler,
+            dump_auxiliary_terms=dump_auxiliary_terms,
+            constant_memory=constant_memory,
+        )
+        return report
+
+    @classmethod
+    def cached_basic_report(
+        cls,
+        source,
+        cache,
+        sheet_name=None,
+        additional_properties=None,
+        report_name="radx-content-report",
+        date=None,
+        dump_auxiliary_terms=True,
+        constant_memory=False,
+        formats=("xlsx",),
+    ):
+        """
+        Generate a basic report through a ReportCache. The cache key covers
+        the input content, the additional properties, the report options
+        and the vocabulary version. On a hit the cached files are copied to
+        report_name and the input is never parsed.
+
+        Args:
+            source (Union[str, pd.DataFrame]): path to an XLSX metadata
+                export (hashed by its bytes, read from sheet_name on a miss)
+                or a DataFrame (hashed by its contents).
+            cache (ReportCache): cache of finished reports.
+            See basic_report for the remaining arguments.
+
+        Returns:
+            Dict[str, List[str]]: file names written for each format.
         """
-        if additional_properties is None:
-            additional_properties = []
         if date is None:
             date = time.strftime("%Y-%m-%d")
+        if isinstance(source, pd.DataFrame):
+            input_digest = hash_dataframe(source)
+        else:
+            input_digest = hash_file(source) + f":{sheet_name}"
+        options = {
+            "report_type": "basic",
+            "date": date,
+            "dump_auxiliary_terms": dump_auxiliary_terms,
+            "formats": sorted(set(formats)),
+        }
+        key = report_key(input_digest, additional_properties, options)
+        written = cache.restore(key, report_name)
+        if written is not None:
+            logger.info(f"Reusing cached report {key}.")
+            return written
 
-        meta_parser = BasicParser()
-        studies = meta_parser.parse_metadata_dataframe(dataframe, additional_properties)
-        study_labels = classifier.label_studies(studies)
-        studies_by_classifier = classifier.map_studies(studies)
-
-        report_writer.dump_report_spreadsheet(
-            study_labels,
-            classifier.reduce_studies(studies_by_classifier, len(studies)),
-            report_name + ".xlsx",
+        if not isinstance(source, pd.DataFrame):
+            source = pd.read_excel(source, sheet_name=sheet_name)
+        report = cls.build_basic_report(source, additional_properties, date)
+        written = report.write(
+            report_name,
+            formats,
             dump_auxiliary_terms=dump_auxiliary_terms,
-            date=date,
+            constant_memory=constant_memory,
         )
+        cache.put(key, report_name, written)
+        return written
 
     @classmethod
-    def semantic_report(
-        cls, dataframe, ontology, file_name="radx-semantic-content-report", date=None
+    def build_semantic_report(
+        cls, dataframe, ontology, date=None, matcher_cache_dir=None, profiler=None
     ):
+        """
+        Parse the metadata against the content ontology and return an
+        in-memory Report without writing any files.
+        """
         if date is None:
             date = time.strftime("%Y-%m-%d")
 
-        meta_parser = MetaParser(ontology)
-        studies = meta_parser.parse_metadata_dataframe(dataframe)
-        study_labels = classifier.label_studies(studies)
-        studies_by_classifier = classifier.map_studies(studies)
-        counts = classifier.aggregate_counts(studies_by_classifier)
+        meta_parser = MetaParser(ontology, matcher_cache_dir)
+        with profile_stage(profiler, "parse", len(dataframe), meta_parser) as record:
+            studies = meta_parser.parse_metadata_dataframe(dataframe)
+            record["rows_out"] = len(studies)
+        report = Report(studies, {"date": date, "report_type": "semantic"})
+        return cls.finish_profile(report, profiler)
 
-        report_writer.dump_report_spreadsheet(
-            study_labels,
-            classifier.reduce_studies(studies_by_classifier, len(studies)),
-            file_name + ".xlsx",
-            date=date,
+    @classmethod
+    def semantic_report(
+        cls,
+        dataframe,
+        ontology,
+        file_name="radx-semantic-content-report",
+        date=None,
+        matcher_cache_dir=None,
+        profiler=None,
+    ):
+        report = cls.build_semantic_report(
+            dataframe, ontology, date, matcher_cache_dir, profiler
         )
+        cls.write_report(report, file_name, ("xlsx",), profiler)
+        return report
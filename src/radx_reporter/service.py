@@ -0,0 +1,283 @@
+import argparse
+import hashlib
+import io
+import json
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pandas as pd
+
+from .basic import classifier
+from .basic.matcher import compile_matchers
+from .basic.meta_parser import CLASSIFIER_VOCABULARIES
+from .basic.report_cache import hash_file
+from .reporter import Reporter, load_content_ontology
+
+logger = logging.getLogger(__name__)
+
+XLSX_CONTENT_TYPE = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+CONTENT_TYPES = {"xlsx": XLSX_CONTENT_TYPE, "json": "application/json"}
+
+
+class ServiceError(Exception):
+    """Request error reported to the client with an HTTP status."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+class ReportService:
+    """
+    Warm reporter state shared by all requests: the content ontology, its
+    compiled matchers and the most recently parsed input. Report work runs
+    in a bounded thread pool and each request waits at most timeout
+    seconds for its result.
+    """
+
+    def __init__(self, ontology=None, max_workers=2, timeout=120.0):
+        self.ontology = load_content_ontology() if ontology is None else ontology
+        self.matchers = compile_matchers(self.ontology, CLASSIFIER_VOCABULARIES)
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        self.timeout = timeout
+        self.lock = threading.Lock()
+        self.last_key = None
+        self.last_report = None
+        self.local = threading.local()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def run(self, function, *args):
+        """
+        Run report work in the worker pool. A request that times out gets
+        an error and its work is cancelled: before it starts, or at the
+        next check between stages once it is running.
+        """
+        cancelled = threading.Event()
+        future = self.executor.submit(self.call, cancelled, function, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            future.cancel()
+            cancelled.set()
+            raise ServiceError(504, f"Request timed out after {self.timeout}s.")
+
+    def call(self, cancelled, function, *args):
+        self.local.cancelled = cancelled
+        try:
+            return function(*args)
+        finally:
+            self.local.cancelled = None
+
+    def check_cancelled(self):
+        """Stop the work of a request that timed out between stages."""
+        cancelled = getattr(self.local, "cancelled", None)
+        if cancelled is not None and cancelled.is_set():
+            raise ServiceError(504, "Request was cancelled.")
+
+    def read_input(self, options, body, content_type):
+        """
+        Load the metadata DataFrame from an uploaded body (XLSX or CSV) or
+        from a local file path given in the request options. Returns the
+        DataFrame loader and a content key for the input.
+        """
+        sheet = options.get("sheet", "Database Export")
+        if body and content_type != "application/json":
+            key = f"{hashlib.sha256(body).hexdigest()}:{sheet}"
+            if content_type == "text/csv":
+                return lambda: pd.read_csv(io.BytesIO(body)), key
+            return lambda: pd.read_excel(io.BytesIO(body), sheet_name=sheet), key
+        path = options.get("path")
+        if path is None:
+            raise ServiceError(400, "Provide an upload or a path to a metadata file.")
+        try:
+            key = f"{hash_file(path)}:{sheet}"
+        except OSError as e:
+            raise ServiceError(400, f"Cannot read {path}: {e}")
+        if path.endswith(".csv"):
+            return lambda: pd.read_csv(path), key
+        return lambda: pd.read_excel(path, sheet_name=sheet), key
+
+    def get_report(self, options, body=b"", content_type=""):
+        """
+        Build the report for a request, reusing the last parsed input when
+        the same content and options are requested again on the same day.
+        """
+        load, input_key = self.read_input(options, body, content_type)
+        additional_properties = options.get("additional_properties", [])
+        # resolved here so that a cached report is never stamped with an
+        # earlier day
+        date = options.get("date") or time.strftime("%Y-%m-%d")
+        report_type = options.get("report_type", "basic")
+        key = (input_key, tuple(additional_properties), date, report_type)
+        with self.lock:
+            if key == self.last_key:
+                return self.last_report
+        self.check_cancelled()
+        metadata = load()
+        self.check_cancelled()
+        if report_type == "semantic":
+            # MetaParser reuses the matchers compiled for this ontology
+            report = Reporter.build_semantic_report(metadata, self.ontology, date)
+        else:
+            report = Reporter.build_basic_report(metadata, additional_properties, date)
+        with self.lock:
+            self.last_key, self.last_report = key, report
+        return report
+
+    def counts(self, options, body=b"", content_type=""):
+        report = self.get_report(options, body, content_type)
+        document = report.to_dict()
+        return {"date": document["date"], "counts": document["counts"]}
+
+    def crosstab(self, options, body=b"", content_type=""):
+        row, column = options.get("row"), options.get("column")
+        if row is None or column is None:
+            raise ServiceError(400, "Cross-tabs need row and column classifiers.")
+        report = self.get_report(options, body, content_type)
+        table = classifier.crosstab_studies(report.studies, row, column)
+        urls = classifier.crosstab_urls(table)
+        return {
+            "row": row,
+            "column": column,
+            "index": table.index.tolist(),
+            "columns": table.columns.tolist(),
+            "counts": table.to_numpy().tolist(),
+            "urls": urls.to_numpy().tolist(),
+        }
+
+    def report_file(self, options, body=b"", content_type=""):
+        fmt = options.get("format", "xlsx")
+        if fmt not in CONTENT_TYPES:
+            raise ServiceError(400, f"Unsupported report format {fmt}.")
+        report = self.get_report(options, body, content_type)
+        self.check_cancelled()
+        if fmt == "json":
+            return report.to_json().encode("utf-8")
+        dump_auxiliary_terms = options.get("dump_auxiliary_terms", True)
+        if isinstance(dump_auxiliary_terms, str):
+            dump_auxiliary_terms = dump_auxiliary_terms.lower() not in {"0", "false"}
+        return report.to_xlsx(dump_auxiliary_terms=dump_auxiliary_terms)
+
+
+class ReportRequestHandler(BaseHTTPRequestHandler):
+    """
+    HTTP endpoints:
+        GET  /health
+        POST /counts     per-classifier study counts as JSON
+        POST /crosstab   study counts and search URLs for pairs of labels
+                         (row, column)
+        POST /report     report file (format=xlsx or json)
+    Options are taken from the query string or from a JSON body. Metadata
+    is uploaded as the request body (XLSX or CSV) or referenced with a
+    local path option.
+    """
+
+    def log_message(self, format, *args):
+        logger.info("%s - %s", self.address_string(), format % args)
+
+    def send_payload(self, status, payload, content_type="application/json"):
+        if content_type == "application/json" and not isinstance(payload, bytes):
+            payload = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def read_request(self):
+        url = urlparse(self.path)
+        options = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        if "additional_properties" in options:
+            properties = options["additional_properties"]
+            options["additional_properties"] = properties.split(",")
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length) if length else b""
+        content_type = self.headers.get("Content-Type", "").split(";")[0].strip()
+        if body and content_type == "application/json":
+            try:
+                options.update(json.loads(body))
+            except ValueError:
+                raise ServiceError(400, "Request body is not valid JSON.")
+        return url.path, options, body, content_type
+
+    def do_GET(self):
+        if urlparse(self.path).path == "/health":
+            self.send_payload(200, {"status": "ok"})
+        else:
+            self.send_payload(404, {"error": f"Unknown endpoint {self.path}."})
+
+    def do_POST(self):
+        service = self.server.service
+        start = time.perf_counter()
+        try:
+            path, options, body, content_type = self.read_request()
+            endpoints = {
+                "/counts": service.counts,
+                "/crosstab": service.crosstab,
+                "/report": service.report_file,
+            }
+            if path not in endpoints:
+                raise ServiceError(404, f"Unknown endpoint {path}.")
+            payload = service.run(endpoints[path], options, body, content_type)
+            if path == "/report":
+                fmt = options.get("format", "xlsx")
+                self.send_payload(200, payload, CONTENT_TYPES[fmt])
+            else:
+                self.send_payload(200, payload)
+        except ServiceError as e:
+            self.send_payload(e.status, {"error": str(e)})
+        except (KeyError, ValueError) as e:
+            self.send_payload(400, {"error": f"Cannot process request: {e}"})
+        except Exception as e:
+            logger.exception("Report request failed.")
+            self.send_payload(500, {"error": str(e)})
+        logger.info(f"{self.path} handled in {time.perf_counter() - start:.3f}s")
+
+
+def make_server(service, host="127.0.0.1", port=0):
+    """
+    Bind an HTTP server for the service. Port 0 picks a free port; the
+    bound address is available as server.server_address.
+    """
+    server = ThreadingHTTPServer((host, port), ReportRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def serve_cli():
+    parser = argparse.ArgumentParser(
+        description="Serve RADx content reports over HTTP with warm state."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Address to bind.")
+    parser.add_argument("--port", "-p", type=int, default=8765, help="Port to bind.")
+    parser.add_argument(
+        "--workers", "-w", type=int, default=2, help="Concurrent report workers."
+    )
+    parser.add_argument(
+        "--timeout",
+        "-t",
+        type=float,
+        default=120.0,
+        help="Seconds to wait for a report before failing the request.",
+    )
+    args = parser.parse_args()
+
+    service = ReportService(max_workers=args.workers, timeout=args.timeout)
+    server = make_server(service, args.host, args.port)
+    host, port = server.server_address[:2]
+    logger.info(f"Serving reports on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
@@ -0,0 +1,128 @@
+import numpy as np
+import pandas as pd
+
+from .basic.keywords import Keyword
+from .basic.vocabulary import (
+    COLLECTION_METHODS,
+    DATA_TYPES,
+    FOCUS_POPULATIONS,
+    INSTITUTES,
+    PROGRAMS,
+    STUDY_DESIGNS,
+    STUDY_DOMAINS,
+)
+
+# vocabulary for each multi-valued metadata column
+COLUMN_TERMS = {
+    Keyword.INSTITUTE: INSTITUTES,
+    Keyword.METHOD: COLLECTION_METHODS,
+    Keyword.DESIGN: STUDY_DESIGNS,
+    Keyword.DATATYPES: DATA_TYPES,
+    Keyword.DOMAIN: STUDY_DOMAINS,
+    Keyword.FOCUSPOPULATION: FOCUS_POPULATIONS,
+}
+STATUSES = ["Approved", "Pending", "In Review"]
+STATUS_WEIGHTS = [0.9, 0.05, 0.05]
+UNMATCHED_TEXT = ["Other", "N/A", "Not applicable", "TBD"]
+DESCRIPTION_TEMPLATES = [
+    "A {design} study of {population} using {method} to examine {domain}.",
+    "This project collects {method} data on {domain} among {population}.",
+    "{domain} in {population}: a {design} study.",
+]
+
+
+def term_texts(term):
+    """Label and synonyms of a vocabulary term, as they may appear in exports."""
+    return [term.label.strip()] + sorted(getattr(term, "synonyms", ()) or ())
+
+
+def add_noise(text, rng):
+    """Change the case, spacing or punctuation of a term as in hand-entered text."""
+    kind = rng.integers(4)
+    if kind == 0:
+        return text.upper()
+    if kind == 1:
+        return text.lower()
+    if kind == 2:
+        return f"  {text} "
+    return text.replace("-", " ") + "."
+
+
+def make_cell(terms, rng, max_terms=3, noise_rate=0.2):
+    n_terms = rng.integers(1, max_terms + 1)
+    chosen = rng.choice(len(terms), size=min(n_terms, len(terms)), replace=False)
+    texts = []
+    for i in chosen:
+        candidates = term_texts(terms[i])
+        text = candidates[rng.integers(len(candidates))]
+        if rng.random() < noise_rate:
+            text = add_noise(text, rng)
+        texts.append(text)
+    if rng.random() < noise_rate / 4:
+        texts.append(UNMATCHED_TEXT[rng.integers(len(UNMATCHED_TEXT))])
+    return "; ".join(texts)
+
+
+def make_cohort_size(rng):
+    size = int(rng.lognormal(mean=6.5, sigma=1.5))
+    kind = rng.integers(3)
+    if kind == 0:
+        return size
+    if kind == 1:
+        return f"About {size} participants"
+    return f"N = {size}"
+
+
+def make_description(rng):
+    def pick(terms):
+        return terms[rng.integers(len(terms))].label.strip()
+
+    template = DESCRIPTION_TEMPLATES[rng.integers(len(DESCRIPTION_TEMPLATES))]
+    return template.format(
+        design=pick(STUDY_DESIGNS),
+        population=pick(FOCUS_POPULATIONS),
+        method=pick(COLLECTION_METHODS),
+        domain=pick(STUDY_DOMAINS),
+    )
+
+
+def sample_pool(pool, n_rows, rng, missing_rate=0.0):
+    """Draw n_rows values from a pool of cells, with missing values."""
+    values = np.empty(n_rows, dtype=object)
+    values[:] = [pool[i] for i in rng.integers(len(pool), size=n_rows)]
+    if missing_rate:
+        values[rng.random(n_rows) < missing_rate] = None
+    return values
+
+
+def generate_metadata(n_rows, seed=0, pool_size=2048, missing_rate=0.1, noise_rate=0.2):
+    """
+    Synthetic Data Hub metadata export with the Keyword columns and a free
+    text STUDY DESCRIPTION column. Cells combine vocabulary labels and
+    synonyms with noise (case, spacing and punctuation changes, unmatched
+    text and missing values). Cells are drawn from pools of pool_size
+    distinct values per column, so a million rows are generated in
+    seconds while the parser still sees varied input.
+    """
+    rng = np.random.default_rng(seed)
+    pool_size = max(1, min(pool_size, n_rows))
+    data = {
+        Keyword.STATUS.value: rng.choice(STATUSES, size=n_rows, p=STATUS_WEIGHTS),
+        Keyword.PROGRAM.value: sample_pool(
+            [text for program in PROGRAMS for text in term_texts(program)],
+            n_rows,
+            rng,
+        ),
+        Keyword.PHS.value: [f"phs{i:06d}" for i in range(1, n_rows + 1)],
+    }
+    for keyword, terms in COLUMN_TERMS.items():
+        pool = [make_cell(terms, rng, noise_rate=noise_rate) for _ in range(pool_size)]
+        data[keyword.value] = sample_pool(pool, n_rows, rng, missing_rate)
+    data[Keyword.COHORTSIZE.value] = sample_pool(
+        [make_cohort_size(rng) for _ in range(pool_size)], n_rows, rng, missing_rate
+    )
+    data["STUDY DESCRIPTION"] = sample_pool(
+        [make_description(rng) for _ in range(pool_size)], n_rows, rng
+    )
+    columns = [kw.value for kw in Keyword] + ["STUDY DESCRIPTION"]
+    return pd.DataFrame(data)[columns]
@@ -0,0 +1,297 @@
+import fnmatch
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+from .basic.basic_parser import BasicParser
+from .basic.classifier import AdditionalKey
+from .basic.keywords import Keyword
+from .basic.report import Report
+from .basic.vocabulary import AdditionalClassifier, Classifier
+
+logger = logging.getLogger(__name__)
+
+INPUT_PATTERNS = ("*.xlsx", "*.csv")
+
+
+def snapshot(path, patterns=INPUT_PATTERNS):
+    """
+    Modification time and size of the watched file, or of every metadata
+    export in a watched directory. Office lock files (~$name.xlsx) are
+    ignored.
+    """
+    if os.path.isdir(path):
+        file_names = [
+            entry.path
+            for entry in os.scandir(path)
+            if entry.is_file()
+            and not entry.name.startswith("~$")
+            and any(fnmatch.fnmatch(entry.name, pattern) for pattern in patterns)
+        ]
+    else:
+        file_names = [path]
+    state = {}
+    for file_name in file_names:
+        try:
+            stat = os.stat(file_name)
+        except OSError:
+            continue
+        state[file_name] = (stat.st_mtime_ns, stat.st_size)
+    return state
+
+
+def latest_input(state):
+    """The most recently modified file of a snapshot."""
+    if not state:
+        return None
+    return max(state, key=lambda file_name: state[file_name])
+
+
+def read_metadata(file_name, sheet_name="Database Export"):
+    if file_name.endswith(".csv"):
+        return pd.read_csv(file_name)
+    return pd.read_excel(file_name, sheet_name=sheet_name)
+
+
+def watch(path, on_change, interval=0.5, debounce=1.0, stop=None):
+    """
+    Poll path (a file or a directory of exports) and call on_change with
+    the changed file names once the files have been quiet for debounce
+    seconds, so a workbook that is saved in several steps triggers a
+    single update. Runs until the stop event is set.
+    """
+    stop = threading.Event() if stop is None else stop
+    previous = snapshot(path)
+    while not stop.wait(interval):
+        current = snapshot(path)
+        if current == previous:
+            continue
+        quiet_since = time.monotonic()
+        while time.monotonic() - quiet_since < debounce:
+            if stop.wait(min(interval, debounce)):
+                return
+            latest = snapshot(path)
+            if latest != current:
+                current, quiet_since = latest, time.monotonic()
+        changed = sorted(
+            file_name
+            for file_name in set(previous) | set(current)
+            if previous.get(file_name) != current.get(file_name)
+        )
+        previous = current
+        on_change(changed)
+
+
+class IncrementalReport:
+    """
+    Basic report that is kept up to date across versions of the metadata.
+    Parsed studies are cached by the hash of their row, so an update only
+    parses new or edited rows. Studies that were added, edited or removed
+    are applied as deltas to the grouping of studies by label, and the
+    counts are reduced from that grouping. The resulting report is the
+    same as Reporter.build_basic_report on the latest DataFrame, including
+    the terms recovered by fuzzy matching, which are kept with their row.
+    """
+
+    def __init__(
+        self,
+        additional_properties=None,
+        date=None,
+        property_delimiters=None,
+        fuzzy_distance=None,
+    ):
+        self.parser = BasicParser(
+            property_delimiters=property_delimiters, fuzzy_distance=fuzzy_distance
+        )
+        self.additional_properties = list(additional_properties or [])
+        self.date = date
+        self.fuzzy_distance = fuzzy_distance
+        self.properties = None
+        self.row_studies = {}
+        self.row_matches = {}
+        self.fuzzy_matches = []
+        self.studies = {}
+        # classifier -> label -> {phs: study}
+        self.groups = {classifier: {} for classifier in Classifier}
+        self.additional_keys = {}
+        self.additional_values = {}
+
+    def row_hashes(self, dataframe, columns):
+        parsed = dataframe.reindex(columns=columns)
+        # mixed object columns are hashed through their string representation
+        parsed = parsed.astype(
+            {column: str for column, dtype in parsed.dtypes.items() if dtype == object}
+        )
+        return pd.util.hash_pandas_object(parsed, index=False).to_numpy()
+
+    def classifier_labels(self, study):
+        """(classifier, label) for each label of a study, as in map_studies."""
+        for classifier in Classifier:
+            for label in study.get_classifiers(classifier):
+                yield classifier, label
+        for key, prop in study.additional_properties.items():
+            if key not in self.additional_keys:
+                self.additional_keys[key] = AdditionalKey(key)
+            for term in prop.terms:
+                if (key, term) not in self.additional_values:
+                    self.additional_values[key, term] = AdditionalClassifier(term)
+                yield self.additional_keys[key], self.additional_values[key, term]
+
+    def add_study(self, study):
+        for classifier, label in self.classifier_labels(study):
+            label_to_studies = self.groups.setdefault(classifier, {})
+            label_to_studies.setdefault(label, {})[study.phs_id] = study
+
+    def remove_study(self, study):
+        for classifier, label in self.classifier_labels(study):
+            label_to_studies = self.groups[classifier]
+            del label_to_studies[label][study.phs_id]
+            if not label_to_studies[label]:
+                del label_to_studies[label]
+
+    def update(self, dataframe):
+        """
+        Bring the report up to date with a new version of the metadata.
+        Returns the number of rows, the number of rows that were parsed
+        and the number of studies added and removed.
+        """
+        properties = self.parser.prune_additional_properties(
+            dataframe, self.additional_properties
+        )
+        if properties != self.properties:
+            # parsed rows depend on the additional properties
+            self.row_studies = {}
+            self.row_matches = {}
+            self.properties = properties
+        columns = [kw.value for kw in Keyword] + properties
+
+        row_studies = {}
+        row_matches = {}
+        studies = {}
+        fuzzy_matches = []
+        n_parsed = 0
+        for position, row_hash in enumerate(self.row_hashes(dataframe, columns)):
+            if row_hash in row_studies:
+                study = row_studies[row_hash]
+            elif row_hash in self.row_studies:
+                study = self.row_studies[row_hash]
+                row_matches[row_hash] = self.row_matches[row_hash]
+            else:
+                self.parser.fuzzy_matches = []
+                study = self.parser.parse_row(dataframe.iloc[position], properties)
+                row_matches[row_hash] = self.parser.fuzzy_matches
+                n_parsed += 1
+            row_studies[row_hash] = study
+            if study is not None:
+                studies[study.phs_id] = study
+                fuzzy_matches.extend(row_matches[row_hash])
+
+        removed = [s for phs, s in self.studies.items() if studies.get(phs) is not s]
+        added = [s for phs, s in studies.items() if self.studies.get(phs) is not s]
+        for study in removed:
+            self.remove_study(study)
+        for study in added:
+            self.add_study(study)
+        self.row_studies = row_studies
+        self.row_matches = row_matches
+        self.studies = studies
+        self.fuzzy_matches = fuzzy_matches
+
+        summary = {
+            "rows": len(dataframe),
+            "parsed": n_parsed,
+            "added": len(added),
+            "removed": len(removed),
+        }
+        logger.info(f"Updated report: {summary}")
+        return summary
+
+    def studies_by_classifier(self):
+        """
+        Grouping of studies by label in the order produced by map_studies:
+        labels and studies in the order of the studies in the metadata.
+        """
+        position = {phs: i for i, phs in enumerate(self.studies)}
+        additional_keys = {}
+        for study in self.studies.values():
+            for key in study.additional_properties:
+                additional_keys.setdefault(self.additional_keys[key], None)
+
+        studies_by_classifier = {}
+        for classifier in list(Classifier) + list(additional_keys):
+            label_to_studies = [
+                (label, sorted(group.values(), key=lambda s: position[s.phs_id]))
+                for label, group in self.groups[classifier].items()
+            ]
+            label_to_studies.sort(key=lambda item: position[item[1][0].phs_id])
+            studies_by_classifier[classifier] = dict(label_to_studies)
+        return studies_by_classifier
+
+    def report(self):
+        date = self.date or time.strftime("%Y-%m-%d")
+        metadata = {"date": date, "report_type": "basic"}
+        if self.fuzzy_distance:
+            metadata["fuzzy_matches"] = [m._asdict() for m in self.fuzzy_matches]
+        return Report(
+            dict(self.studies),
+            metadata,
+            studies_by_classifier=self.studies_by_classifier(),
+        )
+
+
+def watch_report(
+    path,
+    report_name="radx-content-report",
+    sheet_name="Database Export",
+    additional_properties=None,
+    date=None,
+    formats=("xlsx",),
+    dump_auxiliary_terms=True,
+    constant_memory=False,
+    fuzzy_distance=None,
+    interval=0.5,
+    debounce=1.0,
+    stop=None,
+):
+    """
+    Write the basic report for path (a metadata export or a directory of
+    exports, in which case the most recent export is used) and rewrite it
+    whenever the input changes, until interrupted or the stop event is set.
+    """
+    incremental = IncrementalReport(
+        additional_properties, date, fuzzy_distance=fuzzy_distance
+    )
+
+    def regenerate(changed=None):
+        file_name = latest_input(snapshot(path))
+        if file_name is None:
+            logger.warning(f"No metadata export found in {path}.")
+            return
+        start = time.perf_counter()
+        try:
+            dataframe = read_metadata(file_name, sheet_name)
+        except Exception as e:
+            # the export may still be incomplete; wait for the next change
+            logger.warning(f"Cannot read {file_name}: {e}")
+            return
+        incremental.update(dataframe)
+        incremental.report().write(
+            report_name,
+            formats,
+            dump_auxiliary_terms=dump_auxiliary_terms,
+            constant_memory=constant_memory,
+        )
+        logger.info(
+            f"Report for {file_name} written in {time.perf_counter() - start:.3f}s"
+        )
+
+    regenerate()
+    logger.info(f"Watching {path} for changes.")
+    try:
+        watch(path, regenerate, interval=interval, debounce=debounce, stop=stop)
+    except KeyboardInterrupt:
+        pass
+    return incremental
@@ -0,0 +1,83 @@
+import os
+
+import pandas as pd
+import pytest
+
+from radx_reporter.basic import classifier, gcbo
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.ontology import Ontology
+
+DATA_DIR = os.path.join(
+    os.path.dirname(__file__), os.pardir, "src", "radx_reporter", "data"
+)
+ONTOLOGY_DIR = os.path.join(DATA_DIR, "content-ontology")
+
+
+@pytest.fixture
+def metadata_dataframe():
+    """Small Data Hub metadata export with the columns used by BasicParser."""
+    data = {
+        "STUDY STATUS": ["Approved", "Approved", "Approved", "Pending"],
+        "STUDY PROGRAM": ["RADx-UP", "RADx-rad", "RADx-UP", "RADx Tech"],
+        "NIH INSTITUTE OR CENTER": ["NIMHD; NIA", "NIBIB", None, "NCI"],
+        "DATA COLLECTION METHOD": [
+            "Survey; Interview or Focus Group",
+            "Wastewater Sampling",
+            "Survey",
+            "Survey",
+        ],
+        "STUDY DESIGN": [
+            "Longitudinal Cohort",
+            "Cross-Sectional; Case-Control",
+            None,
+            "Observational",
+        ],
+        "ESTIMATED COHORT SIZE": [488, "About 1200 participants", None, 10],
+        "DATA TYPES": ["Clinical; Behavioral", "Social", "Questionnaires/Surveys", None],
+        "STUDY DOMAIN": [
+            "Vaccination Rate/Uptake; Testing Rate/Uptake",
+            "Wastewater Surveillance",
+            "Long COVID",
+            None,
+        ],
+        "STUDY PHS": ["phs000001", "phs000002", "phs000003", "phs000004"],
+        "STUDY POPULATION FOCUS": [
+            "Hispanic and Latino; Rural Communities",
+            None,
+            "Children",
+            "Adults",
+        ],
+        "FOA NUMBER": ["RFA-OD-20-013", "RFA-OD-20-015", "RFA-OD-20-013", None],
+    }
+    return pd.DataFrame(data)
+
+
+@pytest.fixture
+def report_inputs(metadata_dataframe):
+    """Labels table and count tables of metadata_dataframe, with FOA NUMBER."""
+    studies = BasicParser().parse_metadata_dataframe(metadata_dataframe, ["FOA NUMBER"])
+    study_labels = classifier.label_studies(studies)
+    counts = classifier.reduce_studies(classifier.map_studies(studies), len(studies))
+    return study_labels, counts
+
+
+@pytest.fixture(scope="session")
+def gcbo_ontology():
+    """The GCBO data element ontology bundled with the package."""
+    return gcbo.GCBO(
+        os.path.join(DATA_DIR, "labels.tsv"),
+        os.path.join(DATA_DIR, "altLabels.tsv"),
+        os.path.join(DATA_DIR, "hierarchy.tsv"),
+        os.path.join(DATA_DIR, "seeAlso.tsv"),
+    )
+
+
+@pytest.fixture(scope="session")
+def content_ontology():
+    """The RADx content ontology bundled with the package."""
+    return Ontology(
+        os.path.join(ONTOLOGY_DIR, "labels.tsv"),
+        os.path.join(ONTOLOGY_DIR, "auxiliaryTerms.tsv"),
+        os.path.join(ONTOLOGY_DIR, "altLabels.tsv"),
+        os.path.join(ONTOLOGY_DIR, "hierarchy.tsv"),
+    )
@@ -0,0 +1,75 @@
+import json
+import sys
+
+import pandas as pd
+import pytest
+
+from radx_reporter import batch
+from radx_reporter.batch import read_manifest, run_batch, run_job
+
+
+class TestBatch:
+
+    def test_read_manifest(self, tmp_path):
+        manifest = tmp_path / "jobs.csv"
+        manifest.write_text(
+            "input,sheet,date,output\n"
+            "export.xlsx,,2024-07-29,\n"
+            "export.xlsx,Summary,,summary-report\n"
+        )
+        jobs = read_manifest(str(manifest))
+        assert jobs[0] == {
+            "input": str(tmp_path / "export.xlsx"),
+            "sheet": "Database Export",
+            "date": "2024-07-29",
+            "output": str(tmp_path / "export-database-export-report"),
+        }
+        assert jobs[1]["sheet"] == "Summary"
+        assert jobs[1]["output"] == str(tmp_path / "summary-report")
+
+    def test_run_batch(self, metadata_dataframe, tmp_path):
+        export = tmp_path / "export.xlsx"
+        metadata_dataframe.to_excel(export, sheet_name="Database Export", index=False)
+        manifest = tmp_path / "jobs.json"
+        manifest.write_text(
+            json.dumps(
+                [
+                    {"input": "export.xlsx", "date": "2024-07-29", "output": "a"},
+                    {"input": "export.xlsx", "sheet": "Missing", "output": "b"},
+                    {"input": "export.xlsx", "output": "c", "formats": ["json"]},
+                ]
+            )
+        )
+        summaries = run_batch(read_manifest(str(manifest)), max_workers=2)
+        assert [s["status"] for s in summaries] == ["ok", "failed", "ok"]
+        assert summaries[0]["studies"] == 3
+        assert summaries[0]["files"] == {"xlsx": [str(tmp_path / "a.xlsx")]}
+        assert (tmp_path / "c.json").exists()
+        assert summaries[0]["total_seconds"] >= summaries[0]["read_seconds"]
+
+    def test_workbook_shared_by_jobs(self, metadata_dataframe, tmp_path):
+        export = tmp_path / "export.xlsx"
+        with pd.ExcelWriter(export) as writer:
+            metadata_dataframe.to_excel(writer, sheet_name="First", index=False)
+            second = metadata_dataframe.iloc[:2]
+            second.to_excel(writer, sheet_name="Second", index=False)
+        batch.init_worker()
+        summaries = [
+            run_job(
+                {"input": str(export), "sheet": sheet, "output": str(tmp_path / sheet)},
+                ["json"],
+            )
+            for sheet in ["First", "Second"]
+        ]
+        assert [s["studies"] for s in summaries] == [3, 2]
+        workbooks = batch._WORKER_STATE["workbooks"]
+        assert [input_file for input_file, _ in workbooks] == [str(export)]
+
+    def test_rejects_unknown_format(self, tmp_path, monkeypatch, capsys):
+        manifest = tmp_path / "jobs.json"
+        manifest.write_text("[]")
+        monkeypatch.setattr(sys, "argv", ["batch", str(manifest), "-f", "xslx"])
+        with pytest.raises(SystemExit) as exit_info:
+            batch.batch_cli()
+        assert exit_info.value.code == 2
+        assert "invalid choice: 'xslx'" in capsys.readouterr().err
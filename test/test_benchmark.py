@@ -0,0 +1,79 @@
+import pandas as pd
+import pytest
+
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.keywords import Keyword
+from radx_reporter.benchmark import (
+    STAGES,
+    compare_cli,
+    compare_results,
+    parse_thresholds,
+    run_benchmarks,
+)
+from radx_reporter.synthetic import generate_metadata
+
+
+class TestSynthetic:
+
+    def test_generate_metadata(self):
+        dataframe = generate_metadata(500, seed=1)
+        assert len(dataframe) == 500
+        assert {kw.value for kw in Keyword} <= set(dataframe.columns)
+        assert dataframe["STUDY PHS"].is_unique
+        pd.testing.assert_frame_equal(dataframe, generate_metadata(500, seed=1))
+
+        studies = BasicParser().parse_metadata_dataframe(dataframe, [])
+        approved = (dataframe["STUDY STATUS"] == "Approved").sum()
+        assert len(studies) == approved
+        assert any(study.study_domains for study in studies.values())
+
+
+class TestBenchmark:
+
+    def test_run_benchmarks(self):
+        results = run_benchmarks(sizes=[50], memory=True, repeat=3)
+        assert [r["stage"] for r in results["results"]] == list(STAGES)
+        for result in results["results"]:
+            assert result["rows"] == 50
+            assert result["runs"] == 3
+            assert result["min_seconds"] <= result["seconds"] <= result["max_seconds"]
+            assert result["peak_bytes"] > 0
+
+    def test_compare_results(self):
+        baseline = {
+            "results": [
+                {"rows": 10, "stage": "parse", "items_per_second": 100.0},
+                {"rows": 10, "stage": "write", "peak_bytes": 1000},
+            ]
+        }
+        current = {
+            "results": [
+                {"rows": 10, "stage": "parse", "items_per_second": 80.0},
+                {"rows": 10, "stage": "write", "peak_bytes": 1500},
+                {"rows": 20, "stage": "write", "peak_bytes": 1},
+            ]
+        }
+        comparisons = compare_results(baseline, current)
+        assert [(c["stage"], c["regression"]) for c in comparisons] == [
+            ("parse", False),
+            ("write", True),
+        ]
+        thresholds = parse_thresholds(["items_per_second=0.1"])
+        assert compare_results(baseline, current, thresholds)[0]["regression"]
+
+    @pytest.mark.parametrize(
+        "threshold, message",
+        [
+            ("items_per_second=abc", "is not a number"),
+            ("items_per_second", "not of the form metric=value"),
+            ("latency=0.1", "Unknown metric latency"),
+        ],
+    )
+    def test_invalid_threshold(self, threshold, message, monkeypatch, capsys):
+        monkeypatch.setattr(
+            "sys.argv", ["compare", "base.json", "current.json", "-t", threshold]
+        )
+        with pytest.raises(SystemExit) as exit_info:
+            compare_cli()
+        assert exit_info.value.code == 2
+        assert message in capsys.readouterr().err
@@ -0,0 +1,87 @@
+import subprocess
+import sys
+
+import pytest
+
+from radx_reporter import cli, reporter
+from radx_reporter.basic import emitters
+
+HEAVY_MODULES = ["pandas", "numpy", "dateutil", "radx_reporter.basic.vocabulary"]
+# seconds to import the entry point; importing pandas alone takes several
+# times as long
+IMPORT_BUDGET = 0.1
+
+
+def run_python(code, *options):
+    return subprocess.run(
+        [sys.executable, *options, "-c", code],
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+
+
+def import_time(module):
+    """Cumulative seconds to import module, as reported by -X importtime."""
+    output = run_python(f"import {module}", "-X", "importtime").stderr
+    for line in output.splitlines():
+        # import time: self [us] | cumulative | imported package
+        _, cumulative, name = line.split("|")
+        if name.strip() == module:
+            return int(cumulative) / 1e6
+    raise AssertionError(f"{module} was not imported")
+
+
+class TestCli:
+
+    def test_formats_match_emitters(self):
+        assert cli.FORMATS == emitters.FORMATS
+
+    def test_help_imports_no_heavy_modules(self):
+        # import budget: argument parsing must not load pandas or the vocabulary
+        code = (
+            "import sys\n"
+            "from radx_reporter import cli\n"
+            "sys.argv = ['radx-study-metadata-reporter', '--help']\n"
+            "try:\n"
+            "    cli.study_metadata_cli()\n"
+            "except SystemExit:\n"
+            "    pass\n"
+            f"print([m for m in {HEAVY_MODULES!r} if m in sys.modules])\n"
+        )
+        output = run_python(code).stdout
+        assert "--profile-json" in output
+        assert output.strip().endswith("[]")
+
+    def test_import_budget(self):
+        # best of a few runs, so a busy machine does not fail the test
+        seconds = min(import_time("radx_reporter.cli") for _ in range(3))
+        assert seconds < IMPORT_BUDGET
+
+    def test_rejects_missing_input(self, tmp_path, monkeypatch, capsys):
+        missing = str(tmp_path / "missing.xlsx")
+        monkeypatch.setattr(sys, "argv", ["radx-study-metadata-reporter", "-i", missing])
+        with pytest.raises(SystemExit):
+            cli.study_metadata_cli()
+        assert "is not a file" in capsys.readouterr().err
+
+    def test_rejects_watch_options(self, tmp_path, monkeypatch, capsys):
+        argv = ["radx-study-metadata-reporter", "-i", str(tmp_path), "--watch"]
+        for option in [["--profile-json", "profile.json"], ["--cache-dir", "cache"]]:
+            monkeypatch.setattr(sys, "argv", argv + option)
+            with pytest.raises(SystemExit):
+                cli.study_metadata_cli()
+            assert "cannot be combined" in capsys.readouterr().err
+
+    def test_report_skips_ontology(self, metadata_dataframe, tmp_path, monkeypatch):
+        export = tmp_path / "export.xlsx"
+        metadata_dataframe.to_excel(export, sheet_name="Database Export", index=False)
+
+        def load_content_ontology():
+            raise AssertionError("the basic report does not use the ontology")
+
+        monkeypatch.setattr(reporter, "load_content_ontology", load_content_ontology)
+        argv = ["radx-study-metadata-reporter", "-i", str(export)]
+        monkeypatch.setattr(sys, "argv", argv + ["-o", str(tmp_path / "report")])
+        cli.study_metadata_cli()
+        assert (tmp_path / "report.xlsx").exists()
@@ -0,0 +1,67 @@
+import sqlite3
+import sys
+
+import pytest
+
+from radx_reporter.basic.db_source import prefetch_chunks, read_query_chunks
+from radx_reporter.cli import study_metadata_cli
+from radx_reporter.reporter import Reporter
+
+QUERY = 'SELECT * FROM metadata ORDER BY "STUDY PHS"'
+
+
+@pytest.fixture
+def database(metadata_dataframe, tmp_path):
+    path = str(tmp_path / "metadata.db")
+    connection = sqlite3.connect(path)
+    metadata_dataframe.astype(str).to_sql("metadata", connection, index=False)
+    connection.close()
+    return path
+
+
+class TestDbSource:
+
+    @pytest.mark.parametrize("prefetch", [0, 2])
+    def test_read_query_chunks(self, database, prefetch):
+        connection = sqlite3.connect(database, check_same_thread=False)
+        chunks = read_query_chunks(connection, QUERY, chunk_size=3, prefetch=prefetch)
+        chunks = list(chunks)
+        assert [len(chunk) for chunk in chunks] == [3, 1]
+        assert chunks[1]["STUDY PHS"].tolist() == ["phs000004"]
+
+    def test_connection_factory(self, database):
+        connect = lambda: sqlite3.connect(database)
+        chunks = read_query_chunks(connect, QUERY, chunk_size=2)
+        assert sum(len(chunk) for chunk in chunks) == 4
+
+    def test_prefetch_errors(self):
+        def failing():
+            yield 1
+            raise ValueError("lost connection")
+
+        chunks = prefetch_chunks(failing())
+        assert next(chunks) == 1
+        with pytest.raises(ValueError, match="lost connection"):
+            next(chunks)
+
+    def test_report_matches_dataframe(self, database, metadata_dataframe):
+        connection = sqlite3.connect(database, check_same_thread=False)
+        report = Reporter.build_basic_report_from_query(
+            connection,
+            QUERY,
+            additional_properties=["FOA NUMBER"],
+            date="2024-07-29",
+            chunk_size=1,
+        )
+        expected = Reporter.build_basic_report(
+            metadata_dataframe.astype(str), ["FOA NUMBER"], date="2024-07-29"
+        )
+        assert report.to_dict() == expected.to_dict()
+
+    def test_cli_query(self, database, tmp_path, monkeypatch):
+        output = tmp_path / "report"
+        argv = ["radx-study-metadata-reporter", "-i", database, "-q", QUERY]
+        argv += ["-o", str(output), "-f", "json"]
+        monkeypatch.setattr(sys, "argv", argv)
+        study_metadata_cli()
+        assert (tmp_path / "report.json").exists()
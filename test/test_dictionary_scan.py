@@ -0,0 +1,59 @@
+import pytest
+
+from radx_reporter.basic.dictionary_scan import (
+    build_variable_lookup,
+    discover_bundles,
+    scan_dictionaries,
+)
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    first = tmp_path / "phs000001" / "v1"
+    first.mkdir(parents=True)
+    (first / "rad_001_DICT.csv").write_text(
+        "Id,Label,Datatype\nnih_high_temp,Fever,integer\nstudy_site,Site,string\n"
+    )
+    (first / "rad_001_DATA.csv").write_text("nih_high_temp\n1\n")
+    second = tmp_path / "phs000002"
+    second.mkdir()
+    (second / "up_002_dict.csv").write_text(
+        "Variable / Field Name,Field Label\n"
+        "NIH_HIGH_TEMP,Fever\n"
+        "Profuse Perspiration,Sweat\n"
+    )
+    (tmp_path / "notes.txt").write_text("")
+    return tmp_path
+
+
+class TestDictionaryScan:
+
+    def test_discover_bundles(self, bundles):
+        found = discover_bundles(str(bundles))
+        assert [study for study, _ in found] == ["phs000001", "phs000002"]
+        bundle = found[0][1]
+        assert [d.file_name for d in bundle.dictionary] == [
+            str(bundles / "phs000001" / "v1" / "rad_001_DICT.csv")
+        ]
+        assert len(bundle.data_file) == 1
+
+    def test_variable_lookup(self, gcbo_ontology):
+        lookup = build_variable_lookup(gcbo_ontology)
+        assert lookup["nih_high_temp"] == "bmir-radx:nih_high_temp"
+        assert lookup["profuse perspiration"] == "bmir-radx:nih_sweating"
+        # altLabel of two RADx data elements
+        assert "pyrexia" not in lookup
+        assert "nih_cough_value" not in lookup
+
+    @pytest.mark.parametrize("max_workers", [1, 2])
+    def test_scan_dictionaries(self, bundles, gcbo_ontology, max_workers):
+        counts = scan_dictionaries(str(bundles), gcbo_ontology, max_workers=max_workers)
+        rows = counts.set_index("Element")
+        fever = rows.loc["bmir-radx:nih_high_temp"]
+        assert fever["Direct Studies"] == 2
+        assert fever["PHS IDs"] == "phs000001; phs000002"
+        symptoms = rows.loc["bmir-radx:SymptomDataElement"]
+        assert symptoms["Direct Studies"] == 0
+        assert symptoms["Studies"] == 2
+        assert rows.loc["bmir-radx:nih_sweating", "PHS IDs"] == "phs000002"
+        assert counts["Studies"].is_monotonic_decreasing
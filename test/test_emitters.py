@@ -0,0 +1,56 @@
+import datetime
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from radx_reporter.basic import emitters
+
+
+class TestEmitters:
+
+    def test_counts_table(self, report_inputs):
+        _, counts_by_classifier = report_inputs
+        counts = emitters.counts_table(counts_by_classifier)
+        program = counts[counts["Classifier"] == "Program"]
+        assert program["Label"].tolist() == ["RADx-UP", "RADx-rad"]
+        assert program["URL"].str.startswith("https://radxdatahub").all()
+        assert program["Count"].tolist() == [2, 1]
+
+    def test_emit_all_formats(self, report_inputs, tmp_path):
+        study_labels, counts_by_classifier = report_inputs
+        formats = ["xlsx", "json", "jsonl", "csv"]
+        base_name = str(tmp_path / "report")
+        written = emitters.emit_report(
+            study_labels, counts_by_classifier, base_name, formats, date="2024-07-29"
+        )
+        assert list(written) == formats
+        for file_names in written.values():
+            assert all(os.path.exists(file_name) for file_name in file_names)
+
+        with open(base_name + ".json") as f:
+            document = json.load(f)
+        assert document["date"] == "2024-07-29"
+        assert document["counts"]["Program"][0]["studies"] == ["phs000001", "phs000003"]
+        assert [row["phs"] for row in document["labels"]] == study_labels["phs"].tolist()
+
+        labels = pd.read_csv(base_name + "-labels.csv")
+        assert labels["phs"].tolist() == study_labels["phs"].tolist()
+        counts = pd.read_json(base_name + "-counts.jsonl", lines=True)
+        assert len(counts) == sum(len(c) for c in counts_by_classifier.values())
+
+    def test_json_date(self, report_inputs, tmp_path):
+        study_labels, counts_by_classifier = report_inputs
+        file_name = str(tmp_path / "report.json")
+        counts = emitters.counts_table(counts_by_classifier)
+        emitters.write_json(file_name, study_labels, counts, datetime.date(2024, 7, 29))
+        with open(file_name) as f:
+            assert json.load(f)["date"] == "2024-07-29"
+
+    def test_unknown_format(self, report_inputs, tmp_path):
+        study_labels, counts_by_classifier = report_inputs
+        with pytest.raises(ValueError):
+            emitters.emit_report(
+                study_labels, counts_by_classifier, str(tmp_path / "r"), ["docx"]
+            )
@@ -0,0 +1,105 @@
+import itertools
+
+import pytest
+
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.fuzzy import BKTree, FuzzyMatcher, edit_distance
+from radx_reporter.basic.vocabulary import (
+    FOCUS_POPULATIONS,
+    STUDY_DOMAINS,
+    FocusPopulation,
+    StudyDomain,
+)
+from radx_reporter.reporter import Reporter
+
+
+def reference_distance(a, b):
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            substitution = previous[j - 1] + (char_a != char_b)
+            current.append(min(previous[j] + 1, current[j - 1] + 1, substitution))
+        previous = current
+    return previous[-1]
+
+
+class TestFuzzy:
+
+    @pytest.fixture
+    def misspelled(self, metadata_dataframe):
+        metadata = metadata_dataframe.copy()
+        metadata.loc[0, "STUDY DOMAIN"] = "Vaccination Rate/Uptake; Seroprevelance"
+        metadata.loc[2, "STUDY POPULATION FOCUS"] = "Chidren, Rural Comunities"
+        return metadata
+
+    def test_edit_distance(self):
+        words = ["", "a", "ab", "ba", "kitten", "sitting", "seroprevalence", "aaaa"]
+        for a, b in itertools.product(words, repeat=2):
+            assert edit_distance(a, b) == reference_distance(a, b)
+        assert edit_distance("seroprevelance", "seroprevalence") == 2
+
+    def test_bk_tree(self):
+        words = ["mentalhealth", "aging", "cancer", "asian", "adults", "children"]
+        tree = BKTree((word, word.upper()) for word in words)
+        assert len(tree) == len(words)
+        assert tree.search("cancr", 1) == [(1, "cancer", ["CANCER"])]
+        for query in ["agin", "childre", "asain"]:
+            found = tree.search(query, 2)
+            expected = sorted(
+                (reference_distance(query, word), word)
+                for word in words
+                if reference_distance(query, word) <= 2
+            )
+            assert [match[:2] for match in found] == expected
+
+    def test_recover(self):
+        matcher = FuzzyMatcher(STUDY_DOMAINS, max_distance=2)
+        assert matcher.recover("Mental Helth; Long COVID", [StudyDomain.LONGCOVID]) == [
+            ("Mental Helth", StudyDomain.MENTALHEALTH, 1)
+        ]
+        # short words may not differ at all
+        assert matcher.recover("Agin", []) == []
+        # the closest, longest reading wins over a shorter label inside it
+        text = "Multisystem Inflammatory Syndrome in Chldren (MIS-C)"
+        assert matcher.recover(text, []) == [(text, StudyDomain.MISC, 1)]
+        populations = FuzzyMatcher(FOCUS_POPULATIONS)
+        assert populations.recover("Unknwn", []) == []
+
+    def test_bounded_caches(self):
+        matcher = FuzzyMatcher(STUDY_DOMAINS, cache_size=2)
+        for text in ["Cancr", "Mental Helth", "Seroprevelance", "Diabetis"]:
+            assert len(matcher.recover(text, [])) == 1
+        for cache in [matcher.search, matcher.segment_matches, matcher.recover_text]:
+            assert cache.cache_info().currsize <= 2
+        assert matcher.recover("Cancr", []) == [("Cancr", StudyDomain.CANCER, 1)]
+
+    def test_parser(self, misspelled):
+        studies = BasicParser().parse_metadata_dataframe(misspelled, [])
+        assert studies["phs000001"].study_domains == [StudyDomain.VACCINATIONRATE]
+
+        parser = BasicParser(fuzzy_distance=2)
+        studies = parser.parse_metadata_dataframe(misspelled, [])
+        assert studies["phs000001"].study_domains == [
+            StudyDomain.SEROPREVALENCE,
+            StudyDomain.VACCINATIONRATE,
+        ]
+        assert studies["phs000003"].focus_populations == [
+            FocusPopulation.CHILDREN,
+            FocusPopulation.RURAL,
+        ]
+        assert studies["phs000002"].study_domains == [StudyDomain.WASTEWATER]
+        table = parser.fuzzy_match_table()
+        assert table[["phs_id", "term", "distance"]].values.tolist() == [
+            ["phs000001", "Seroprevalence", 2],
+            ["phs000003", "Children", 1],
+            ["phs000003", "Rural Communities", 1],
+        ]
+
+    def test_report_metadata(self, misspelled):
+        report = Reporter.build_basic_report(misspelled, fuzzy_distance=1)
+        assert [match["text"] for match in report.metadata["fuzzy_matches"]] == [
+            "Chidren",
+            "Rural Comunities",
+        ]
+        assert "fuzzy_matches" not in Reporter.build_basic_report(misspelled).metadata
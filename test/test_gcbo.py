@@ -0,0 +1,56 @@
+import numpy as np
+import pandas as pd
+
+from radx_reporter.basic import gcbo
+
+
+class TestGCBO:
+
+    def test_find_element(self, gcbo_ontology):
+        element = gcbo_ontology.find_element("nih_high_temp")
+        assert element is gcbo_ontology.element_nodes["bmir-radx:nih_high_temp"]
+        assert gcbo_ontology.find_element("not_an_element") is None
+
+    def test_decode_values(self, gcbo_ontology):
+        values = gcbo_ontology.element_nodes["bmir-radx:nih_insurance"].values
+        codes = sorted(values)
+        dataframe = pd.DataFrame(
+            {
+                "nih_insurance": [codes[0], codes[-1], None, 12345, "junk"],
+                "participant": [1, 2, 3, 4, 5],
+            }
+        )
+        decoded = gcbo_ontology.decode_values(dataframe)
+        labels = decoded["nih_insurance"].tolist()
+        assert labels[0] == values[codes[0]].value
+        assert labels[1] == values[codes[-1]].value
+        assert all(pd.isna(label) for label in labels[2:])
+        assert isinstance(decoded["nih_insurance"].dtype, pd.CategoricalDtype)
+        assert decoded["participant"].tolist() == [1, 2, 3, 4, 5]
+
+    def test_sparse_codes_match_dense(self, gcbo_ontology):
+        element = gcbo_ontology.element_nodes["bmir-radx:nih_insurance"]
+        dense = gcbo.ValueDecoder(element)
+        sparse = gcbo.ValueDecoder(element)
+        sparse.lookup = None
+        raw = np.array(sorted(element.values) + [-1, 2.5, np.nan])
+        assert dense.decode_codes(raw).tolist() == sparse.decode_codes(raw).tolist()
+
+    def test_search_labels(self, gcbo_ontology):
+        candidates = gcbo_ontology.search_labels("nih high temp")
+        element = gcbo_ontology.element_nodes["bmir-radx:nih_high_temp"]
+        assert candidates[0][0] is element
+        scores = [score for _, score, _ in candidates]
+        assert scores == sorted(scores, reverse=True)
+
+    def test_search_alt_labels(self, gcbo_ontology):
+        candidates = gcbo_ontology.search_labels("Pyrexia")
+        # several elements have the alt label; ties are ranked by name
+        exact = [node.name for node, score, _ in candidates if score == 1.0]
+        assert exact == [
+            "bmir-radx:nih_fever_chills",
+            "bmir-radx:nih_high_temp",
+            "obo:SYMP_0000613",
+        ]
+        assert candidates[0][2] == "pyrexia"
+        assert gcbo_ontology.search_labels("") == []
@@ -0,0 +1,63 @@
+import pytest
+
+from radx_reporter.basic.hierarchy_index import HierarchyIndex
+
+
+class FakeNode:
+    def __init__(self, name):
+        self.name = name
+        self.children = set()
+
+    def __repr__(self):
+        return self.name
+
+
+class TestHierarchyIndex:
+
+    @pytest.fixture
+    def nodes(self):
+        # root -> a -> (c, d); root -> b -> d; d -> e
+        nodes = {name: FakeNode(name) for name in ["root", "a", "b", "c", "d", "e"]}
+        edges = [("root", "a"), ("root", "b"), ("a", "c"), ("a", "d"), ("b", "d"), ("d", "e")]
+        for parent, child in edges:
+            nodes[parent].children.add(nodes[child])
+        return nodes
+
+    def brute_force_descendants(self, node):
+        found = set()
+        frontier = [node]
+        while frontier:
+            for child in frontier.pop().children:
+                if child.name not in found:
+                    found.add(child.name)
+                    frontier.append(child)
+        return found
+
+    def test_matches_traversal(self, nodes):
+        index = HierarchyIndex(nodes["root"])
+        assert len(index) == len(nodes)
+        for ancestor in nodes.values():
+            expected = self.brute_force_descendants(ancestor)
+            assert {n.name for n in index.descendants(ancestor)} == expected
+            assert index.count_descendants(ancestor) == len(expected)
+            for node in nodes.values():
+                assert index.is_descendant(node, ancestor) == (node.name in expected)
+
+    def test_include_self(self, nodes):
+        index = HierarchyIndex(nodes["root"])
+        assert index.is_descendant(nodes["b"], nodes["b"], include_self=True)
+        assert not index.is_descendant(nodes["b"], nodes["b"])
+        assert nodes["b"] in index.descendants(nodes["b"], include_self=True)
+
+    def test_cycle(self, nodes):
+        nodes["e"].children.add(nodes["a"])
+        with pytest.raises(ValueError, match="a -> d -> e -> a"):
+            HierarchyIndex(nodes["root"])
+
+    def test_ontology_subsumption(self, content_ontology):
+        ontology = content_ontology
+        descendants = ontology.find_descendants("Study Design")
+        assert descendants
+        assert all(ontology.is_descendant(node.label, "Study Design") for node in descendants)
+        assert not ontology.is_descendant("Study Design", "Data Type")
+        assert ontology.root not in descendants
@@ -0,0 +1,67 @@
+import pandas as pd
+import pytest
+
+from radx_reporter.basic import classifier
+from radx_reporter.basic.basic_parser import BasicParser
+
+
+class TestLabels:
+
+    @pytest.fixture
+    def studies(self, metadata_dataframe):
+        return BasicParser().parse_metadata_dataframe(
+            metadata_dataframe, ["FOA NUMBER"]
+        )
+
+    def test_label_studies(self, studies):
+        study_labels = classifier.label_studies(studies)
+        assert study_labels.columns.tolist()[:10] == [
+            "phs",
+            "Program",
+            "Study Designs",
+            "Data Types",
+            "Collection Methods",
+            "NIH Institutes",
+            "Study Domains",
+            "Study Focus Populations",
+            "Population Range",
+            "Population Count",
+        ]
+        assert study_labels["Program"].tolist() == ["RADx-UP", "RADx-rad", "RADx-UP"]
+        assert study_labels["Study Designs"].iloc[1] == "Case-Control; Cross-Sectional"
+        assert study_labels["Foa Number"].tolist() == [
+            "RFA-OD-20-013",
+            "RFA-OD-20-015",
+            "RFA-OD-20-013",
+        ]
+
+    def test_categorical_labels(self, studies):
+        study_labels = classifier.label_studies(studies)
+        categorical = classifier.label_studies(studies, categorical=True)
+        assert isinstance(categorical["Program"].dtype, pd.CategoricalDtype)
+        assert list(categorical["Program"].cat.categories) == ["RADx-UP", "RADx-rad"]
+        pd.testing.assert_frame_equal(
+            categorical.astype(object), study_labels.astype(object)
+        )
+
+    def test_label_studies_long(self, studies):
+        long = classifier.label_studies_long(studies)
+        assert all(isinstance(dtype, pd.CategoricalDtype) for dtype in long.dtypes)
+        first = long[long["phs"] == "phs000001"]
+        assert first["classifier"].iloc[0] == "Program"
+        assert first["term"].iloc[0] == "RADx-UP"
+        designs = long[
+            (long["phs"] == "phs000002") & (long["classifier"] == "Study Design")
+        ]
+        assert designs["term"].tolist() == ["Case-Control", "Cross-Sectional"]
+        foa = long[long["classifier"] == "FOA NUMBER"]
+        assert foa["phs"].tolist() == ["phs000001", "phs000002", "phs000003"]
+        # every label of the wide table is a term of the long one
+        wide = classifier.label_studies(studies)
+        for column, label in [("Data Types", "Data Type"), ("Program", "Program")]:
+            joined = (
+                long[long["classifier"] == label]
+                .groupby("phs", observed=False)["term"]
+                .agg(lambda terms: "; ".join(terms))
+            )
+            assert joined.tolist() == wide[column].fillna("").tolist()
@@ -0,0 +1,64 @@
+import pandas as pd
+
+from radx_reporter.basic import matcher, meta_parser
+from radx_reporter.basic.vocabulary import DataType, FocusPopulation, StudyDesign
+
+
+class TestTermMatcher:
+
+    def test_matches_substring_search(self):
+        patterns = {"covid": {"a"}, "longcovid": {"b"}, "vid": {"c"}, "he": {"d"}}
+        term_matcher = matcher.TermMatcher(patterns)
+        for text in ["longcovidstudy", "covid", "hershe", "nothing", ""]:
+            expected = {
+                name
+                for pattern, names in patterns.items()
+                if pattern in text
+                for name in names
+            }
+            assert term_matcher.find(text) == expected
+
+    def test_compile_matchers(self, content_ontology, tmp_path):
+        vocabularies = meta_parser.CLASSIFIER_VOCABULARIES
+        matchers = matcher.compile_matchers(
+            content_ontology, vocabularies, cache_dir=str(tmp_path)
+        )
+        assert set(matchers) == set(vocabularies)
+        assert len(list(tmp_path.glob("matchers-*.pickle"))) == 1
+        assert matcher.compile_matchers(content_ontology, vocabularies) is matchers
+
+    def test_meta_parser_uses_ontology(self, content_ontology):
+        parser = meta_parser.MetaParser(content_ontology)
+        row = pd.Series({meta_parser.DATATYPES_KEYWORD: "Genomic; Proteomic"})
+        data_types = parser.parse_data_types(row)
+        assert data_types[:2] == [DataType.GENOMIC, DataType.PROTEOMIC]
+        assert all(
+            term.name in content_ontology.element_nodes for term in data_types[2:]
+        )
+
+    def test_matches_vocabulary_terms(self, content_ontology):
+        # every label and synonym matches the same terms as checking each
+        # vocabulary term in turn
+        parser = meta_parser.MetaParser(content_ontology)
+        for label, terms in meta_parser.CLASSIFIER_VOCABULARIES.items():
+            for term in terms:
+                for text in [term.label, *getattr(term, "synonyms", ())]:
+                    text = matcher.prepare_string_for_matching(text)
+                    expected = [t for t in terms if parser.has_match(t, text)]
+                    assert parser.match_terms(label, text, terms) == expected
+
+    def test_synonyms(self, content_ontology):
+        parser = meta_parser.MetaParser(content_ontology)
+        rows = {
+            meta_parser.DATATYPES_KEYWORD: "Immulogical; Enviornmental (Physical)",
+            meta_parser.DESIGN_KEYWORD: "Other",
+            meta_parser.FOCUS_POPULATION_KEYWORD: "Racial and Ethnic Minorities",
+        }
+        row = pd.Series(rows)
+        assert parser.parse_data_types(row)[:2] == [
+            DataType.ENVIRONMENTAL,
+            DataType.IMMUNOLOGICAL,
+        ]
+        assert parser.parse_study_designs(row)[0] == StudyDesign.OTHER
+        focus_populations = parser.parse_focus_populations(row)
+        assert focus_populations[0] == FocusPopulation.RACIALMINORITIES
@@ -0,0 +1,31 @@
+import pytest
+
+from radx_reporter.basic import classifier
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.parallel import parallel_map
+
+
+class TestParallel:
+
+    def test_parallel_map_keeps_order(self):
+        items = list(range(20))
+        for workers in [None, 1, 4]:
+            assert parallel_map(pow, items, [2] * 20, max_workers=workers) == [
+                i**2 for i in items
+            ]
+        with pytest.raises(ValueError):
+            parallel_map(pow, items, items, pool="fiber")
+
+    @pytest.mark.parametrize("pool", ["thread", "process"])
+    def test_parallel_reduce(self, metadata_dataframe, pool):
+        studies = BasicParser().parse_metadata_dataframe(
+            metadata_dataframe, ["FOA NUMBER"]
+        )
+        grouped = classifier.map_studies(studies)
+        serial = classifier.reduce_studies(grouped, len(studies))
+        parallel = classifier.reduce_studies(
+            grouped, len(studies), max_workers=2, pool=pool
+        )
+        assert list(parallel) == list(serial)
+        for label, counts in serial.items():
+            assert parallel[label].equals(counts)
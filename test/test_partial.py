@@ -0,0 +1,90 @@
+import pandas as pd
+import pytest
+
+from radx_reporter.basic import classifier
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.partial import PartialAggregate, merge_partials
+from radx_reporter.synthetic import generate_metadata
+
+
+def parse(dataframe, properties=()):
+    return BasicParser().parse_metadata_dataframe(dataframe, list(properties))
+
+
+def single_process_counts(dataframe, properties=()):
+    studies = parse(dataframe, properties)
+    return classifier.reduce_studies(classifier.map_studies(studies), len(studies))
+
+
+def shard_partials(dataframe, n_shards, properties=()):
+    size = -(-len(dataframe) // n_shards)
+    return [
+        PartialAggregate.from_studies(parse(dataframe[i : i + size], properties))
+        for i in range(0, len(dataframe), size)
+    ]
+
+
+def assert_same_counts(counts, expected):
+    assert list(counts) == list(expected)
+    for name, frame in expected.items():
+        pd.testing.assert_frame_equal(counts[name], frame)
+
+
+class TestPartialAggregate:
+
+    @pytest.mark.parametrize("n_shards", [1, 2, 4])
+    def test_merged_shards_match(self, metadata_dataframe, n_shards):
+        partials = shard_partials(metadata_dataframe, n_shards, ["FOA NUMBER"])
+        merged = merge_partials(partials)
+        expected = single_process_counts(metadata_dataframe, ["FOA NUMBER"])
+        assert_same_counts(merged.reduce(), expected)
+
+    def test_synthetic_shards_match(self):
+        dataframe = generate_metadata(600, seed=3)
+        merged = merge_partials(shard_partials(dataframe, 5))
+        assert_same_counts(merged.reduce(), single_process_counts(dataframe))
+
+    def test_merge_is_associative(self):
+        a, b, c = shard_partials(generate_metadata(300, seed=4), 3)
+        assert a.merge(b).merge(c) == a.merge(b.merge(c))
+
+    def test_serialization(self, metadata_dataframe):
+        (partial,) = shard_partials(metadata_dataframe, 1, ["FOA NUMBER"])
+        assert PartialAggregate.from_json(partial.to_json()) == partial
+
+    def test_conflicts(self, metadata_dataframe):
+        # phs000001 appears in both shards with a different program
+        edited = metadata_dataframe.copy()
+        edited.loc[3] = edited.loc[0]
+        edited.loc[3, "STUDY PROGRAM"] = "RADx-rad"
+        first, second = shard_partials(edited, 2)
+
+        expected = single_process_counts(edited)
+        assert_same_counts(first.merge(second).reduce(), expected)
+
+        kept = first.merge(second, on_conflict="first").reduce()["Program"]
+        assert kept["Count"].tolist() == [2, 1]
+        union = first.merge(second, on_conflict="union").reduce()["Program"]
+        assert union["Count"].sum() == 4
+        with pytest.raises(ValueError, match="phs000001"):
+            first.merge(second, on_conflict="error")
+
+    def test_property_without_values(self, metadata_dataframe):
+        # a requested property with no values gets an empty table
+        dataframe = metadata_dataframe.assign(EMPTY=float("nan"))
+        properties = ["EMPTY", "FOA NUMBER"]
+        merged = merge_partials(shard_partials(dataframe, 2, properties))
+        expected = single_process_counts(dataframe, properties)
+        assert expected["EMPTY"].empty
+        assert_same_counts(merged.reduce(), expected)
+
+    def test_property_order(self, metadata_dataframe):
+        # tables follow the requested properties, not the first value seen
+        dataframe = metadata_dataframe.assign(A=None, B="b")
+        dataframe.loc[dataframe.index[-1], "A"] = "a"
+        partials = shard_partials(dataframe, 2, ["A", "B"])
+        merged = merge_partials(partials)
+        assert list(merged.reduce())[-2:] == ["A", "B"]
+        assert_same_counts(merged.reduce(), single_process_counts(dataframe, "AB"))
+        restored = PartialAggregate.from_json(merged.to_json())
+        assert restored.properties == ["A", "B"]
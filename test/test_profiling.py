@@ -0,0 +1,57 @@
+import pstats
+import sys
+
+from radx_reporter.basic.profiling import StageProfiler
+from radx_reporter.reporter import Reporter, study_metadata_cli
+
+
+class TestProfiling:
+
+    def test_basic_report_profile(self, metadata_dataframe, tmp_path):
+        profiler = StageProfiler(trace_memory=True)
+        report = Reporter.basic_report(
+            metadata_dataframe,
+            report_name=str(tmp_path / "report"),
+            profiler=profiler,
+        )
+        profiler.close()
+        profile = report.metadata["profile"]
+        stages = {stage["stage"]: stage for stage in profile["stages"]}
+        assert list(stages) == ["parse", "map", "reduce", "label", "write"]
+        assert stages["parse"]["rows_in"] == 4
+        assert stages["parse"]["rows_out"] == 3
+        assert stages["parse"]["matcher_calls"] > 0
+        assert stages["label"]["rows_out"] == 3
+        assert stages["write"]["rows_out"] == 1
+        for stage in stages.values():
+            assert stage["wall_seconds"] >= 0
+            assert stage["peak_traced_bytes"] > 0
+        assert profile["wall_seconds"] >= stages["parse"]["wall_seconds"]
+
+    def test_without_profiler(self, metadata_dataframe):
+        report = Reporter.build_basic_report(metadata_dataframe)
+        assert "profile" not in report.metadata
+
+    def test_cli_profiles(self, metadata_dataframe, tmp_path, monkeypatch):
+        export = tmp_path / "export.xlsx"
+        metadata_dataframe.to_excel(export, sheet_name="Database Export", index=False)
+        profile_json = tmp_path / "profile.json"
+        cprofile = tmp_path / "report.prof"
+        monkeypatch.setattr(
+            sys,
+            "argv",
+            [
+                "radx-study-metadata-reporter",
+                "-i",
+                str(export),
+                "-o",
+                str(tmp_path / "report"),
+                "--profile-json",
+                str(profile_json),
+                "--cprofile",
+                str(cprofile),
+            ],
+        )
+        study_metadata_cli()
+        assert '"stage": "load"' in profile_json.read_text()
+        assert pstats.Stats(str(cprofile)).total_calls > 0
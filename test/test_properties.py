@@ -0,0 +1,77 @@
+import numpy as np
+import pytest
+
+from radx_reporter.basic import classifier
+from radx_reporter.basic.basic_parser import PROPERTY_CACHE_SIZE, BasicParser
+from radx_reporter.basic.partial import PartialAggregate
+from radx_reporter.basic.properties import PropertyCodes
+
+
+class TestProperties:
+
+    @pytest.fixture
+    def grants(self, metadata_dataframe):
+        metadata = metadata_dataframe.copy()
+        metadata["NIH GRANT NUMBER"] = ["R01; U01", "U01", None, "R21"]
+        return metadata
+
+    def test_property_codes(self):
+        codes = PropertyCodes.from_terms(
+            "GRANT", [("R01", "U01"), (), ("U01",), ("R21", "R01")]
+        )
+        assert len(codes) == 4
+        assert codes.categories.tolist() == ["R01", "U01", "R21"]
+        assert codes.counts().tolist() == [2, 2, 1]
+        groups = [rows.tolist() for rows in codes.groups()]
+        assert groups == [[0, 3], [0, 2], [3]]
+        np.testing.assert_array_equal(codes.rows(), [0, 0, 2, 3, 3])
+
+    def test_split_property(self):
+        parser = BasicParser(property_delimiters={"NIH GRANT NUMBER": ";"})
+        assert parser.split_property("NIH GRANT NUMBER", "R01; U01;R01 ;") == (
+            "R01",
+            "U01",
+        )
+        assert parser.split_property("FOA NUMBER", "RFA; 1") == ("RFA; 1",)
+        assert parser.split_property("FOA NUMBER", None) == ()
+        assert parser.split_property("FOA NUMBER", float("nan")) == ()
+        assert parser.split_property("FOA NUMBER", 7) == (7,)
+        # terms of equal values are shared
+        first = parser.split_property("NIH GRANT NUMBER", "R01; U01")
+        assert parser.split_property("NIH GRANT NUMBER", "R01; U01") is first
+
+    def test_property_terms_bounded(self, grants):
+        parser = BasicParser(property_delimiters=";")
+        assert parser.property_terms.cache_info().maxsize == PROPERTY_CACHE_SIZE
+        parser.parse_metadata_dataframe(grants, ["NIH GRANT NUMBER"])
+        assert parser.property_terms.cache_info().currsize == 2
+        # the terms of an earlier input are not kept by the next parse
+        parser.parse_metadata_dataframe(grants.iloc[:1], ["NIH GRANT NUMBER"])
+        assert parser.property_terms.cache_info().currsize == 1
+
+    def test_grouping_by_term(self, grants):
+        parser = BasicParser(property_delimiters=";")
+        studies = parser.parse_metadata_dataframe(grants, ["NIH GRANT NUMBER"])
+        counts = classifier.reduce_studies(classifier.map_studies(studies), 3)
+        grant_counts = counts["NIH GRANT NUMBER"]
+        assert grant_counts["NIH GRANT NUMBER"].tolist() == ["U01", "R01"]
+        assert grant_counts["Count"].tolist() == [2, 1]
+        assert grant_counts["PHS IDs"].tolist() == ["phs000001; phs000002", "phs000001"]
+        assert PartialAggregate.from_studies(studies).reduce()[
+            "NIH GRANT NUMBER"
+        ].equals(grant_counts)
+
+        labels = classifier.label_studies(studies)
+        assert labels["Nih Grant Number"].tolist()[:2] == ["R01; U01", "U01"]
+        long = classifier.label_studies_long(studies)
+        grant_terms = long[long["classifier"] == "NIH GRANT NUMBER"]
+        assert grant_terms["term"].tolist() == ["R01", "U01", "U01"]
+
+    def test_unsplit_values(self, grants):
+        studies = BasicParser().parse_metadata_dataframe(grants, ["NIH GRANT NUMBER"])
+        counts = classifier.reduce_studies(classifier.map_studies(studies), 3)
+        # missing values are not counted as a label
+        assert counts["NIH GRANT NUMBER"]["NIH GRANT NUMBER"].tolist() == [
+            "R01; U01",
+            "U01",
+        ]
@@ -0,0 +1,54 @@
+import io
+import json
+
+import openpyxl
+
+from radx_reporter.reporter import Reporter
+
+
+class TestReport:
+
+    def test_build_basic_report(self, metadata_dataframe, tmp_path, monkeypatch):
+        monkeypatch.chdir(tmp_path)
+        report = Reporter.build_basic_report(
+            metadata_dataframe, ["FOA NUMBER"], date="2024-07-29"
+        )
+        assert report.metadata["n_studies"] == 3
+        frames = report.to_frames()
+        assert frames["Labels"]["phs"].tolist() == [
+            "phs000001",
+            "phs000002",
+            "phs000003",
+        ]
+        assert frames["Program"]["Count"].tolist() == [2, 1]
+        assert "FOA NUMBER" in frames
+        assert list(tmp_path.iterdir()) == []
+
+    def test_serialize_in_memory(self, metadata_dataframe):
+        report = Reporter.build_basic_report(metadata_dataframe, date="2024-07-29")
+        document = json.loads(report.to_json())
+        assert document["date"] == "2024-07-29"
+        assert document["counts"]["Program"][0]["count"] == 2
+
+        workbook = openpyxl.load_workbook(io.BytesIO(report.to_xlsx()))
+        assert workbook["Info"]["B3"].value == "Current as of 2024-07-29"
+
+    def test_basic_report_returns_report(self, metadata_dataframe, tmp_path):
+        report_name = str(tmp_path / "report")
+        report = Reporter.basic_report(
+            metadata_dataframe, report_name=report_name, formats=["xlsx", "json"]
+        )
+        assert (tmp_path / "report.xlsx").exists()
+        assert (tmp_path / "report.json").exists()
+        assert report.counts_by_classifier["Program"]["Count"].sum() == 3
+
+    def test_in_memory_workbook_matches_file(self, metadata_dataframe, tmp_path):
+        report_name = str(tmp_path / "report")
+        report = Reporter.basic_report(
+            metadata_dataframe, ["FOA NUMBER"], report_name, date="2024-07-29"
+        )
+        written = openpyxl.load_workbook(f"{report_name}.xlsx")
+        in_memory = openpyxl.load_workbook(io.BytesIO(report.to_xlsx()))
+        assert in_memory.sheetnames == written.sheetnames
+        for name in written.sheetnames:
+            assert list(in_memory[name].values) == list(written[name].values)
@@ -0,0 +1,68 @@
+import os
+
+import pytest
+
+from radx_reporter.basic import report_cache
+from radx_reporter.reporter import Reporter
+
+
+class TestReportCache:
+
+    def test_hash_dataframe(self, metadata_dataframe):
+        digest = report_cache.hash_dataframe(metadata_dataframe)
+        assert digest == report_cache.hash_dataframe(metadata_dataframe.copy())
+        changed = metadata_dataframe.copy()
+        changed.loc[0, "STUDY PROGRAM"] = "RADx-rad"
+        assert digest != report_cache.hash_dataframe(changed)
+
+    def test_source_version(self, tmp_path, monkeypatch):
+        names = {os.path.basename(path) for path in report_cache.source_files()}
+        modules = {"basic_parser.py", "classifier.py", "matcher.py", "vocabulary.py"}
+        assert modules | {"reporter.py", "labels.tsv"} <= names
+
+        # editing the parsing code invalidates cached reports
+        module = tmp_path / "basic_parser.py"
+        module.write_text("SPLIT = ';'\n")
+        monkeypatch.setattr(report_cache, "source_files", lambda: [str(module)])
+        report_cache.source_version.cache_clear()
+        version = report_cache.source_version()
+        module.write_text("SPLIT = ','\n")
+        report_cache.source_version.cache_clear()
+        try:
+            assert report_cache.source_version() != version
+        finally:
+            report_cache.source_version.cache_clear()
+
+    def test_cached_report(self, metadata_dataframe, tmp_path, monkeypatch):
+        cache = report_cache.ReportCache(str(tmp_path / "cache"))
+        kwargs = {"date": "2024-07-29", "formats": ["xlsx", "csv"]}
+        first = Reporter.cached_basic_report(
+            metadata_dataframe, cache, report_name=str(tmp_path / "a"), **kwargs
+        )
+
+        def fail(*args, **kwargs):
+            raise AssertionError("cache hit should not parse the input")
+
+        monkeypatch.setattr(Reporter, "build_basic_report", fail)
+        second = Reporter.cached_basic_report(
+            metadata_dataframe, cache, report_name=str(tmp_path / "b"), **kwargs
+        )
+        assert set(first) == set(second) == {"xlsx", "csv"}
+        for file_a, file_b in zip(first["csv"], second["csv"]):
+            with open(file_a) as a, open(file_b) as b:
+                assert a.read() == b.read()
+
+    def test_lru_eviction(self, tmp_path):
+        cache = report_cache.ReportCache(str(tmp_path / "cache"), max_bytes=2500)
+        for i, key in enumerate(["k1", "k2", "k3"]):
+            file_name = str(tmp_path / f"{key}.json")
+            with open(file_name, "w") as f:
+                f.write("x" * 1000)
+            cache.put(key, str(tmp_path / key), {"json": [file_name]})
+            os.utime(os.path.join(cache.entry_dir(key), report_cache.MANIFEST), (i, i))
+            if key == "k2":
+                # touch k1 so that k2 becomes the least recently used entry
+                assert cache.get("k1") is not None
+        assert cache.get("k2") is None
+        assert cache.get("k1") is not None
+        assert cache.get("k3") is not None
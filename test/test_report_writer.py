@@ -0,0 +1,81 @@
+import openpyxl
+import pytest
+
+from radx_reporter.basic import classifier, report_writer
+from radx_reporter.basic.basic_parser import BasicParser
+
+
+class TestReportWriter:
+
+    @pytest.mark.parametrize("constant_memory", [False, True])
+    def test_dump_report_spreadsheet(self, report_inputs, tmp_path, constant_memory):
+        study_labels, counts = report_inputs
+        file_name = str(tmp_path / "report.xlsx")
+        report_writer.dump_report_spreadsheet(
+            study_labels,
+            counts,
+            file_name,
+            date="2024-07-29",
+            constant_memory=constant_memory,
+        )
+        workbook = openpyxl.load_workbook(file_name)
+        assert workbook["Info"]["B3"].value == "Current as of 2024-07-29"
+
+        labels = list(workbook["Labels"].values)
+        assert list(labels[0]) == study_labels.columns.tolist()
+        assert [row[0] for row in labels[1:]] == study_labels["phs"].tolist()
+
+        program = list(workbook["Program"].values)
+        assert program[0][:3] == ("Program", "Count", "Percentage")
+        assert program[1][0].startswith("=HYPERLINK")
+        assert program[1][1] == 2
+        assert program[1][2] == pytest.approx(2 / 3)
+        assert workbook["Program"].cell(2, 3).number_format == "0.00%"
+
+    def test_chart_data(self, report_inputs, tmp_path):
+        study_labels, counts = report_inputs
+        file_name = str(tmp_path / "report.xlsx")
+        report_writer.dump_report_spreadsheet(
+            study_labels, counts, file_name, label_limit=1
+        )
+        workbook = openpyxl.load_workbook(file_name)
+        hidden = list(workbook["hiddenProgram"].values)
+        assert hidden[0] == ("Program", "Count")
+        assert hidden[1][0].startswith("=HYPERLINK")
+        assert hidden[1][0].endswith('"RADx-UP")')
+        assert hidden[1][1] == 2
+        # additional properties are not coded and get no chart
+        assert "hiddenFOA NUMBER" not in workbook.sheetnames
+
+    def test_top_counts(self, metadata_dataframe):
+        studies = BasicParser().parse_metadata_dataframe(
+            metadata_dataframe, ["FOA NUMBER"]
+        )
+        studies_by_classifier = classifier.map_studies(studies)
+        counts = classifier.reduce_studies(studies_by_classifier, len(studies))
+        for k in [1, 2, 10]:
+            top = classifier.top_label_counts(studies_by_classifier, k)
+            for classifier_label, table in counts.items():
+                coded = table[table["Coded Term"] == True].head(k)
+                expected = list(zip(coded.iloc[:, 0], coded["Count"]))
+                assert top[classifier_label] == expected
+                assert classifier.top_table_counts(table, k) == expected
+        top = classifier.top_label_counts(studies_by_classifier, 1, coded_only=False)
+        assert top["FOA NUMBER"] == [("RFA-OD-20-013", 2)]
+
+    @pytest.mark.parametrize("pool", ["thread", "process"])
+    def test_parallel_sheets(self, report_inputs, tmp_path, pool):
+        study_labels, counts = report_inputs
+        workbooks = []
+        for name, workers in [("serial.xlsx", None), ("parallel.xlsx", 2)]:
+            file_name = str(tmp_path / name)
+            report_writer.dump_report_spreadsheet(
+                study_labels, counts, file_name, max_workers=workers, pool=pool
+            )
+            workbooks.append(openpyxl.load_workbook(file_name))
+        serial, parallel = workbooks
+        assert parallel.sheetnames == serial.sheetnames
+        for sheet_name in serial.sheetnames:
+            assert list(parallel[sheet_name].values) == list(
+                serial[sheet_name].values
+            )
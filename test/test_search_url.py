@@ -0,0 +1,94 @@
+import json
+import urllib.parse
+
+import pandas as pd
+import pytest
+
+from radx_reporter.basic import classifier
+from radx_reporter.basic.basic_parser import BasicParser
+from radx_reporter.basic.search_url import (
+    SEARCH_URL,
+    URL_CACHE_SIZE,
+    cached_facet_url,
+    combine_selections,
+    facet_url,
+    normalize_selection,
+    url_selection,
+)
+from radx_reporter.basic.vocabulary import Program, StudyDesign, generate_search_url
+
+
+def query(url):
+    assert url.startswith(SEARCH_URL)
+    return json.loads(urllib.parse.unquote(url[len(SEARCH_URL) :]))
+
+
+class TestSearchUrl:
+
+    @pytest.fixture
+    def studies(self, metadata_dataframe):
+        return BasicParser().parse_metadata_dataframe(
+            metadata_dataframe, ["FOA NUMBER"]
+        )
+
+    def test_single_facet(self):
+        assert Program.RAD.url == (
+            "https://radxdatahub.nih.gov/studyExplorer?&facets=%5B%7B%22name%22:"
+            "%22dcc%22,%22facets%22:%5B%22RADx-rad%22%5D%7D%5D"
+        )
+        assert generate_search_url("dcc", "RADx-rad") is Program.RAD.url
+        assert url_selection(Program.RAD.url) == (("dcc", ("RADx-rad",)),)
+
+    def test_multiple_facets(self):
+        selection = combine_selections(
+            url_selection(Program.RAD.url),
+            url_selection(Program.UP.url),
+            {"types_array": "Observational"},
+        )
+        assert query(facet_url(selection)) == [
+            {"name": "dcc", "facets": ["RADx-rad", "RADx-UP"]},
+            {"name": "types_array", "facets": ["Observational"]},
+        ]
+        assert facet_url({"dcc": ["RADx-rad", "RADx-UP"]}) == facet_url(
+            [("dcc", "RADx-rad"), ("dcc", "RADx-UP")]
+        )
+
+    def test_url_selection(self):
+        selection = normalize_selection(
+            {"foa_number": ["R&D \"1\"", "it's, <2>"], "dcc": "RADx-UP"}
+        )
+        assert url_selection(facet_url(selection)) == selection
+        assert url_selection("https://radxdatahub.nih.gov/") is None
+        assert url_selection(SEARCH_URL + "%5B%5D") is None
+        assert cached_facet_url.cache_info().maxsize == URL_CACHE_SIZE
+
+    def test_additional_property_links(self, studies):
+        counts = classifier.reduce_studies(classifier.map_studies(studies), 3)
+        linked = classifier.add_search_links(counts, {"FOA NUMBER": "foa_number"})
+        assert linked["Program"] is counts["Program"]
+        split = classifier.split_hyperlink_labels(linked["FOA NUMBER"].iloc[:, 0])
+        assert split["Label"].tolist() == ["RFA-OD-20-013", "RFA-OD-20-015"]
+        assert query(split["URL"].iloc[0]) == [
+            {"name": "foa_number", "facets": ["RFA-OD-20-013"]}
+        ]
+        plain = classifier.split_hyperlink_labels(counts["FOA NUMBER"].iloc[:, 0])
+        assert plain["URL"].isna().all()
+
+    def test_crosstab_urls(self, studies):
+        table = classifier.crosstab_studies(studies, "Program", "FOA NUMBER")
+        urls = classifier.crosstab_urls(table, {"FOA NUMBER": "foa_number"})
+        assert urls.shape == table.shape
+        assert query(urls.loc["RADx-UP", "RFA-OD-20-013"]) == [
+            {"name": "dcc", "facets": ["RADx-UP"]},
+            {"name": "foa_number", "facets": ["RFA-OD-20-013"]},
+        ]
+        assert classifier.crosstab_urls(table).isna().all().all()
+
+    def test_crosstab_urls_same_facet(self, studies):
+        table = classifier.crosstab_studies(studies, "Study Design", "Study Design")
+        urls = classifier.crosstab_urls(table)
+        cross, case = StudyDesign.CROSSSECTIONAL.label, StudyDesign.CASECONTROL.label
+        assert urls.loc[cross, cross] == StudyDesign.CROSSSECTIONAL.url
+        # the Data Hub cannot search for studies with both designs
+        assert pd.isna(urls.loc[cross, case])
+        assert table.loc[cross, case] == 1
@@ -0,0 +1,115 @@
+import io
+import json
+import threading
+import time
+import urllib.error
+import urllib.request
+
+import openpyxl
+import pytest
+
+from radx_reporter import service
+
+
+@pytest.fixture(scope="module")
+def report_service():
+    report_service = service.ReportService(max_workers=2, timeout=10)
+    yield report_service
+    report_service.shutdown()
+
+
+@pytest.fixture
+def server_url(report_service):
+    server = service.make_server(report_service)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    host, port = server.server_address[:2]
+    yield f"http://{host}:{port}"
+    server.shutdown()
+    server.server_close()
+
+
+def post(url, payload, content_type="application/json"):
+    if content_type == "application/json":
+        payload = json.dumps(payload).encode("utf-8")
+    request = urllib.request.Request(
+        url, data=payload, headers={"Content-Type": content_type}, method="POST"
+    )
+    with urllib.request.urlopen(request) as response:
+        return response.status, response.read()
+
+
+class TestReportService:
+
+    @pytest.fixture
+    def metadata_file(self, metadata_dataframe, tmp_path):
+        file_name = str(tmp_path / "metadata.xlsx")
+        metadata_dataframe.to_excel(file_name, sheet_name="Database Export", index=False)
+        return file_name
+
+    def test_health(self, server_url):
+        with urllib.request.urlopen(server_url + "/health") as response:
+            assert json.loads(response.read()) == {"status": "ok"}
+
+    def test_counts_from_path(self, server_url, metadata_file):
+        status, body = post(server_url + "/counts", {"path": metadata_file})
+        assert status == 200
+        counts = json.loads(body)["counts"]
+        assert [c["count"] for c in counts["Program"]] == [2, 1]
+
+    def test_crosstab_from_upload(self, server_url, metadata_dataframe):
+        payload = metadata_dataframe.to_csv(index=False).encode("utf-8")
+        url = server_url + "/crosstab?row=Program&column=Data%20Type"
+        status, body = post(url, payload, "text/csv")
+        table = json.loads(body)
+        row = table["index"].index("RADx-UP")
+        column = table["columns"].index("Clinical")
+        assert table["counts"][row][column] == 1
+
+    def test_report_file(self, server_url, metadata_file):
+        status, body = post(
+            server_url + "/report", {"path": metadata_file, "date": "2024-07-29"}
+        )
+        workbook = openpyxl.load_workbook(io.BytesIO(body))
+        assert workbook["Info"]["B3"].value == "Current as of 2024-07-29"
+
+    def test_errors(self, server_url, report_service, metadata_file, monkeypatch):
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server_url + "/counts", {})
+        assert error.value.code == 400
+
+        monkeypatch.setattr(report_service, "timeout", 0.01)
+        monkeypatch.setattr(
+            report_service, "get_report", lambda *args: time.sleep(0.5)
+        )
+        with pytest.raises(urllib.error.HTTPError) as error:
+            post(server_url + "/counts", {"path": metadata_file})
+        assert error.value.code == 504
+
+    def test_cached_report_date(self, report_service, metadata_file, monkeypatch):
+        options = {"path": metadata_file}
+        report = report_service.get_report(options)
+        assert report_service.get_report(options) is report
+        # a report cached on an earlier day is not served with a stale date
+        monkeypatch.setattr(service.time, "strftime", lambda format: "2099-01-01")
+        assert report_service.get_report(options).to_dict()["date"] == "2099-01-01"
+
+    def test_cancel_between_stages(self, report_service, metadata_file, monkeypatch):
+        built = []
+        load, key = report_service.read_input({"path": metadata_file}, b"", "")
+        monkeypatch.setattr(
+            report_service,
+            "read_input",
+            lambda *args: ((lambda: time.sleep(0.3) or load()), key + ":slow"),
+        )
+        monkeypatch.setattr(
+            service.Reporter,
+            "build_basic_report",
+            lambda *args: built.append(args),
+        )
+        monkeypatch.setattr(report_service, "timeout", 0.05)
+        with pytest.raises(service.ServiceError) as error:
+            report_service.run(report_service.get_report, {"path": metadata_file})
+        assert error.value.status == 504
+        time.sleep(0.5)
+        assert built == []
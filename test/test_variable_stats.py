@@ -0,0 +1,67 @@
+import math
+
+import numpy as np
+import pytest
+
+from radx_reporter.basic.dictionary_scan import build_variable_lookup
+from radx_reporter.basic.variable_stats import RunningStats, file_stats, scan_data_files
+
+
+@pytest.fixture
+def bundles(tmp_path):
+    first = tmp_path / "phs000001"
+    first.mkdir()
+    (first / "rad_001_DATA.csv").write_text(
+        "record_id,nih_high_temp,Profuse Perspiration\n"
+        "a,1,0\nb,0,\nc,1,1\nd,,99\ne,5,0\n"
+    )
+    second = tmp_path / "phs000002"
+    second.mkdir()
+    (second / "up_002_data.csv").write_text("nih_high_temp,nih_age\n0,34\n97,61\n")
+    return tmp_path
+
+
+class TestVariableStats:
+
+    def test_running_stats_merge(self):
+        values = np.array([1.0, 2.0, 4.0, 8.0, 16.0, 3.0])
+        merged = RunningStats()
+        merged.update(values[:2])
+        other = RunningStats()
+        other.update(values[2:])
+        merged.merge(other)
+        assert merged.n == 6
+        assert merged.mean == pytest.approx(values.mean())
+        assert merged.std == pytest.approx(values.std(ddof=1))
+        assert (merged.min, merged.max) == (1.0, 16.0)
+        assert math.isnan(RunningStats().std)
+
+    def test_file_stats_in_chunks(self, gcbo_ontology, bundles):
+        lookup = build_variable_lookup(gcbo_ontology)
+        file_name = bundles / "phs000001" / "rad_001_DATA.csv"
+        stats = file_stats(str(file_name), gcbo_ontology, lookup, chunk_size=2)
+        assert list(stats) == ["bmir-radx:nih_high_temp", "bmir-radx:nih_sweating"]
+        temp = stats["bmir-radx:nih_high_temp"]
+        assert (temp.count, temp.missing, temp.undecoded) == (5, 1, 1)
+        assert temp.frequencies() == {"No": 1, "Yes": 2}
+        # response codes are not summarized as numbers
+        assert temp.numeric.n == 0
+        sweating = stats["bmir-radx:nih_sweating"]
+        assert sweating.frequencies() == {
+            "No": 2,
+            "Yes": 1,
+            "Prefer not to answer": 1,
+        }
+
+    def test_scan_data_files(self, gcbo_ontology, bundles):
+        table = scan_data_files(str(bundles), gcbo_ontology, chunk_size=2)
+        table = table.set_index("Element")
+        temp = table.loc["bmir-radx:nih_high_temp"]
+        assert (temp["Studies"], temp["Files"], temp["Count"]) == (2, 2, 7)
+        assert temp["Missing"] == 1
+        assert temp["Numeric Count"] == 0
+        assert math.isnan(temp["Max"])
+        assert temp["Value Counts"] == "No: 2; Yes: 2; Other: 1"
+        age = table.loc["bmir-radx:nih_age"]
+        assert (age["Numeric Count"], age["Mean"], age["Max"]) == (2, 47.5, 61)
+        assert age["Value Counts"] == ""
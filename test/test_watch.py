@@ -0,0 +1,92 @@
+import threading
+
+import pandas as pd
+
+from radx_reporter.reporter import Reporter
+from radx_reporter.watch import IncrementalReport, snapshot, watch
+
+
+def assert_same_counts(report, expected):
+    frames = report.to_frames()
+    expected_frames = expected.to_frames()
+    assert list(frames) == list(expected_frames)
+    for name, frame in expected_frames.items():
+        pd.testing.assert_frame_equal(frames[name], frame)
+
+
+class TestIncrementalReport:
+
+    def test_matches_full_report(self, metadata_dataframe):
+        incremental = IncrementalReport(["FOA NUMBER"], date="2024-07-29")
+        summary = incremental.update(metadata_dataframe)
+        assert summary == {"rows": 4, "parsed": 4, "added": 3, "removed": 0}
+        expected = Reporter.build_basic_report(
+            metadata_dataframe, ["FOA NUMBER"], date="2024-07-29"
+        )
+        assert_same_counts(incremental.report(), expected)
+
+    def test_parses_only_changed_rows(self, metadata_dataframe):
+        incremental = IncrementalReport(["FOA NUMBER"], date="2024-07-29")
+        incremental.update(metadata_dataframe)
+
+        edited = metadata_dataframe.copy()
+        edited.loc[0, "STUDY PROGRAM"] = "RADx-rad"
+        edited.loc[3, "STUDY STATUS"] = "Approved"
+        edited = edited.drop(index=2).reset_index(drop=True)
+        summary = incremental.update(edited)
+        assert summary == {"rows": 3, "parsed": 2, "added": 2, "removed": 2}
+        expected = Reporter.build_basic_report(
+            edited, ["FOA NUMBER"], date="2024-07-29"
+        )
+        assert_same_counts(incremental.report(), expected)
+
+        assert incremental.update(edited)["parsed"] == 0
+
+    def test_fuzzy_matches(self, metadata_dataframe):
+        misspelled = metadata_dataframe.copy()
+        misspelled.loc[2, "STUDY POPULATION FOCUS"] = "Chidren, Rural Comunities"
+        incremental = IncrementalReport(date="2024-07-29", fuzzy_distance=1)
+        incremental.update(misspelled)
+        edited = misspelled.copy()
+        edited.loc[0, "STUDY PROGRAM"] = "RADx-rad"
+        # the matches of unchanged rows are kept without parsing them again
+        assert incremental.update(edited)["parsed"] == 1
+        expected = Reporter.build_basic_report(
+            edited, date="2024-07-29", fuzzy_distance=1
+        )
+        report = incremental.report()
+        assert_same_counts(report, expected)
+        assert report.metadata["fuzzy_matches"] == expected.metadata["fuzzy_matches"]
+        assert len(report.metadata["fuzzy_matches"]) == 2
+
+
+class TestWatch:
+
+    def test_snapshot_directory(self, tmp_path):
+        (tmp_path / "export.csv").write_text("a\n1\n")
+        (tmp_path / "~$export.xlsx").write_text("")
+        (tmp_path / "notes.txt").write_text("")
+        assert list(snapshot(str(tmp_path))) == [str(tmp_path / "export.csv")]
+
+    def test_debounced_change(self, tmp_path):
+        path = tmp_path / "export.csv"
+        path.write_text("a\n1\n")
+        stop = threading.Event()
+        events = []
+
+        def on_change(changed):
+            events.append(changed)
+            stop.set()
+
+        thread = threading.Thread(
+            target=watch,
+            args=(str(tmp_path), on_change),
+            kwargs={"interval": 0.02, "debounce": 0.1, "stop": stop},
+        )
+        thread.start()
+        for i in range(3):
+            path.write_text("a\n" + "1\n" * (i + 2))
+            stop.wait(0.03)
+        thread.join(timeout=5)
+        stop.set()
+        assert events == [[str(path)]]